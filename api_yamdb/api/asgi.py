@@ -0,0 +1,272 @@
+'''
+ASGI deployment mode.
+
+Django 2.2 has no async views, so the ASGI application is an async
+front for the regular WSGI handler: the request body is read and the
+response is written on the event loop, and only the Django part of a
+request (middleware, view, SQL) runs in a thread. A slow client then
+holds a coroutine instead of a worker.
+
+Catalog reads (lists of titles, genres, categories, reviews and
+comments) and all other requests run in two separate bounded thread
+pools, so a burst of reads cannot starve writes and the other way
+round; the pool sizes bound the database connections of a process.
+A request that would wait behind more than MAX_QUEUE others gets 503
+at once instead of queueing without end.
+
+The response is passed from the thread to the event loop chunk by chunk
+through a small queue, so streaming responses (and their compression)
+are not buffered whole; the thread waits while the client is slow to
+read a big body, as a WSGI worker would.
+
+    $ gunicorn api_yamdb.asgi:application -k uvicorn.workers.UvicornWorker
+'''
+import asyncio
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+CATALOG_VIEWS = frozenset((
+    'title-list', 'genre-list', 'category-list', 'reviews-list',
+    'comments-list',
+))
+# Response chunks that may wait for the client before the thread blocks.
+STREAM_QUEUE = 8
+OVERLOADED = json.dumps(
+    {'detail': 'Сервер перегружен, повторите запрос позже'},
+    ensure_ascii=False,
+).encode()
+
+
+class ThreadPool:
+
+    '''Thread pool that refuses work once its queue is full.'''
+
+    def __init__(self, name, threads, max_queue):
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix=f'asgi-{name}')
+        self.limit = threads + max_queue
+        # Only touched from the event loop thread.
+        self.pending = 0
+
+    def full(self):
+        return self.pending >= self.limit
+
+    async def run(self, function, *args):
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, function, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class ClientGoneError(Exception):
+    pass
+
+
+class ResponseChannel:
+
+    '''
+    Status, headers and body chunks of a response, put by the pool
+    thread and read on the event loop; None ends the response.
+    '''
+
+    def __init__(self, loop, size=STREAM_QUEUE):
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+        self.closed = False
+
+    def put(self, item):
+        '''Called from the pool thread; waits while the queue is full.'''
+        if self.closed:
+            raise ClientGoneError
+        asyncio.run_coroutine_threadsafe(
+            self.queue.put(item), self.loop).result()
+
+    def close(self):
+        '''Nobody reads any more: unblock the thread and stop it.'''
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class AsyncApplication:
+
+    def __init__(self, wsgi_application, options=None):
+        options = options or settings.ASGI
+        self.wsgi_application = wsgi_application
+        self.catalog = ThreadPool(
+            'catalog', options['CATALOG_THREADS'], options['MAX_QUEUE'])
+        self.other = ThreadPool(
+            'other', options['THREADS'], options['MAX_QUEUE'])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported ASGI scope {scope["type"]}')
+        pool = self.pool(scope)
+        if pool.full():
+            await receive_body(receive, None)
+            return await self.overloaded(send)
+        channel = ResponseChannel(asyncio.get_running_loop())
+        with SpooledTemporaryFile(max_size=65536) as body:
+            if not await receive_body(receive, body):
+                return
+            body.seek(0)
+            wsgi = asyncio.ensure_future(pool.run(
+                self.call_wsgi, build_environ(scope, body), channel))
+            try:
+                await send_response(channel.queue, send)
+            finally:
+                channel.close()
+                try:
+                    await wsgi
+                except ClientGoneError:
+                    pass
+
+    def pool(self, scope):
+        '''Catalog pool for the catalog list reads, the other one else.'''
+        if scope['method'] not in ('GET', 'HEAD'):
+            return self.other
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return self.other
+        return self.catalog if match.view_name in CATALOG_VIEWS else (
+            self.other)
+
+    def call_wsgi(self, environ, channel):
+        '''Run Django in a pool thread, streaming the response out.'''
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        try:
+            result = self.wsgi_application(environ, start_response)
+            try:
+                chunks = iter(result)
+                # WSGI may call start_response as late as the first chunk.
+                first = next(chunks, b'')
+                channel.put((response['status'], response['headers']))
+                for chunk in itertools.chain((first,), chunks):
+                    if chunk:
+                        channel.put(chunk)
+            finally:
+                # Closing the response sends request_finished, which
+                # releases the database connection of this thread.
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            if not channel.closed:
+                channel.put(None)
+
+    @staticmethod
+    async def overloaded(send):
+        await send({
+            'type': 'http.response.start', 'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'retry-after', b'1'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': OVERLOADED})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.catalog.shutdown()
+                self.other.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def send_response(queue, send):
+    '''
+    Send what call_wsgi puts in `queue`. A chunk is held back until the
+    next one arrives, so the last one goes with more_body=False and a
+    single-chunk response takes one body message.
+    '''
+    start = await queue.get()
+    if start is None:
+        return
+    status, headers = start
+    await send({
+        'type': 'http.response.start', 'status': status, 'headers': headers,
+    })
+    pending = b''
+    while True:
+        chunk = await queue.get()
+        if chunk is None:
+            break
+        if pending:
+            await send({
+                'type': 'http.response.body', 'body': pending,
+                'more_body': True,
+            })
+        pending = chunk
+    await send({'type': 'http.response.body', 'body': pending})
+
+
+async def receive_body(receive, body):
+    '''
+    Read the request body into `body` (or drop it when None).
+    False when the client went away first.
+    '''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return False
+        if body is not None:
+            body.write(message.get('body', b''))
+        if not message.get('more_body'):
+            return True
+
+
+def build_environ(scope, body):
+    '''WSGI environ of an ASGI http scope (PEP 3333).'''
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+# Token claim -> User field, everything permissions need.
+USER_CLAIMS = {
+    'username': 'username',
+    'role': 'role',
+    'su': 'is_superuser',
+    'ver': 'auth_version',
+}
+
+
+def add_user_claims(token, user):
+    for claim, field in USER_CLAIMS.items():
+        token[claim] = getattr(user, field)
+    return token
+
+
+class UserVersionCache:
+
+    '''
+    Bounded LRU of user id -> current `auth_version` (None for
+    inactive or deleted users). Entries live for `ttl` seconds, so a
+    version bump made by another process is seen within that time.
+    '''
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(user_id)
+                return entry[0]
+        version = User.objects.filter(
+            pk=user_id, is_active=True,
+        ).values_list('auth_version', flat=True).first()
+        with self.lock:
+            self.entries[user_id] = (version, now + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return version
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_versions = UserVersionCache(
+    settings.AUTH_USER_CACHE['MAXSIZE'], settings.AUTH_USER_CACHE['TTL'])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+
+    '''
+    JWT authentication that builds `request.user` from token claims.
+    Only the claim fields are loaded, the rest of the profile is
+    deferred and fetched on first access. A token is accepted while
+    its `ver` claim matches the user's current `auth_version`.
+    '''
+
+    def get_user(self, validated_token):
+        if 'ver' not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if user_versions.get(user_id) != validated_token['ver']:
+            raise AuthenticationFailed(
+                _('Token is no longer valid'), code='token_not_valid')
+        known = {'id': user_id, 'is_active': True}
+        for claim, field in USER_CLAIMS.items():
+            known[field] = validated_token[claim]
+        # from_db() takes the values in the order of the model fields.
+        fields = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in known
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS, fields, [known[field] for field in fields])
@@ -0,0 +1,126 @@
+'''
+Response cache for public read endpoints.
+
+Entries are the serialized `response.data` of list and retrieve actions,
+keyed by API version and full path. Every entry remembers the versions
+of the tags it depends on (`titles`, `title:<id>`, ...); bumping a tag
+stores a new random token for it and makes exactly the entries that
+depend on it stale, so invalidation needs no key scans. An evicted tag
+reads as missing and matches no entry.
+'''
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .replicas import primary_reads
+
+
+def get_cache():
+    return caches[settings.API_CACHE['ALIAS']]
+
+
+def tag_key(tag):
+    return f'api:tag:{tag}'
+
+
+# Bumped along with every tag: a request that sees it move while its
+# handler runs may have read data older than the versions it would store.
+ANY_TAG = '*'
+
+
+def invalidate(*tags):
+    cache = get_cache()
+    cache.set_many({
+        tag_key(tag): uuid.uuid4().hex for tag in tags + (ANY_TAG,)
+    }, timeout=None)
+
+
+def response_key(version, path):
+    digest = hashlib.md5(f'{version}:{path}'.encode()).hexdigest()
+    return f'api:response:{digest}'
+
+
+def tag_versions(cache, tags, create=False):
+    '''
+    Current version token of every tag; a tag that was never bumped or
+    got evicted has none. With `create`, such tags get a fresh token, so
+    an entry stored now can never match an older one again.
+    '''
+    keys = {tag: tag_key(tag) for tag in tags}
+    versions = cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in versions]
+    if create and missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(cache.get_many(missing))
+    return {tag: versions.get(key) for tag, key in keys.items()}
+
+
+class CachedReadMixin:
+
+    '''
+    Serve `list` and `retrieve` from the response cache.
+    After TIMEOUT an entry goes stale: the first request recomputes it
+    while concurrent ones keep getting the stale copy for STALE_TIMEOUT.
+
+    Tag versions are read before the handler runs, so a write that
+    commits meanwhile leaves the new entry stale instead of hiding behind
+    it. Tags that only the data can tell (the titles on a list page) are
+    read afterwards, and the entry is not stored if any tag was bumped
+    while the handler ran. A miss reads from the primary, never from a
+    replica that may lag behind those versions.
+    '''
+
+    cache_tags = ()
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def get_data_cache_tags(self, data):
+        return []
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        config = settings.API_CACHE
+        if not config['ENABLED']:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = response_key(request.version, request.get_full_path())
+        entry = cache.get(key)
+        if entry is not None and (
+            tag_versions(cache, entry['tags']) == entry['tags']
+        ):
+            if time.time() < entry['fresh_until']:
+                return Response(entry['data'], headers={'X-Cache': 'HIT'})
+            if not cache.add(f'{key}:lock', 1, config['LOCK_TIMEOUT']):
+                return Response(entry['data'], headers={'X-Cache': 'STALE'})
+
+        tags = tag_versions(
+            cache, self.get_cache_tags() + [ANY_TAG], create=True)
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            tags.update(tag_versions(
+                cache, self.get_data_cache_tags(response.data), create=True))
+            if None not in tags.values() and (
+                tag_versions(cache, [ANY_TAG]) == {ANY_TAG: tags[ANY_TAG]}
+            ):
+                del tags[ANY_TAG]
+                cache.set(key, {
+                    'data': response.data,
+                    'tags': tags,
+                    'fresh_until': time.time() + config['TIMEOUT'],
+                }, config['TIMEOUT'] + config['STALE_TIMEOUT'])
+        cache.delete(f'{key}:lock')
+        response['X-Cache'] = 'MISS'
+        return response
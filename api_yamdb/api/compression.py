@@ -0,0 +1,219 @@
+'''
+Response compression.
+
+`CompressionMiddleware` encodes responses with the best coding the
+client accepts: `br` when the brotli package is installed, else `gzip`.
+Responses are sent as they are when they are shorter than MIN_SIZE,
+already carry a Content-Encoding, have a Content-Type from SKIP_TYPES
+(images, archives: compressed already) or ask for `no-transform`.
+Streaming responses are compressed and flushed chunk by chunk, so a
+big export is never held in memory whole.
+
+Per route and coding, Prometheus gets the bytes before and after
+compression, the compressed/original size ratio of every response and
+the CPU time spent compressing it (thread CPU time, so time the worker
+waits on other threads is not counted).
+'''
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from prometheus_client import Counter, Histogram
+
+from .instrumentation import InstrumentationMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LABELS = ('route', 'encoding')
+
+COMPRESSION_BYTES = Counter(
+    'yamdb_compression_bytes', 'Response bytes before and after compression.',
+    LABELS + ('stage',),
+)
+COMPRESSION_RATIO = Histogram(
+    'yamdb_compression_ratio', 'Compressed to original size per response.',
+    LABELS, buckets=(.05, .1, .15, .2, .25, .3, .4, .5, .6, .8, 1),
+)
+COMPRESSION_CPU_SECONDS = Histogram(
+    'yamdb_compression_cpu_seconds', 'CPU time spent compressing a response.',
+    LABELS,
+    buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .5),
+)
+
+
+class GzipEncoder:
+
+    name = 'gzip'
+
+    def __init__(self, options):
+        # wbits 16 + 15: gzip header and trailer around the deflate data.
+        self.compressor = zlib.compressobj(
+            options['GZIP_LEVEL'], zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+
+    name = 'br'
+
+    def __init__(self, options):
+        self.compressor = brotli.Compressor(
+            quality=options['BROTLI_QUALITY'])
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+# In order of preference between codings with the same q-value.
+ENCODERS = (
+    ((BrotliEncoder,) if brotli is not None else ()) + (GzipEncoder,)
+)
+
+
+def accepted_codings(header):
+    '''{coding: q-value} of an Accept-Encoding header.'''
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoder(header):
+    '''Encoder class for an Accept-Encoding header, None for identity.'''
+    codings = accepted_codings(header)
+    default = codings.get('*', 0.0)
+    best = max(
+        ENCODERS, key=lambda encoder: codings.get(encoder.name, default))
+    return best if codings.get(best.name, default) > 0 else None
+
+
+class CompressionStats:
+
+    '''Sizes and CPU time of one compressed response.'''
+
+    def __init__(self, route, encoding):
+        self.labels = (route, encoding)
+        self.original = 0
+        self.compressed = 0
+        self.cpu = 0.0
+
+    def add(self, original, compressed, cpu):
+        self.original += original
+        self.compressed += compressed
+        self.cpu += cpu
+
+    def observe(self):
+        COMPRESSION_BYTES.labels(*self.labels, 'original').inc(self.original)
+        COMPRESSION_BYTES.labels(
+            *self.labels, 'compressed').inc(self.compressed)
+        COMPRESSION_CPU_SECONDS.labels(*self.labels).observe(self.cpu)
+        if self.original:
+            COMPRESSION_RATIO.labels(*self.labels).observe(
+                self.compressed / self.original)
+
+
+class CompressionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        options = settings.COMPRESSION
+        if not self.compressible(response, options):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoder_class = choose_encoder(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoder_class is None:
+            return response
+        encoder = encoder_class(options)
+        stats = CompressionStats(
+            InstrumentationMiddleware.route(request), encoder.name)
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                response.streaming_content, encoder, stats)
+            del response['Content-Length']
+        elif not self.compress_content(response, encoder, stats):
+            return response
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The bytes changed, only a weak match is possible now.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoder.name
+        return response
+
+    @staticmethod
+    def compressible(response, options):
+        if response.has_header('Content-Encoding'):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        if response.get('Content-Type', '').startswith(options['SKIP_TYPES']):
+            return False
+        if response.streaming:
+            length = response.get('Content-Length')
+            return length is None or int(length) >= options['MIN_SIZE']
+        return len(response.content) >= options['MIN_SIZE']
+
+    @staticmethod
+    def compress_content(response, encoder, stats):
+        '''Compress in place; False when that would not make it shorter.'''
+        content = response.content
+        started = time.thread_time()
+        compressed = encoder.compress(content) + encoder.finish()
+        stats.add(len(content), len(compressed),
+                  time.thread_time() - started)
+        stats.observe()
+        if len(compressed) >= len(content):
+            return False
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        return True
+
+    @staticmethod
+    def compress_stream(chunks, encoder, stats):
+        try:
+            for chunk in chunks:
+                started = time.thread_time()
+                data = encoder.compress(chunk) + encoder.flush()
+                stats.add(len(chunk), len(data),
+                          time.thread_time() - started)
+                if data:
+                    yield data
+            started = time.thread_time()
+            data = encoder.finish()
+            stats.add(0, len(data), time.thread_time() - started)
+            yield data
+        finally:
+            stats.observe()
@@ -1,3 +1,4 @@
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 
 
@@ -9,3 +10,24 @@ class ConfirmationCodeField(serializers.CharField):
         kwargs['write_only'] = True
 
         super().__init__(*args, **kwargs)
+
+
+class PrefetchedSlugRelatedField(serializers.SlugRelatedField):
+    '''
+    SlugRelatedField that resolves slugs from a {slug: object} dict
+    the parent serializer put in `context[context_key]`, so a batch
+    of items costs one query per related table instead of one per slug.
+    '''
+
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            return self.context[self.context_key][str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        except TypeError:
+            self.fail('invalid')
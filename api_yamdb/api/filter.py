@@ -1,5 +1,8 @@
 import django_filters as filters
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
@@ -9,10 +12,30 @@ class TitleFilter(filters.FilterSet):
     category = filters.CharFilter(
         field_name='category__slug', lookup_expr='exact'
     )
-    genre = filters.CharFilter(
-        field_name='genre__slug', lookup_expr='exact'
-    )
+    genre = filters.CharFilter(method='filter_genre')
 
     class Meta:
         model = Title
         fields = ['name', 'category', 'genre', 'year']
+
+    def filter_genre(self, queryset, name, value):
+        # A semi-join keeps the result in primary key order,
+        # so paging by id needs no sort of the joined rows.
+        return queryset.filter(id__in=Title.genre.through.objects.filter(
+            genre__slug=value).values('title_id'))
+
+
+class TitleSearchFilter(BaseFilterBackend):
+
+    '''
+    Full-text `?search=` over title name, description, genres
+    and category, ordered by relevance.
+    '''
+
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search_titles(queryset, text).order_by('-search_rank', 'id')
@@ -0,0 +1,200 @@
+'''
+Per-request performance instrumentation.
+
+`InstrumentationMiddleware` measures wall time, database time and query
+count of every request, plus serializer and render time for the API
+views. The numbers go to the `Server-Timing` response header, to
+per-route Prometheus histograms and, above SLOW_REQUEST_MS, to the
+`api.instrumentation` logger together with the executed SQL.
+
+Histograms are served by `metrics_view`. Under gunicorn set
+PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py): every worker then
+writes its samples to memory-mapped files in that directory and the
+endpoint merges them, so any worker reports the totals of all of them.
+'''
+import logging
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Histogram, generate_latest,
+                               multiprocess)
+
+logger = logging.getLogger(__name__)
+
+LABELS = ('route', 'method')
+SECONDS = (
+    .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10,
+)
+
+REQUEST_SECONDS = Histogram(
+    'yamdb_request_seconds', 'Wall time of a request.',
+    LABELS + ('status',), buckets=SECONDS,
+)
+DB_SECONDS = Histogram(
+    'yamdb_request_db_seconds', 'Time spent in SQL per request.',
+    LABELS, buckets=SECONDS,
+)
+QUERIES = Histogram(
+    'yamdb_request_queries', 'SQL queries per request.',
+    LABELS, buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+SERIALIZE_SECONDS = Histogram(
+    'yamdb_request_serialize_seconds', 'Serializer time per request.',
+    LABELS, buckets=SECONDS,
+)
+RENDER_SECONDS = Histogram(
+    'yamdb_request_render_seconds', 'Response render time per request.',
+    LABELS, buckets=SECONDS,
+)
+
+
+class RequestTimings:
+
+    '''Timings of one request, kept on `request.timings`.'''
+
+    def __init__(self, keep_sql):
+        self.keep_sql = keep_sql
+        self.queries = []
+        self.query_count = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        '''Database execute wrapper: time every statement.'''
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.db += elapsed
+            self.query_count += 1
+            if len(self.queries) < self.keep_sql:
+                self.queries.append((elapsed, sql))
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'db;dur={self.db * 1000:.1f};desc="{self.query_count} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'render;dur={self.render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+class TimedSerializerMixin:
+
+    '''
+    View mixin: adds the time spent in `to_representation` of the
+    view's serializer to `request.timings.serialize`. Nested
+    serializers are counted inside their parent.
+    '''
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = timed_serializer(self.get_serializer_class())
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+TIMED_SERIALIZERS = {}
+
+
+def timed_serializer(serializer_class):
+    '''Subclass of `serializer_class` with a timed to_representation.'''
+    timed = TIMED_SERIALIZERS.get(serializer_class)
+    if timed is None:
+        timed = type(serializer_class.__name__, (serializer_class,), {
+            '__module__': serializer_class.__module__,
+            'to_representation': timed_to_representation,
+        })
+        TIMED_SERIALIZERS[serializer_class] = timed
+    return timed
+
+
+def timed_to_representation(self, instance):
+    to_representation = super(type(self), self).to_representation
+    timings = getattr(self.context.get('request'), 'timings', None)
+    if timings is None:
+        return to_representation(instance)
+    started = time.perf_counter()
+    try:
+        return to_representation(instance)
+    finally:
+        timings.serialize += time.perf_counter() - started
+
+
+class InstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = settings.INSTRUMENTATION
+        timings = RequestTimings(keep_sql=options['LOG_SQL_LIMIT'])
+        request.timings = timings
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        response['Server-Timing'] = timings.server_timing(total)
+        route = self.route(request)
+        if route != 'metrics':
+            self.observe(request, response, route, timings, total)
+        if total * 1000 >= options['SLOW_REQUEST_MS']:
+            self.log_slow(request, response, route, timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        '''Render happens right after this hook; time it until done.'''
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.timings.render += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def route(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match and match.view_name else 'unmatched'
+
+    @staticmethod
+    def observe(request, response, route, timings, total):
+        labels = (route, request.method)
+        REQUEST_SECONDS.labels(*labels, response.status_code).observe(total)
+        DB_SECONDS.labels(*labels).observe(timings.db)
+        QUERIES.labels(*labels).observe(timings.query_count)
+        SERIALIZE_SECONDS.labels(*labels).observe(timings.serialize)
+        RENDER_SECONDS.labels(*labels).observe(timings.render)
+
+    @staticmethod
+    def log_slow(request, response, route, timings, total):
+        statements = '\n'.join(
+            f'  {elapsed * 1000:.1f} ms  {sql}'
+            for elapsed, sql in timings.queries
+        )
+        logger.warning(
+            'Slow request %s %s (%s) %s: %.1f ms, %d queries in %.1f ms\n%s',
+            request.method, request.get_full_path(), route,
+            response.status_code, total * 1000, timings.query_count,
+            timings.db * 1000, statements,
+        )
+
+
+def metrics_view(request):
+    '''Prometheus text exposition of the request histograms.'''
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,30 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+
+    '''
+    Page numbers by default, keyset pages when `cursor` is passed.
+    An empty `?cursor=` opens the first keyset page: no OFFSET
+    and no COUNT(*), so deep pages cost the same as the first one.
+    '''
+
+    cursor_pagination_class = PubDateCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_pagination = None
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_pagination = self.cursor_pagination_class()
+        return self.cursor_pagination.paginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination is None:
+            return super().get_paginated_response(data)
+        return self.cursor_pagination.get_paginated_response(data)
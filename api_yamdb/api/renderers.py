@@ -0,0 +1,55 @@
+'''
+JSON renderer on orjson.
+
+Gives the bytes of DRF's JSONRenderer with the project settings (UTF-8,
+compact separators, ISO 8601 datetimes with "Z" for UTC, U+2028 and
+U+2029 escaped). Two cases differ and both still parse to the same
+values: floats in exponent form are written the short way (1e-07
+becomes 1e-7), and NaN or Infinity becomes null where DRF raises.
+Indented output (`?indent=`, the browsable API), non-default
+UNICODE_JSON/COMPACT_JSON/STRICT_JSON and anything orjson cannot
+encode (integers over 64 bits) go to the stdlib renderer, as does
+everything when orjson is not installed.
+'''
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Lazy strings, Decimal, querysets, generators: the stdlib encoder's
+# conversions. datetime, date, time, UUID, tuple and the ReturnList /
+# ReturnDict subclasses are encoded by orjson itself.
+ENCODER = JSONEncoder()
+OPTIONS = 0 if orjson is None else (
+    orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+ESCAPES = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.compact and self.strict and not self.ensure_ascii
+            and self.get_indent(
+                accepted_media_type, renderer_context or {}) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.use_orjson(
+                accepted_media_type, renderer_context):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data, default=ENCODER.default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        for character, escape in ESCAPES:
+            if character in content:
+                content = content.replace(character, escape)
+        return content
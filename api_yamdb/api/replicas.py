@@ -0,0 +1,145 @@
+'''
+Read replicas.
+
+`ReplicaMiddleware` picks a healthy replica for every safe-method
+request to an API view; `ReplicaRouter` sends the reads of that request
+there and everything else (writes, unsafe requests, management
+commands) to `default`.
+
+Read-your-writes: a successful unsafe API request sets a signed cookie
+that keeps the client's reads on the primary for STICKY_SECONDS, long
+enough for the replicas to catch up with what it has just written.
+
+A replica that fails with OperationalError is taken out of rotation
+for RETRY_AFTER seconds and the request is served again from the
+primary.
+
+Reads that fill the response cache go to the primary (`primary_reads`):
+a lagging replica would otherwise store old data under the tag versions
+of a write it has not replayed yet.
+'''
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+COOKIE_SALT = 'api.replicas'
+
+read_alias = ContextVar('read_alias', default=None)
+
+
+@contextmanager
+def primary_reads():
+    token = read_alias.set(None)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+class ReplicaHealth:
+
+    '''Replicas that failed recently, with the time to retry them.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.down_until = {}
+
+    def mark_down(self, alias, retry_after):
+        with self.lock:
+            self.down_until[alias] = time.monotonic() + retry_after
+
+    def available(self, aliases):
+        now = time.monotonic()
+        with self.lock:
+            return [
+                alias for alias in aliases
+                if self.down_until.get(alias, 0) <= now
+            ]
+
+    def reset(self):
+        with self.lock:
+            self.down_until.clear()
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, first, second, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.replica = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.replica is not None:
+                read_alias.reset(request.replica_token)
+        if (request.method not in SAFE_METHODS
+                and getattr(request, 'api_view', False)
+                and response.status_code < 400):
+            self.stick_to_primary(response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.api_view = hasattr(view_func, 'cls')
+        if (request.method not in SAFE_METHODS or not request.api_view
+                or self.sticky(request)):
+            return None
+        replicas = health.available(settings.REPLICAS['ALIASES'])
+        if replicas:
+            request.replica = random.choice(replicas)
+            request.replica_token = read_alias.set(request.replica)
+            # Django flags a connection whose query raised a database
+            # error; start clean so the flag belongs to this request.
+            connections[request.replica].errors_occurred = False
+        request.view = (view_func, view_args, view_kwargs)
+        return None
+
+    def process_exception(self, request, exception):
+        '''Replica failed: retire it for a while, answer from primary.'''
+        if request.replica is None or not isinstance(
+                exception, OperationalError):
+            return None
+        if not connections[request.replica].errors_occurred:
+            # The primary (or something else) failed, not the replica.
+            return None
+        health.mark_down(request.replica, settings.REPLICAS['RETRY_AFTER'])
+        read_alias.set(None)
+        view_func, view_args, view_kwargs = request.view
+        return view_func(request, *view_args, **view_kwargs)
+
+    @staticmethod
+    def sticky(request):
+        until = request.get_signed_cookie(
+            settings.REPLICAS['COOKIE'], default=None, salt=COOKIE_SALT,
+            max_age=settings.REPLICAS['STICKY_SECONDS'])
+        return until is not None and float(until) > time.time()
+
+    @staticmethod
+    def stick_to_primary(response):
+        seconds = settings.REPLICAS['STICKY_SECONDS']
+        response.set_signed_cookie(
+            settings.REPLICAS['COOKIE'], str(time.time() + seconds),
+            salt=COOKIE_SALT, max_age=seconds, httponly=True,
+        )
@@ -1,14 +1,21 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import exceptions, serializers
 from rest_framework.relations import SlugRelatedField
-from rest_framework.validators import UniqueTogetherValidator, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator
 from rest_framework_simplejwt.tokens import RefreshToken
 from reviews.models import Category, Comment, Genre, Review, Title
 
-from .fields import ConfirmationCodeField
+from .authentication import add_user_claims
+from .fields import ConfirmationCodeField, PrefetchedSlugRelatedField
+from .permissions import AdminOnly
+from .sparse import SparseFieldsMixin
 
 UNIQUE_REVIEW = 'Вы уже оставили отзыв к данному произведению'
+TITLE_NOT_FOUND = 'Произведение с id={pk} не найдено'
+TITLE_DUPLICATE = 'Произведение с id={pk} передано несколько раз'
 
 User = get_user_model()
 
@@ -86,18 +93,13 @@ class GetTokenSerializer(serializers.Serializer):
 
     @classmethod
     def get_token(cls, user):
-        return RefreshToken.for_user(user)
-
-    def validate_username(self, value):
-        try:
-            if User.objects.get(username=value):
-                return value
-        except User.DoesNotExist:
-            raise exceptions.NotFound()
+        return add_user_claims(RefreshToken.for_user(user), user)
 
     def validate(self, attrs):
-        self.user = get_object_or_404(User, username=attrs['username'])
-        if self.user.check_confirmation_code(attrs['confirmation_code']):
+        self.user = User.objects.filter(username=attrs['username']).first()
+        if self.user is None:
+            raise exceptions.NotFound()
+        if self.user.redeem_confirmation_code(attrs['confirmation_code']):
             refresh = self.get_token(self.user)
             return {'access': str(refresh.access_token)}
         raise serializers.ValidationError('The data is not valid')
@@ -117,13 +119,48 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class AuthorSerializer(serializers.ModelSerializer):
+
+    '''
+    Автор в ?expand=author. Поля профиля видны только тем, кому открыт
+    /users/ (AdminOnly): раскрытие не показывает больше, чем API.
+    '''
+
+    profile_fields = ('first_name', 'last_name', 'bio')
+
+    class Meta:
+        model = User
+        fields = ('username', 'first_name', 'last_name', 'bio')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not AdminOnly().has_permission(request, None):
+            for name in self.profile_fields:
+                del fields[name]
+        return fields
+
+
+class TitleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.FloatField(read_only=True)
 
+    relations = {
+        'genre': (
+            lambda: SlugRelatedField(
+                many=True, read_only=True, slug_field='slug'),
+            lambda: GenreSerializer(many=True, read_only=True),
+        ),
+        'category': (
+            lambda: SlugRelatedField(read_only=True, slug_field='slug'),
+            lambda: CategorySerializer(read_only=True),
+        ),
+    }
+    expanded = ('genre', 'category')
+
     class Meta:
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'changed_at')
         model = Title
 
 
@@ -139,39 +176,179 @@ class TitleCreateSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = ('rating', 'rating_sum', 'rating_count', 'changed_at')
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class LeaderboardSerializer(serializers.Serializer):
+    rank = serializers.IntegerField()
+    score = serializers.FloatField()
+    review_count = serializers.IntegerField()
+    title = TitleSerializer()
+
+
+class TrendingSerializer(LeaderboardSerializer):
+    trending = serializers.IntegerField()
+
+
+class TitleStatsSerializer(serializers.Serializer):
+    title = serializers.IntegerField(source='title_id')
+    count = serializers.IntegerField()
+    mean = serializers.FloatField()
+    median = serializers.FloatField()
+    stddev = serializers.FloatField()
+    scores = serializers.SerializerMethodField()
+
+    def get_scores(self, stats):
+        return {str(score): count for score, count in enumerate(
+            stats.counts, start=1)}
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+
+    '''
+    Validates a batch of titles with one query per referenced table
+    and saves it with bulk INSERT/UPDATE statements. Items with an
+    `id` update that title, the rest are created.
+    '''
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            limit = settings.BULK_TITLES_MAX_ITEMS
+            if len(data) > limit:
+                raise exceptions.ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        f'Не больше {limit} произведений за запрос'],
+                })
+            self.prefetch([item for item in data if isinstance(item, dict)])
+        items = super().to_internal_value(data)
+        # Raised here rather than in validate() to keep the errors
+        # a per-item list.
+        self.check_duplicates(items)
+        return items
+
+    def prefetch(self, items):
+        categories = {str(item.get('category')) for item in items}
+        genres = {
+            str(slug) for item in items
+            if isinstance(item.get('genre'), list)
+            for slug in item['genre']
+        }
+        ids = {
+            int(item['id']) for item in items
+            if str(item.get('id', '')).isdigit()
+        }
+        self._context.update(
+            categories=Category.objects.in_bulk(categories, field_name='slug'),
+            genres=Genre.objects.in_bulk(genres, field_name='slug'),
+            title_ids=set(
+                Title.objects.filter(id__in=ids).values_list('id', flat=True)
+            ) if ids else set(),
+        )
+
+    @staticmethod
+    def check_duplicates(items):
+        seen = set()
+        errors = []
+        for item in items:
+            pk = item.get('id')
+            if pk is not None and pk in seen:
+                errors.append({'id': [TITLE_DUPLICATE.format(pk=pk)]})
+            else:
+                errors.append({})
+            seen.add(pk)
+        if any(errors):
+            raise exceptions.ValidationError(errors)
+
+    def create(self, items):
+        titles, created, updated = [], [], []
+        for item in items:
+            genres = item.pop('genre')
+            title = Title(**item)
+            # Lets the response render the genres without a query.
+            title._prefetched_objects_cache = {'genre': genres}
+            titles.append(title)
+            (updated if title.pk else created).append(title)
+        Title.objects.bulk_create(created)
+        if created and created[0].pk is None:
+            self.fill_created_ids(created)
+        if updated:
+            # bulk_update skips auto_now, set it for the leaderboards.
+            now = timezone.now()
+            for title in updated:
+                title.changed_at = now
+            Title.objects.bulk_update(updated, (
+                'name', 'year', 'description', 'category', 'changed_at'))
+            Title.genre.through.objects.filter(
+                title_id__in=[title.pk for title in updated]).delete()
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+            for title in titles
+            for genre in title._prefetched_objects_cache['genre']
+        )
+        return titles
+
+    @staticmethod
+    def fill_created_ids(titles):
+        '''
+        Backends without RETURNING for bulk inserts (SQLite): the
+        caller's transaction holds the only write lock, so the new
+        rows are the newest ids, in insertion order.
+        '''
+        ids = Title.objects.order_by('-id').values_list(
+            'id', flat=True)[:len(titles)]
+        for title, pk in zip(titles, reversed(list(ids))):
+            title.pk = pk
+
+
+class TitleBulkSerializer(TitleCreateSerializer):
+    id = serializers.IntegerField(required=False)
+    category = PrefetchedSlugRelatedField(
+        'categories', slug_field='slug', queryset=Category.objects.all())
+    genre = PrefetchedSlugRelatedField(
+        'genres', many=True, slug_field='slug',
+        queryset=Genre.objects.all())
+
+    class Meta(TitleCreateSerializer.Meta):
+        list_serializer_class = TitleBulkListSerializer
+
+    def validate_id(self, value):
+        if value not in self.context['title_ids']:
+            raise exceptions.ValidationError(TITLE_NOT_FOUND.format(pk=value))
+        return value
+
+
+AUTHOR_RELATIONS = {
+    'author': (
+        lambda: SlugRelatedField(read_only=True, slug_field='username'),
+        lambda: AuthorSerializer(read_only=True),
+    ),
+}
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = SlugRelatedField(
         read_only=True,
         slug_field='username',
         default=serializers.CurrentUserDefault(),
     )
 
+    relations = AUTHOR_RELATIONS
+
     class Meta:
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         read_only_fields = ('id', 'author', 'pub_date')
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-        if Review.objects.filter(
-            author=self.context['request'].user,
-            title=self.context['view'].kwargs.get('title_id')
-        ).exists():
-            raise ValidationError(UNIQUE_REVIEW)
-        return data
-
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = SlugRelatedField(
         read_only=True,
         slug_field='username'
     )
 
+    relations = AUTHOR_RELATIONS
+
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.leaderboards import leaderboards_refreshed
+from reviews.models import Category, Genre, Review, Title
+
+from .cache import invalidate
+
+
+def invalidate_on_commit(*tags):
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    invalidate_on_commit('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    invalidate_on_commit('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate_on_commit('titles', f'title:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        tags = ['titles'] if reverse else ['titles', f'title:{instance.pk}']
+        invalidate_on_commit(*tags)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_title_rating(sender, instance, **kwargs):
+    # Only the reviewed title changes: its detail and the lists that
+    # contain it.
+    invalidate_on_commit(f'title:{instance.title_id}')
+
+
+@receiver(leaderboards_refreshed)
+def invalidate_leaderboards(sender, **kwargs):
+    invalidate_on_commit('leaderboards')
@@ -0,0 +1,104 @@
+'''
+Sparse fieldsets for read requests.
+
+`?fields=name,rating` keeps only these fields of the response objects
+(`id` is always there: the response cache and clients key on it).
+`?expand=genre` renders the listed relations as nested objects and
+the other ones as slugs; without `?expand=` every relation keeps its
+default form. The viewset side drops the joins, prefetches and columns
+the requested fields do not need.
+'''
+from rest_framework import exceptions
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def requested(request, param):
+    '''Set of names in a comma separated parameter, None if absent.'''
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+
+    '''
+    Serializer side. `relations` maps a field name to factories of its
+    collapsed and expanded forms; `expanded` lists the relations
+    nested by default.
+    '''
+
+    relations = {}
+    expanded = ()
+
+    def is_response_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_response_root():
+            return fields
+        request = self.context.get('request')
+        only = requested(request, FIELDS_PARAM)
+        expand = requested(request, EXPAND_PARAM)
+        if only is not None:
+            self.check_names(FIELDS_PARAM, only, fields)
+            fields = {
+                name: field for name, field in fields.items()
+                if name == 'id' or name in only
+            }
+        if expand is not None:
+            self.check_names(EXPAND_PARAM, expand, self.relations)
+        for name, (collapsed, expanded) in self.relations.items():
+            if name not in fields:
+                continue
+            nested = name in (self.expanded if expand is None else expand)
+            fields[name] = expanded() if nested else collapsed()
+        return fields
+
+    @staticmethod
+    def check_names(param, names, known):
+        unknown = names - set(known)
+        if unknown:
+            raise exceptions.ValidationError({param: [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}']})
+
+
+class SparseQuerysetMixin:
+
+    '''
+    Viewset side: `sparse_select` and `sparse_prefetch` relations are
+    joined or prefetched only when requested, and with `?fields=` only
+    the requested columns (plus `sparse_columns`) are loaded.
+    '''
+
+    sparse_select = ()
+    sparse_prefetch = ()
+    sparse_columns = ()
+
+    def sparse_queryset(self, queryset):
+        fields = requested(self.request, FIELDS_PARAM)
+        select = [name for name in self.sparse_select
+                  if fields is None or name in fields]
+        prefetch = [name for name in self.sparse_prefetch
+                    if fields is None or name in fields]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if fields is not None:
+            columns = {
+                field.name for field in queryset.model._meta.concrete_fields
+            }
+            queryset = queryset.only(
+                'id', *self.sparse_columns, *(columns & fields))
+        return queryset
@@ -2,8 +2,9 @@ from django.urls import include, path
 from rest_framework import routers
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserViewSet,
-                    custom_token_obtain_pair, get_confirmation_code)
+                    LeaderboardViewSet, ReviewViewSet, TitleViewSet,
+                    UserViewSet, custom_token_obtain_pair,
+                    get_confirmation_code)
 
 router_v1 = routers.DefaultRouter()
 
@@ -20,6 +21,8 @@ router_v1.register(r'users', UserViewSet, basename='users')
 router_v1.register(r'categories', CategoryViewSet, basename='category')
 router_v1.register(r'genres', GenreViewSet, basename='genre')
 router_v1.register(r'titles', TitleViewSet, basename='title')
+router_v1.register(
+    r'leaderboards', LeaderboardViewSet, basename='leaderboards')
 
 auth_patterns = [
     path('signup/', get_confirmation_code, name='signup'),
@@ -1,31 +1,49 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import (LimitOffsetPagination,
                                        PageNumberPagination)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.views import TokenViewBase
-from reviews.models import Category, Genre, Review, Title
-
-from .filter import TitleFilter
+from reviews.models import (Category, Comment, Genre, GenreRanking, Review,
+                            Title, TitleRanking, TitleStats)
+from reviews.search import index_titles
+from reviews.utils import insert_if_exists
+from users.models import OutboxEmail
+
+from .authentication import user_versions
+from .cache import CachedReadMixin
+from .filter import TitleFilter, TitleSearchFilter
+from .instrumentation import TimedSerializerMixin
 from .mixins import ListOrCreateOrDestroy
+from .pagination import PageNumberOrCursorPagination
 from .permissions import (AdminOnly, AuthorOrAdminOrModeratorOnly,
                           ReadOrAdminOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
+from .rows import COMMENT_ROWS, REVIEW_ROWS, TITLE_ROWS, FastListMixin
+from .serializers import (UNIQUE_REVIEW, CategorySerializer, CommentSerializer,
                           GenreSerializer, GetTokenSerializer,
-                          ReviewSerializer, TitleCreateSerializer,
-                          TitleSerializer, UserMeSerializer,
+                          LeaderboardSerializer, ReviewSerializer,
+                          TitleBulkSerializer, TitleCreateSerializer,
+                          TitleSerializer, TitleStatsSerializer,
+                          TrendingSerializer, UserMeSerializer,
                           UserRegistrationSerializer, UserSerializer)
+from .signals import invalidate_on_commit
+from .sparse import SparseQuerysetMixin
 
 User = get_user_model()
 
+BULK_INDEX_CHUNK = 500
+
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(TimedSerializerMixin, viewsets.ModelViewSet):
 
     '''
     Предоставляет возможность работать объектами пользователей:
@@ -49,7 +67,26 @@ class UserViewSet(viewsets.ModelViewSet):
         return self.serializer_class
 
     def get_instance(self):
-        return self.request.user
+        user = self.request.user
+        deferred = user.get_deferred_fields()
+        if deferred:
+            user.refresh_from_db(fields=deferred)
+        return user
+
+    def perform_update(self, serializer):
+        # Токены несут username, роль и активность: при их смене
+        # выданные токены отзываются.
+        instance = serializer.instance
+        old_access = (instance.username, instance.role, instance.is_active)
+        user = serializer.save()
+        if (user.username, user.role, user.is_active) != old_access:
+            user.bump_auth_version()
+            user_versions.discard(user.pk)
+
+    def perform_destroy(self, instance):
+        user_id = instance.pk
+        instance.delete()
+        user_versions.discard(user_id)
 
     @action(
         methods=['get', 'put', 'patch', 'delete'],
@@ -75,6 +112,15 @@ class CustomTokenObtainPairView(TokenViewBase):
 custom_token_obtain_pair = CustomTokenObtainPairView.as_view()
 
 
+def enqueue_confirmation_code(email, confirmation_code):
+    OutboxEmail.objects.create(
+        recipient=email,
+        subject='Создан confirmation code для получения token',
+        body=f'Ваш confirmation code {confirmation_code}',
+        from_email=settings.EMAIL_HOST_USER,
+    )
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def get_confirmation_code(request):
@@ -83,25 +129,36 @@ def get_confirmation_code(request):
     Права доступа: Доступно без токена.
     Использовать имя 'me' в качестве username запрещено.
     Поля email и username должны быть уникальными.
+    Повторный запрос с username и email существующего пользователя
+    выдаёт ему новый код: старый одноразовый и живёт ограниченное время.
     '''
+    username = request.data.get('username')
+    email = request.data.get('email')
+    if isinstance(username, str) and isinstance(email, str):
+        with transaction.atomic():
+            confirmation_code = User(
+                username=username, email=email).reissue_confirmation_code()
+            if confirmation_code is not None:
+                enqueue_confirmation_code(email, confirmation_code)
+                return Response(
+                    {'username': username, 'email': email},
+                    status=status.HTTP_200_OK)
     serializer = UserRegistrationSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    _user = User.objects.create(
+    _user = User(
         username=serializer.validated_data['username'],
         email=serializer.validated_data['email'],
     )
     confirmation_code = _user.make_confirmation_code()
     _user.set_confirmation_code(confirmation_code=confirmation_code)
-    _user.save()
-    _user.email_user(
-        subject='Создан confirmation code для получения token',
-        message=f'Ваш confirmation code {confirmation_code}',
-        from_email=settings.EMAIL_HOST_USER,
-    )
+    with transaction.atomic():
+        _user.save(force_insert=True)
+        enqueue_confirmation_code(_user.email, confirmation_code)
     return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(ListOrCreateOrDestroy):
+class CategoryViewSet(TimedSerializerMixin, CachedReadMixin,
+                      ListOrCreateOrDestroy):
     queryset = Category.objects.all().order_by('id')
     serializer_class = CategorySerializer
     filter_backends = (SearchFilter,)
@@ -109,9 +166,11 @@ class CategoryViewSet(ListOrCreateOrDestroy):
     pagination_class = PageNumberPagination
     lookup_field = 'slug'
     permission_classes = (ReadOrAdminOnly,)
+    cache_tags = ('categories',)
 
 
-class GenreViewSet(ListOrCreateOrDestroy):
+class GenreViewSet(TimedSerializerMixin, CachedReadMixin,
+                   ListOrCreateOrDestroy):
     queryset = Genre.objects.all().order_by('id')
     serializer_class = GenreSerializer
     filter_backends = (SearchFilter,)
@@ -119,24 +178,84 @@ class GenreViewSet(ListOrCreateOrDestroy):
     pagination_class = PageNumberPagination
     lookup_field = 'slug'
     permission_classes = (ReadOrAdminOnly,)
+    cache_tags = ('genres',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('id')
-    filter_backends = (SearchFilter, DjangoFilterBackend)
-    search_fields = ['category', 'genre', 'name', 'year']
+class TitleViewSet(TimedSerializerMixin, CachedReadMixin, FastListMixin,
+                   SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.order_by('id')
+    filter_backends = (TitleSearchFilter, DjangoFilterBackend)
     filterset_class = TitleFilter
     pagination_class = PageNumberPagination
     permission_classes = (ReadOrAdminOnly,)
+    sparse_select = ('category',)
+    sparse_prefetch = ('genre',)
+    row_format = TITLE_ROWS
+
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
 
     def get_serializer_class(self):
+        if self.action == 'bulk':
+            return TitleBulkSerializer
         if self.action in ('create', 'update', 'partial_update'):
             return TitleCreateSerializer
         return TitleSerializer
 
-
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        '''
+        Создать пачку произведений или обновить те, у которых указан id.
+        Ошибки валидации возвращаются списком, по одному на элемент.
+        '''
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            titles = serializer.save()
+            ids = [title.pk for title in titles]
+            # Bulk writes send no signals: keep the index and cache in sync.
+            for start in range(0, len(ids), BULK_INDEX_CHUNK):
+                index_titles(ids[start:start + BULK_INDEX_CHUNK])
+            invalidate_on_commit('titles', *(
+                f'title:{item["id"]}' for item in serializer.validated_data
+                if 'id' in item
+            ))
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['get'], detail=True)
+    def stats(self, request, pk=None):
+        '''Распределение оценок произведения, медиана и разброс.'''
+        title = get_object_or_404(
+            Title.objects.select_related('stats').only('id', 'stats'), pk=pk)
+        try:
+            stats = title.stats
+        except TitleStats.DoesNotExist:
+            stats = TitleStats(title=title)
+        return Response(TitleStatsSerializer(stats).data)
+
+    def get_cache_tags(self):
+        if self.action == 'retrieve':
+            return [f'title:{self.kwargs["pk"]}']
+        return ['titles']
+
+    def get_data_cache_tags(self, data):
+        if self.action == 'retrieve':
+            return []
+        return [f'title:{title["id"]}' for title in data['results']]
+
+
+def violates_unique_review(error):
+    '''IntegrityError вызван ограничением unique_review.'''
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name == 'unique_review'
+    # SQLite называет не ограничение, а его столбцы.
+    table = Review._meta.db_table
+    return f'{table}.title_id, {table}.author_id' in str(error)
+
+
+class ReviewViewSet(TimedSerializerMixin, FastListMixin, SparseQuerysetMixin,
+                    viewsets.ModelViewSet):
 
     '''
     Предоставляет возможность работать с отзывами к произведениям:
@@ -146,22 +265,58 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    pagination_class = PageNumberOrCursorPagination
     permission_classes = (AuthorOrAdminOrModeratorOnly,
                           permissions.IsAuthenticatedOrReadOnly)
+    sparse_select = ('author',)
+    # Ключ курсорной пагинации и внешний ключ, который связанный
+    # менеджер title.reviews выставляет каждому отзыву.
+    sparse_columns = ('pub_date', 'title')
+    row_format = REVIEW_ROWS
 
     def get_queryset(self):
+        if self.action != 'list':
+            # get_object() сам вернёт 404, отдельный запрос не нужен.
+            return self.sparse_queryset(
+                Review.objects.filter(title_id=self.kwargs['title_id']))
         title = get_object_or_404(Title, id=self.kwargs['title_id'])
-        return title.reviews.all()
+        return self.sparse_queryset(title.reviews.all())
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user, title=get_object_or_404(
-                Title, id=self.kwargs['title_id']
-            )
-        )
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+        '''
+        UPDATE рейтинга заодно проверяет существование произведения
+        и блокирует его строку, а повторный отзыв (в том числе
+        параллельный) отсекает ограничение unique_review.
+        '''
+        title_id = self.kwargs['title_id']
+        try:
+            with transaction.atomic():
+                if not Title.objects.filter(id=title_id).shift_rating(
+                        serializer.validated_data['score'], 1):
+                    raise Http404
+                review = serializer.save(
+                    author=self.request.user, title_id=title_id)
+                TitleStats.objects.shift_scores(
+                    review.title_id, added=review.score)
+        except IntegrityError as error:
+            if not violates_unique_review(error):
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [UNIQUE_REVIEW]})
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_score = serializer.instance.score
+        review = serializer.save()
+        if review.score != old_score:
+            Title.objects.filter(id=review.title_id).shift_rating(
+                review.score - old_score)
+            TitleStats.objects.shift_scores(
+                review.title_id, added=review.score, removed=old_score)
+
+
+class CommentViewSet(TimedSerializerMixin, FastListMixin,
+                     SparseQuerysetMixin, viewsets.ModelViewSet):
 
     '''
     Предоставляет возможность работать с комментариями к отзывам:
@@ -170,16 +325,93 @@ class CommentViewSet(viewsets.ModelViewSet):
     '''
 
     serializer_class = CommentSerializer
+    pagination_class = PageNumberOrCursorPagination
     permission_classes = (AuthorOrAdminOrModeratorOnly,
                           permissions.IsAuthenticatedOrReadOnly)
+    sparse_select = ('author',)
+    sparse_columns = ('pub_date', 'review')
+    row_format = COMMENT_ROWS
 
     def get_queryset(self):
+        if self.action != 'list':
+            return self.sparse_queryset(
+                Comment.objects.filter(review_id=self.kwargs['review_id']))
         review = get_object_or_404(Review, id=self.kwargs['review_id'])
-        return review.comments.all()
+        return self.sparse_queryset(review.comments.all())
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs['review_id'],
-            title=self.kwargs['title_id'],)
-        serializer.save(author=self.request.user, review=review)
+        '''
+        Комментарий вставляется одним INSERT ... WHERE EXISTS,
+        который проверяет, что отзыв относится к произведению.
+        '''
+        comment = Comment(
+            author=self.request.user,
+            review_id=self.kwargs['review_id'],
+            **serializer.validated_data,
+        )
+        if not insert_if_exists(comment, Review.objects.filter(
+            id=self.kwargs['review_id'], title_id=self.kwargs['title_id'],
+        )):
+            raise Http404
+        serializer.instance = comment
+
+
+class LeaderboardViewSet(CachedReadMixin, viewsets.GenericViewSet):
+
+    '''
+    Лучшие произведения по байесовскому среднему (все, по жанру
+    `?genre=` или категории `?category=`) и популярные сейчас.
+    Читаются из таблиц рейтинга, которые обновляет refresh_leaderboards.
+    '''
+
+    permission_classes = (permissions.AllowAny,)
+    pagination_class = None
+    cache_tags = ('leaderboards', 'titles')
+
+    def get_limit(self):
+        config = settings.LEADERBOARDS
+        try:
+            limit = int(self.request.query_params.get(
+                'limit', config['DEFAULT_LIMIT']))
+        except ValueError:
+            raise ValidationError({'limit': ['Ожидается целое число']})
+        return min(max(limit, 1), config['MAX_LIMIT'])
+
+    def ranked(self, queryset, serializer_class):
+        rows = list(
+            queryset.select_related('title__category')
+            .prefetch_related('title__genre')[:self.get_limit()]
+        )
+        for rank, row in enumerate(rows, start=1):
+            row.rank = rank
+        return Response(serializer_class(rows, many=True).data)
+
+    @action(methods=['get'], detail=False)
+    def top(self, request):
+        return self.cached_response(self.top_titles, request)
+
+    @action(methods=['get'], detail=False)
+    def trending(self, request):
+        return self.cached_response(self.trending_titles, request)
+
+    def top_titles(self, request):
+        genre = request.query_params.get('genre')
+        category = request.query_params.get('category')
+        if genre and category:
+            raise ValidationError(
+                'Укажите либо genre, либо category')
+        if genre:
+            queryset = GenreRanking.objects.filter(genre__slug=genre)
+        elif category:
+            queryset = TitleRanking.objects.filter(category__slug=category)
+        else:
+            queryset = TitleRanking.objects.all()
+        return self.ranked(
+            queryset.order_by('-score', 'title_id'), LeaderboardSerializer)
+
+    def trending_titles(self, request):
+        return self.ranked(
+            TitleRanking.objects.filter(trending__gt=0)
+            .order_by('-trending', '-score', 'title_id'),
+            TrendingSerializer,
+        )
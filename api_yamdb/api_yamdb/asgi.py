@@ -1,7 +1,10 @@
 import os
 
-from django.core.asgi import get_asgi_application
+from api.asgi import AsyncApplication
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+# Django 2.2 has no ASGI handler: serve the WSGI one through the async
+# front of api/asgi.py.
+application = AsyncApplication(get_wsgi_application())
@@ -0,0 +1,73 @@
+'''
+PostgreSQL backend that borrows connections from a per-process pool
+(see pool.py) instead of opening one per request. Configured by the
+POOL dict of the database settings; everything else is the stock
+django.db.backends.postgresql backend.
+'''
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from .pool import PoolTimeoutError, get_pool
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    pool_entry = None
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL'))
+
+    def get_new_connection(self, conn_params):
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(
+                conn_params)
+
+        try:
+            self.pool_entry = self.pool.acquire(connect, self.is_alive)
+        except PoolTimeoutError as error:
+            raise Database.OperationalError(str(error)) from error
+        connection = self.pool_entry.connection
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        return connection
+
+    @staticmethod
+    def is_alive(connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        entry, self.pool_entry = self.pool_entry, None
+        if entry is None:
+            return super()._close()
+        # A connection closed inside atomic() stays referenced by the
+        # wrapper until the block exits, so it must not be shared.
+        reusable = not (self.in_atomic_block or self.errors_occurred)
+        if reusable:
+            reusable = self.reset(entry.connection)
+        self.pool.release(entry, reusable)
+
+    @staticmethod
+    def reset(connection):
+        '''Roll back leftovers; False when the connection is unusable.'''
+        if connection.closed:
+            return False
+        try:
+            status = connection.info.transaction_status
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Database.Error:
+            return False
+        return (
+            connection.info.transaction_status
+            == extensions.TRANSACTION_STATUS_IDLE
+        )
@@ -0,0 +1,208 @@
+'''
+Per-process database connection pool.
+
+Connections are checked out by DatabaseWrapper.get_new_connection and
+given back when Django closes them at the end of a request, so the
+request cycle itself does not change. The pool:
+
+- grows on demand up to MAX_SIZE and makes a caller wait at most
+  TIMEOUT seconds for a free connection (PoolTimeoutError after that);
+- keeps at least MIN_SIZE connections once opened and closes the
+  ones above it that sit idle longer than MAX_IDLE seconds;
+- checks a connection idle longer than CHECK_AFTER seconds before
+  handing it out, replacing it when the check fails;
+- recycles a connection after MAX_USES checkouts or MAX_LIFETIME
+  seconds.
+
+Checkout wait, pool usage and closes (by reason) go to Prometheus.
+'''
+import os
+import threading
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+
+WAIT_SECONDS = Histogram(
+    'yamdb_db_pool_wait_seconds', 'Time to check a connection out.',
+    ('alias',),
+    buckets=(.0001, .0005, .001, .005, .01, .05, .1, .5, 1, 2.5, 5, 10),
+)
+CONNECTIONS = Gauge(
+    'yamdb_db_pool_connections', 'Open pooled connections by state.',
+    ('alias', 'state'), multiprocess_mode='livesum',
+)
+CHECKOUTS = Counter(
+    'yamdb_db_pool_checkouts', 'Connections checked out.', ('alias',))
+TIMEOUTS = Counter(
+    'yamdb_db_pool_timeouts', 'Checkouts that gave up waiting.', ('alias',))
+OPENED = Counter(
+    'yamdb_db_pool_opened', 'Connections opened.', ('alias',))
+CLOSED = Counter(
+    'yamdb_db_pool_closed', 'Connections closed by reason.',
+    ('alias', 'reason'),
+)
+
+DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5,
+    'CHECK_AFTER': 5,
+    'MAX_USES': 5000,
+    'MAX_LIFETIME': 1800,
+    'MAX_IDLE': 300,
+}
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PooledConnection:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.released = time.monotonic()
+        self.uses = 0
+
+
+class ConnectionPool:
+
+    def __init__(self, alias, options=None):
+        self.alias = alias
+        self.options = {**DEFAULTS, **(options or {})}
+        self.idle = deque()
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, connect, check):
+        '''
+        Idle connection that passes `check`, or a new one from
+        `connect` while the pool is below MAX_SIZE.
+        '''
+        started = time.monotonic()
+        while True:
+            entry = self.checkout(started)
+            if entry is None:
+                entry = self.open(connect)
+                break
+            reason = self.expired(entry, time.monotonic())
+            if reason is None and self.stale(entry) and not check(
+                    entry.connection):
+                reason = 'broken'
+            if reason is None:
+                break
+            self.discard(entry, reason)
+        entry.uses += 1
+        CHECKOUTS.labels(self.alias).inc()
+        WAIT_SECONDS.labels(self.alias).observe(time.monotonic() - started)
+        return entry
+
+    def checkout(self, started):
+        '''Most recently used idle entry, or None to open a new one.'''
+        deadline = started + self.options['TIMEOUT']
+        with self.condition:
+            while not self.idle and self.size >= self.options['MAX_SIZE']:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    TIMEOUTS.labels(self.alias).inc()
+                    raise PoolTimeoutError(
+                        f'No free connection in pool {self.alias!r} '
+                        f'after {self.options["TIMEOUT"]}s')
+                self.condition.wait(remaining)
+            if self.idle:
+                entry = self.idle.pop()
+            else:
+                entry = None
+                self.size += 1
+            self.report()
+        return entry
+
+    def open(self, connect):
+        try:
+            entry = PooledConnection(connect())
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.report()
+                self.condition.notify()
+            raise
+        OPENED.labels(self.alias).inc()
+        return entry
+
+    def release(self, entry, reusable=True):
+        '''Take a connection back; close it when not `reusable`.'''
+        now = time.monotonic()
+        reason = 'error' if not reusable else self.expired(entry, now)
+        if reason is not None:
+            return self.discard(entry, reason)
+        entry.released = now
+        with self.condition:
+            self.idle.append(entry)
+            idle = self.trim(now)
+            self.report()
+            self.condition.notify()
+        for stale in idle:
+            self.close(stale, 'idle')
+
+    def discard(self, entry, reason):
+        with self.condition:
+            self.size -= 1
+            self.report()
+            self.condition.notify()
+        self.close(entry, reason)
+
+    def trim(self, now):
+        '''Pop connections idle past MAX_IDLE above MIN_SIZE.'''
+        trimmed = []
+        while (self.size > self.options['MIN_SIZE'] and self.idle
+               and now - self.idle[0].released > self.options['MAX_IDLE']):
+            trimmed.append(self.idle.popleft())
+            self.size -= 1
+        return trimmed
+
+    def expired(self, entry, now):
+        if entry.uses >= self.options['MAX_USES']:
+            return 'uses'
+        if now - entry.created >= self.options['MAX_LIFETIME']:
+            return 'lifetime'
+        return None
+
+    def stale(self, entry):
+        return (
+            time.monotonic() - entry.released >= self.options['CHECK_AFTER']
+        )
+
+    def close(self, entry, reason):
+        CLOSED.labels(self.alias, reason).inc()
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+
+    def report(self):
+        idle = len(self.idle)
+        CONNECTIONS.labels(self.alias, 'idle').set(idle)
+        CONNECTIONS.labels(self.alias, 'in_use').set(self.size - idle)
+
+    def close_all(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+            self.size -= len(idle)
+            self.report()
+        for entry in idle:
+            self.close(entry, 'shutdown')
+
+
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+
+def get_pool(alias, options):
+    '''Pool of `alias` in this process; a forked worker gets its own.'''
+    key = (os.getpid(), alias)
+    with POOLS_LOCK:
+        pool = POOLS.get(key)
+        if pool is None:
+            pool = POOLS[key] = ConnectionPool(alias, options)
+        return pool
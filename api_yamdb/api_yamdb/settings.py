@@ -36,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.InstrumentationMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,6 +45,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.replicas.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -76,10 +79,75 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default="postgres"),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default="postgres"),
         'HOST': os.getenv('DB_HOST', default="db"),
-        'PORT': os.getenv('DB_PORT', default="5432")
+        'PORT': os.getenv('DB_PORT', default="5432"),
+        # Used by the pooled backend only (api_yamdb/db/pool.py).
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', default=1)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=5)),
+            'CHECK_AFTER': 5,
+            'MAX_USES': int(os.getenv('DB_POOL_MAX_USES', default=5000)),
+            'MAX_LIFETIME': int(
+                os.getenv('DB_POOL_MAX_LIFETIME', default=1800)),
+            'MAX_IDLE': 300,
+        },
+    }
+}
+
+# DB_POOL=1 serves PostgreSQL connections from a per-process pool.
+# Other engines (SQLite in tests and benchmarks) keep connecting
+# per request.
+if (os.getenv('DB_POOL') == '1'
+        and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'):
+    DATABASES['default']['ENGINE'] = 'api_yamdb.db'
+
+# Read replicas: DB_REPLICA_HOSTS=host1,host2 adds replica1, replica2
+# with the credentials of default. Safe-method API requests read from
+# them (api/replicas.py); tests use default in their place.
+for number, host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')),
+        start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    # Reads of a client stay on the primary this long after its write.
+    'STICKY_SECONDS': int(os.getenv('DB_REPLICA_STICKY_SECONDS', default=5)),
+    # A failed replica is left out of rotation this long.
+    'RETRY_AFTER': 30,
+    'COOKIE': 'read_primary',
+}
+
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
     }
 }
 
+# Cached responses are invalidated through tags stored in the cache, so
+# they are only safe when every worker shares it (memcached and the
+# like): a per-process locmem cache would keep serving stale data.
+API_CACHE = {
+    'ENABLED': CACHES['default']['BACKEND'] not in (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.dummy.DummyCache',
+    ),
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+    'STALE_TIMEOUT': 30,
+    'LOCK_TIMEOUT': 10,
+}
+
 
 # Password validation
 
@@ -137,16 +205,76 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # orjson-based JSON (api/renderers.py, api/parsers.py); the stdlib
+    # ones are rest_framework.renderers.JSONRenderer and
+    # rest_framework.parsers.JSONParser.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=3660 * 2),
     'AUTH_HEADER_TYPES': ('Bearer',),
 
 }
+BULK_TITLES_MAX_ITEMS = 5000
+
+# Titles, reviews and comments lists built from .values() rows instead
+# of the serializers (api/rows.py); the JSON is the same.
+FAST_LISTS = True
+
+LEADERBOARDS = {
+    'PRIOR_WEIGHT': 10,
+    'TRENDING_WINDOW': timedelta(days=7),
+    'REFRESH_INTERVAL': 300,
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 100,
+}
+
+# ASGI mode (api_yamdb/asgi.py): threads per process for catalog reads
+# and for all other requests, and how many requests may wait for a
+# busy pool before the server answers 503.
+ASGI = {
+    'CATALOG_THREADS': int(os.getenv('ASGI_CATALOG_THREADS', default=8)),
+    'THREADS': int(os.getenv('ASGI_THREADS', default=4)),
+    'MAX_QUEUE': int(os.getenv('ASGI_MAX_QUEUE', default=100)),
+}
+
+INSTRUMENTATION = {
+    'SLOW_REQUEST_MS': int(os.getenv('SLOW_REQUEST_MS', default=500)),
+    'LOG_SQL_LIMIT': 50,
+}
+
+# Response compression (api/compression.py): gzip, or br with the
+# brotli package installed. Smaller bodies are sent as they are.
+COMPRESSION = {
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', default=1024)),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'SKIP_TYPES': (
+        'image/', 'audio/', 'video/', 'font/woff', 'application/zip',
+        'application/gzip', 'application/x-gzip', 'application/x-bzip2',
+        'application/x-xz', 'application/x-7z-compressed',
+    ),
+}
+
+AUTH_USER_CACHE = {
+    'MAXSIZE': 10000,
+    'TTL': 30,
+}
+CONFIRMATION_CODE_TTL = timedelta(hours=24)
+CONFIRMATION_CODE_MAX_ATTEMPTS = 5
+
 EMAIL_HOST = 'smtp.yandex.ru'
 EMAIL_PORT = 465
 EMAIL_HOST_USER = "y.mdb@yandex.ru"
@@ -155,3 +283,15 @@ SERVER_EMAIL = EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 EMAIL_USE_TLS = False
 EMAIL_USE_SSL = True
+EMAIL_TIMEOUT = 10
+
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF': 30,
+    'MAX_BACKOFF': 3600,
+    'POLL_INTERVAL': 5,
+    # A claimed batch is not due again for this long, so the worker
+    # sends it without holding row locks; after a crash it is retried.
+    'LEASE': 300,
+}
@@ -0,0 +1,26 @@
+'''
+Gunicorn settings, picked up from the working directory.
+
+Workers share Prometheus metrics through files in
+PROMETHEUS_MULTIPROC_DIR: the directory is emptied when the master
+starts and the files of a dead worker are merged into the totals.
+'''
+import os
+import shutil
+
+# Before any prometheus_client import: the library picks the in-process
+# or the file-backed value class when it is first imported, and forked
+# workers inherit that choice.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,131 @@
+'''
+Leaderboard tables: overall, per-category and per-genre top titles
+by Bayesian average rating, plus trending titles by review velocity.
+
+    score = (PRIOR_WEIGHT * mean + rating_sum) / (PRIOR_WEIGHT + rating_count)
+
+where `mean` is the average score over all reviews, so a title with
+a couple of tens does not outrank one with hundreds of nines.
+
+`refresh_leaderboards` re-ranks only titles whose `changed_at` moved
+since the previous run (new, edited or deleted reviews all touch it
+through shift_rating). Rows of untouched titles keep the prior mean
+of their last refresh; a periodic full refresh realigns them.
+'''
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import GenreRanking, LeaderboardState, Review, Title, TitleRanking
+
+CHUNK = 1000
+# changed_at comes from Now(), which on PostgreSQL is the start of the
+# writing transaction: a review committed just after the previous run
+# began can carry an older timestamp, so look back a little further.
+LOOKBACK = timedelta(minutes=1)
+
+leaderboards_refreshed = Signal()
+
+
+def bayesian_score(rating_sum, rating_count, prior_mean, prior_weight):
+    return (prior_weight * prior_mean + rating_sum) / (
+        prior_weight + rating_count)
+
+
+def chunks(queryset, size=CHUNK):
+    chunk = []
+    for row in queryset.iterator(chunk_size=size):
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rank_titles(rows, prior_mean, prior_weight, replace):
+    '''Write TitleRanking and GenreRanking rows for a chunk of titles.'''
+    ids = [pk for pk, *_ in rows]
+    if replace:
+        TitleRanking.objects.filter(title_id__in=ids).delete()
+        GenreRanking.objects.filter(title_id__in=ids).delete()
+    rankings = {
+        pk: TitleRanking(
+            title_id=pk, category_id=category_id, review_count=count,
+            score=bayesian_score(score_sum, count, prior_mean, prior_weight),
+        )
+        for pk, category_id, score_sum, count in rows if count
+    }
+    TitleRanking.objects.bulk_create(rankings.values())
+    genres = Title.genre.through.objects.filter(
+        title_id__in=list(rankings)).values_list('title_id', 'genre_id')
+    GenreRanking.objects.bulk_create(
+        GenreRanking(
+            genre_id=genre_id, title_id=title_id,
+            score=rankings[title_id].score,
+            review_count=rankings[title_id].review_count,
+        )
+        for title_id, genre_id in genres
+    )
+    return len(rankings)
+
+
+def refresh_trending(now, window):
+    '''
+    Recount reviews inside the sliding window. Touches only titles
+    that are trending now or were trending after the previous run.
+    '''
+    counts = dict(
+        Review.objects.filter(pub_date__gte=now - window)
+        .order_by().values('title').annotate(total=Count('id'))
+        .values_list('title', 'total')
+    )
+    TitleRanking.objects.filter(trending__gt=0).update(trending=0)
+    TitleRanking.objects.bulk_update(
+        [TitleRanking(title_id=pk, trending=total)
+         for pk, total in counts.items()],
+        ['trending'], batch_size=CHUNK,
+    )
+    return len(counts)
+
+
+def refresh_leaderboards(full=False, now=None):
+    '''
+    Bring the ranking tables up to date. Returns the number of
+    re-ranked titles and of trending titles.
+    '''
+    config = settings.LEADERBOARDS
+    now = now or timezone.now()
+    with transaction.atomic():
+        state = LeaderboardState.objects.select_for_update().first()
+        full = full or state is None
+        totals = Title.objects.aggregate(
+            score_sum=Sum('rating_sum'), count=Sum('rating_count'))
+        prior_mean = (
+            totals['score_sum'] / totals['count'] if totals['count'] else 0
+        )
+        titles = Title.objects.order_by('id').values_list(
+            'id', 'category_id', 'rating_sum', 'rating_count')
+        if full:
+            TitleRanking.objects.all().delete()
+            GenreRanking.objects.all().delete()
+        else:
+            titles = titles.filter(
+                changed_at__gte=state.refreshed_from - LOOKBACK)
+        ranked = sum(
+            rank_titles(rows, prior_mean, config['PRIOR_WEIGHT'],
+                        replace=not full)
+            for rows in chunks(titles)
+        )
+        trending = refresh_trending(now, config['TRENDING_WINDOW'])
+        if state is None:
+            LeaderboardState.objects.create(refreshed_from=now)
+        else:
+            state.refreshed_from = now
+            state.save(update_fields=['refreshed_from'])
+        leaderboards_refreshed.send(sender=TitleRanking)
+    return ranked, trending
@@ -0,0 +1,93 @@
+import csv
+import os
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import CommandError
+from reviews.management.generator import DatasetGenerator
+from reviews.management.loader import CSVLoadCommand
+
+from .import_dataset import DATASET
+from .import_dataset import Command as ImportCommand
+
+SIZES = ('users', 'categories', 'genres', 'titles', 'reviews', 'comments')
+
+
+class Command(ImportCommand):
+    help = (
+        'Generate a deterministic synthetic dataset straight into '
+        'the database or as import_dataset csv files'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Zipf exponent of reviews per title',
+        )
+        parser.add_argument(
+            '--csv', metavar='DIRECTORY',
+            help='Write csv files for import_dataset instead of the database',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Clear the generated tables before loading',
+        )
+
+    def handle(self, *args, **options):
+        self.generator = DatasetGenerator(
+            seed=options['seed'], zipf=options['zipf'],
+            **{size: options[size] for size in SIZES},
+        )
+        self.verbosity = options['verbosity']
+        if options['csv']:
+            return self.write_csv(options['csv'])
+
+        if not options['truncate']:
+            filled = [
+                model._meta.db_table for model in DATASET.values()
+                if model.objects.exists()
+            ]
+            if filled:
+                raise CommandError(
+                    f'Tables are not empty: {", ".join(filled)}; '
+                    'use --truncate'
+                )
+        elapsed = self.import_all(
+            {model: table for table, model in DATASET.items()}, options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully generated in {elapsed:.1f}s'))
+
+    def write_csv(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        started = time.monotonic()
+        for table in DATASET:
+            path = os.path.join(directory, f'{table}.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                with self.open_rows(None, table) as rows:
+                    csv.writer(stream).writerows(rows)
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully written to {directory} '
+            f'in {time.monotonic() - started:.1f}s'))
+
+    @contextmanager
+    def open_rows(self, model, table):
+        yield self.with_progress(table, self.generator.rows(table))
+
+    def with_progress(self, table, rows, every=100000):
+        '''Pass rows through, reporting every `every` rows.'''
+        started = time.monotonic()
+        for count, row in enumerate(rows):
+            if count and count % every == 0 and self.verbosity > 1:
+                self.stdout.write(
+                    f'{table}: {CSVLoadCommand.progress(count, started)}')
+            yield row
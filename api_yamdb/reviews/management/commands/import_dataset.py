@@ -0,0 +1,143 @@
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from reviews.management.loader import (bulk_insert, drop_indexes, open_csv,
+                                       restore_indexes)
+from reviews.models import Category, Comment, Genre, Review, Title, TitleStats
+from reviews.search import index_titles
+from users.models import User
+
+DATASET = {
+    'users': User,
+    'category': Category,
+    'genre': Genre,
+    'titles': Title,
+    'genre_title': Title.genre.through,
+    'review': Review,
+    'comments': Comment,
+}
+
+
+def dependency_levels(models):
+    '''
+    Split models into levels where every model only references
+    models of earlier levels, so each level can load in parallel.
+    '''
+    pending = list(models)
+    levels = []
+    while pending:
+        level = [
+            model for model in pending
+            if not any(
+                field.related_model in pending
+                and field.related_model is not model
+                for field in model._meta.concrete_fields
+                if field.is_relation
+            )
+        ]
+        if not level:
+            raise CommandError('Circular dependency between tables')
+        levels.append(level)
+        pending = [model for model in pending if model not in level]
+    return levels
+
+
+class Command(BaseCommand):
+    help = 'Import a directory of csv files in dependency order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', type=str)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Clear the imported tables before loading',
+        )
+
+    def handle(self, directory: str, *args, **options):
+        paths = {
+            model: os.path.join(directory, f'{name}.csv')
+            for name, model in DATASET.items()
+            if os.path.isfile(os.path.join(directory, f'{name}.csv'))
+        }
+        if not paths:
+            raise CommandError(f'No dataset files found in {directory}')
+        elapsed = self.import_all(paths, options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported in {elapsed:.1f}s'))
+
+    def import_all(self, sources, options):
+        '''
+        Load every model from its source, level by level,
+        then reset sequences and rebuild derived data.
+        Returns the elapsed time in seconds.
+        '''
+        self.batch_size = options['batch_size']
+        levels = dependency_levels(list(sources))
+        if options['truncate']:
+            self.truncate([model for level in levels for model in level])
+
+        # SQLite allows a single writer, extra threads would only wait.
+        workers = 1 if connection.vendor == 'sqlite' else options['workers']
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for level in levels:
+                results = executor.map(
+                    self.load_in_thread, level,
+                    [sources[model] for model in level],
+                )
+                for model, loaded, elapsed in results:
+                    self.stdout.write(
+                        f'{model._meta.db_table}: {loaded} rows '
+                        f'in {elapsed:.1f}s'
+                    )
+        self.finish(list(sources))
+        return time.monotonic() - started
+
+    @contextmanager
+    def open_rows(self, model, path):
+        with open_csv(path) as stream:
+            yield csv.reader(stream)
+
+    def load(self, model, source):
+        started = time.monotonic()
+        table = model._meta.db_table
+        with self.open_rows(model, source) as reader:
+            with connection.constraint_checks_disabled(), \
+                    transaction.atomic():
+                indexes = drop_indexes(connection, table)
+                loaded = bulk_insert(
+                    connection, model, reader, self.batch_size)
+                restore_indexes(connection, indexes)
+                connection.check_constraints(table_names=[table])
+        return model, loaded, time.monotonic() - started
+
+    def load_in_thread(self, model, source):
+        try:
+            return self.load(model, source)
+        finally:
+            connections.close_all()
+
+    def truncate(self, models):
+        tables = [model._meta.db_table for model in reversed(models)]
+        statements = connection.ops.sql_flush(
+            no_style(), tables, [], allow_cascade=True)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def finish(self, models):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        if Review in models or Title in models:
+            Title.objects.rebuild_rating()
+            TitleStats.objects.rebuild()
+        index_titles()
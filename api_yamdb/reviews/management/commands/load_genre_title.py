@@ -1,23 +1,10 @@
-import csv
+from reviews.management.loader import CSVLoadCommand
+from reviews.models import Title
+from reviews.search import index_titles
 
-import requests
-from django.core.management.base import BaseCommand
-from reviews.models import Genre_Title
 
+class Command(CSVLoadCommand):
+    model = Title.genre.through
 
-class Command(BaseCommand):
-    help = 'Loading data from csv via url'
-
-    def add_arguments(self, parser):
-        parser.add_argument('link', type=str)
-
-    def handle(self, link: str, *args, **options):
-        response = requests.get(link)
-        reader = csv.DictReader(response.text.splitlines())
-
-        Genre_Title.objects.bulk_create(
-            [Genre_Title(
-                **{k.lower(): v for k, v in data.items()}
-            ) for data in reader])
-
-        self.stdout.write(self.style.SUCCESS('Successfully loaded'))
+    def after_load(self):
+        index_titles()
@@ -1,23 +1,10 @@
-import csv
-
-import requests
-from django.core.management.base import BaseCommand
+from reviews.management.loader import CSVLoadCommand
 from reviews.models import Genre
+from reviews.search import index_titles
 
 
-class Command(BaseCommand):
-    help = 'Loading data from csv via url'
-
-    def add_arguments(self, parser):
-        parser.add_argument('link', type=str)
-
-    def handle(self, link: str, *args, **options):
-        response = requests.get(link)
-        reader = csv.DictReader(response.text.splitlines())
-
-        Genre.objects.bulk_create(
-            [Genre(
-                **{k.lower(): v for k, v in data.items()}
-            ) for data in reader])
+class Command(CSVLoadCommand):
+    model = Genre
 
-        self.stdout.write(self.style.SUCCESS('Successfully loaded'))
+    def after_load(self):
+        index_titles()
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Rebuild stored title ratings from reviews'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.rebuild_rating()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {updated} titles'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from reviews.search import index_titles
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of titles'
+
+    def handle(self, *args, **options):
+        index_titles()
+
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import TitleStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-title score histograms from reviews'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuilt = TitleStats.objects.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {rebuilt} titles'))
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.leaderboards import refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Re-rank titles changed since the previous run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Rebuild the ranking tables from scratch',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep refreshing every LEADERBOARDS["REFRESH_INTERVAL"]',
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            started = time.monotonic()
+            ranked, trending = refresh_leaderboards(full=full)
+            self.stdout.write(
+                f'Leaderboards: {ranked} titles re-ranked, '
+                f'{trending} trending in {time.monotonic() - started:.1f}s')
+            if not options['loop']:
+                return
+            full = False
+            time.sleep(settings.LEADERBOARDS['REFRESH_INTERVAL'])
@@ -0,0 +1,202 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+from users.models import User
+
+# Share of titles that get 1, 2, 3 or 4 genres.
+GENRE_MULTIPLICITY = (0.5, 0.3, 0.15, 0.05)
+FIRST_YEAR = 1900
+DATES_FROM = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DATES_SPAN = timedelta(days=365 * 8).total_seconds()
+
+
+class Permutation:
+    '''
+    Bijection of range(size) onto itself, i -> (a * i + b) % size.
+    Shuffles popularity ranks over ids without holding a list of ids.
+    '''
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.step = rng.randrange(1, size) if size > 1 else 1
+        while math.gcd(self.step, size) != 1:
+            self.step += 1
+        self.offset = rng.randrange(size)
+
+    def __getitem__(self, index):
+        return (self.step * index + self.offset) % self.size
+
+
+class DatasetGenerator:
+    '''
+    Deterministic synthetic dataset in the import_dataset csv layout.
+
+    Every table is produced by its own method as a stream of rows
+    (header first) from its own RNG seeded with (seed, table), so
+    tables can be generated in any order and in parallel, and the
+    same seed always gives byte-identical output. Ids are assigned
+    explicitly from 1, which lets dependent tables refer to them
+    without reading anything back.
+
+    Skew: reviews per title follow a Zipf law, review and comment
+    authors a power law over users, categories and genres a Zipf
+    law too; years lean towards the current one.
+    '''
+
+    def __init__(self, seed=0, users=1000, categories=10, genres=30,
+                 titles=1000, reviews=10000, comments=20000,
+                 zipf=1.1, author_skew=3.0):
+        self.seed = seed
+        self.sizes = {
+            'users': users, 'category': categories, 'genre': genres,
+            'titles': titles, 'review': reviews, 'comments': comments,
+        }
+        self.zipf = zipf
+        self.author_skew = author_skew
+        self.last_year = datetime.now(timezone.utc).year
+
+    def rng(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    def rows(self, table):
+        return getattr(self, table)()
+
+    def power_index(self, rng, size, skew):
+        '''Index in range(size) where low indexes are far more likely.'''
+        return min(int(size * rng.random() ** skew), size - 1)
+
+    def date(self, rng, after=None):
+        start = after or DATES_FROM
+        span = DATES_SPAN - (start - DATES_FROM).total_seconds()
+        return start + timedelta(seconds=rng.random() * max(span, 0))
+
+    @staticmethod
+    def iso(moment):
+        return moment.isoformat(timespec='milliseconds').replace(
+            '+00:00', 'Z')
+
+    def users(self):
+        rng = self.rng('users')
+        yield ['id', 'username', 'email', 'role']
+        for pk in range(1, self.sizes['users'] + 1):
+            chance = rng.random()
+            role = (
+                User.ADMIN if chance < 0.0005
+                else User.MODERATOR if chance < 0.005
+                else User.USER
+            )
+            yield [pk, f'user{pk}', f'user{pk}@yamdb.fake', role]
+
+    def category(self):
+        yield ['id', 'name', 'slug']
+        for pk in range(1, self.sizes['category'] + 1):
+            yield [pk, f'Категория {pk}', f'category-{pk}']
+
+    def genre(self):
+        yield ['id', 'name', 'slug']
+        for pk in range(1, self.sizes['genre'] + 1):
+            yield [pk, f'Жанр {pk}', f'genre-{pk}']
+
+    def titles(self):
+        rng = self.rng('titles')
+        categories = self.sizes['category']
+        years = self.last_year - FIRST_YEAR
+        yield ['id', 'name', 'year', 'category', 'description']
+        for pk in range(1, self.sizes['titles'] + 1):
+            # validator_year: never later than the current year.
+            year = self.last_year - int(years * rng.random() ** 2)
+            category = (
+                self.power_index(rng, categories, 2) + 1
+                if categories else ''
+            )
+            yield [pk, f'Произведение {pk}', year, category,
+                   f'Описание произведения {pk}']
+
+    def genre_title(self):
+        rng = self.rng('genre_title')
+        genres = self.sizes['genre']
+        yield ['id', 'title_id', 'genre_id']
+        if not genres:
+            return
+        pk = 0
+        multiplicity = range(1, len(GENRE_MULTIPLICITY) + 1)
+        for title in range(1, self.sizes['titles'] + 1):
+            count = min(
+                rng.choices(multiplicity, GENRE_MULTIPLICITY)[0], genres)
+            chosen = set()
+            while len(chosen) < count:
+                chosen.add(self.power_index(rng, genres, 2) + 1)
+            for genre in sorted(chosen):
+                pk += 1
+                yield [pk, title, genre]
+
+    def review_counts(self):
+        '''
+        Reviews per title: Zipf weights over popularity ranks,
+        capped by the number of users (one review per author).
+        '''
+        titles, users = self.sizes['titles'], self.sizes['users']
+        if not titles or not users:
+            return [0] * titles
+        weights = [1 / rank ** self.zipf for rank in range(1, titles + 1)]
+        total = sum(weights)
+        target = min(self.sizes['review'], titles * users)
+        counts = [min(int(target * w / total), users) for w in weights]
+        rank, left = 0, target - sum(counts)
+        while left > 0:
+            if counts[rank % titles] < users:
+                counts[rank % titles] += 1
+                left -= 1
+            rank += 1
+        ranks = Permutation(titles, self.rng('popularity'))
+        by_title = [0] * titles
+        for rank, count in enumerate(counts):
+            by_title[ranks[rank]] = count
+        return by_title
+
+    def authors(self, rng, count):
+        '''`count` distinct user ids, active users first.'''
+        users = self.sizes['users']
+        if count * 2 > users:
+            return rng.sample(range(1, users + 1), count)
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(self.power_index(rng, users, self.author_skew) + 1)
+        return chosen
+
+    def reviews(self):
+        '''(id, title, author, pub_date) of every review, in id order.'''
+        rng = self.rng('review')
+        pk = 0
+        for title, count in enumerate(self.review_counts(), start=1):
+            for author in sorted(self.authors(rng, count)):
+                pk += 1
+                yield pk, title, author, self.date(rng)
+
+    def review(self):
+        rng = self.rng('review:score')
+        yield ['id', 'title_id', 'text', 'author', 'score', 'pub_date']
+        for pk, title, author, pub_date in self.reviews():
+            score = min(max(round(rng.gauss(7, 2)), 1), 10)
+            yield [pk, title, f'Отзыв {pk}', author, score,
+                   self.iso(pub_date)]
+
+    def comments(self):
+        rng = self.rng('comments')
+        yield ['id', 'review_id', 'text', 'author', 'pub_date']
+        reviews, users = self.sizes['review'], self.sizes['users']
+        if not reviews or not users:
+            return
+        mean = self.sizes['comments'] / reviews
+        pk = 0
+        for review, _, _, pub_date in self.reviews():
+            # Heavy-tailed per-review count with the requested mean:
+            # E[paretovariate(2.5) - 1] = 2/3.
+            count = int(mean * 1.5 * (rng.paretovariate(2.5) - 1)
+                        + rng.random())
+            for _ in range(min(count, self.sizes['comments'] - pk)):
+                pk += 1
+                author = self.power_index(rng, users, self.author_skew) + 1
+                yield [pk, review, f'Комментарий {pk}', author,
+                       self.iso(self.date(rng, after=pub_date))]
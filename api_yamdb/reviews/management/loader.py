@@ -0,0 +1,211 @@
+import csv
+import io
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+NULL = r'\N'
+
+
+@contextmanager
+def open_csv(link):
+    '''
+    Open a local path or an http(s) url as a text stream.
+    Urls are read from the socket as the reader advances,
+    so neither source is held in memory as a whole.
+    '''
+    if link.startswith(('http://', 'https://')):
+        with requests.get(link, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            yield io.TextIOWrapper(
+                response.raw, encoding='utf-8-sig', newline='')
+    else:
+        with open(link, encoding='utf-8-sig', newline='') as stream:
+            yield stream
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+class CSVLoadCommand(BaseCommand):
+    '''
+    Base command for the load_* family: streams a csv file
+    into `model` in transactional batches of `--batch-size` rows.
+    '''
+
+    help = 'Loading data from csv via url or local path'
+    model = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('link', type=str)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def get_columns(self, header):
+        opts = self.model._meta
+        return [opts.get_field(name.lower()).attname for name in header]
+
+    def build(self, columns, row):
+        return self.model(**dict(zip(columns, row)))
+
+    def after_load(self):
+        pass
+
+    def handle(self, link: str, *args, **options):
+        batch_size = options['batch_size']
+        loaded = 0
+        started = time.monotonic()
+        with open_csv(link) as stream:
+            reader = csv.reader(stream)
+            columns = self.get_columns(next(reader))
+            objects = (self.build(columns, row) for row in reader)
+            for batch in batches(objects, batch_size):
+                with transaction.atomic():
+                    self.model.objects.bulk_create(batch)
+                loaded += len(batch)
+                if options['verbosity'] > 1:
+                    self.stdout.write(self.progress(loaded, started))
+        self.after_load()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully loaded {self.progress(loaded, started)}'))
+
+    @staticmethod
+    def progress(loaded, started):
+        elapsed = time.monotonic() - started
+        rate = loaded / elapsed if elapsed else loaded
+        return f'{loaded} rows in {elapsed:.1f}s ({rate:.0f} rows/s)'
+
+
+def prepared_rows(model, connection, reader):
+    '''
+    Turn raw csv rows into database-ready tuples.
+    Returns the target column names and a lazy iterator of rows;
+    columns missing from the file are filled with field defaults.
+    Missing auto_now(_add) timestamps grow by a microsecond per row,
+    so ordering by them keeps the order of the file.
+    '''
+    opts = model._meta
+    fields = [opts.get_field(name.lower()) for name in next(reader)]
+    defaults = [
+        field for field in opts.concrete_fields
+        if field not in fields and not field.primary_key
+    ]
+    stamped = [
+        getattr(field, 'auto_now_add', False)
+        or getattr(field, 'auto_now', False)
+        for field in defaults
+    ]
+    default_values = [
+        None if is_stamped else field.get_db_prep_save(
+            field.get_default(), connection)
+        for field, is_stamped in zip(defaults, stamped)
+    ]
+    started = timezone.now()
+
+    def prepare(field, value):
+        if value == '' and field.null:
+            return None
+        return field.get_db_prep_save(field.to_python(value), connection)
+
+    def fill_defaults(number):
+        if not any(stamped):
+            return default_values
+        stamp = started + timedelta(microseconds=number)
+        return [
+            field.get_db_prep_save(stamp, connection) if is_stamped
+            else value
+            for field, is_stamped, value
+            in zip(defaults, stamped, default_values)
+        ]
+
+    rows = (
+        [prepare(field, value) for field, value in zip(fields, row)]
+        + fill_defaults(number)
+        for number, row in enumerate(reader)
+    )
+    return [field.column for field in fields + defaults], rows
+
+
+def bulk_insert(connection, model, reader, batch_size):
+    '''
+    Insert csv-like rows (header first) with the fastest path
+    the backend offers: COPY FROM STDIN on PostgreSQL,
+    executemany elsewhere.
+    '''
+    quote = connection.ops.quote_name
+    columns, rows = prepared_rows(model, connection, reader)
+    table = quote(model._meta.db_table)
+    column_list = ', '.join(quote(column) for column in columns)
+    loaded = 0
+    with connection.cursor() as cursor:
+        for batch in batches(rows, batch_size):
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    [NULL if value is None else value for value in row]
+                    for row in batch
+                )
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {table} ({column_list}) FROM STDIN "
+                    f"WITH (FORMAT csv, NULL '{NULL}')",
+                    buffer,
+                )
+            else:
+                placeholders = ', '.join(['%s'] * len(columns))
+                cursor.executemany(
+                    f'INSERT INTO {table} ({column_list}) '
+                    f'VALUES ({placeholders})',
+                    batch,
+                )
+            loaded += len(batch)
+    return loaded
+
+
+def drop_indexes(connection, table):
+    '''
+    Drop the secondary (non-unique, non-constraint) indexes of `table`
+    and return their definitions for `restore_indexes`.
+    '''
+    if connection.vendor == 'postgresql':
+        sql = (
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexdef NOT LIKE 'CREATE UNIQUE%%' "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint "
+            "WHERE conrelid = %s::regclass)"
+        )
+        params = [table, table]
+    elif connection.vendor == 'sqlite':
+        sql = (
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL "
+            "AND sql NOT LIKE 'CREATE UNIQUE%%'"
+        )
+        params = [table]
+    else:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        indexes = cursor.fetchall()
+        for name, definition in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    return [definition for name, definition in indexes]
+
+
+def restore_indexes(connection, definitions):
+    with connection.cursor() as cursor:
+        for definition in definitions:
+            cursor.execute(definition)
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.26 on 2026-10-18 19:04
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+    score_sum = Coalesce(Subquery(
+        reviews.annotate(total=Sum('score')).values('total')), 0)
+    review_count = Coalesce(Subquery(
+        reviews.annotate(total=Count('pk')).values('total')), 0)
+    Title.objects.update(
+        rating_sum=score_sum,
+        rating_count=review_count,
+        rating=Cast(score_sum, FloatField()) / NullIf(review_count, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20211014_0859'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='score',
+            field=models.SmallIntegerField(error_messages={'validators': 'Оценка может быть от 1 до 10'}, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)], verbose_name='Оценка'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from reviews.search import index_titles, schema_sql
+
+
+def create_search_table(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in schema_sql(vendor):
+        schema_editor.execute(sql)
+    index_titles()
+
+
+def drop_search_table(apps, schema_editor):
+    for sql in schema_sql(schema_editor.connection.vendor, drop=True):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_pub_date_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 2.2.26 on 2026-10-18 19:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenreRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('review_count', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге жанра',
+                'verbose_name_plural': 'Рейтинг произведений по жанрам',
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('refreshed_from', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.Title')),
+                ('score', models.FloatField()),
+                ('review_count', models.PositiveIntegerField()),
+                ('trending', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Рейтинг произведений',
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='titleranking',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.Category'),
+        ),
+        migrations.AddField(
+            model_name='genreranking',
+            name='genre',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Genre'),
+        ),
+        migrations.AddField(
+            model_name='genreranking',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-score', 'title'], name='ranking_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['category', '-score', 'title'], name='ranking_category_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-trending', '-score', 'title'], name='ranking_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='genreranking',
+            index=models.Index(fields=['genre', '-score', 'title'], name='ranking_genre_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='genreranking',
+            constraint=models.UniqueConstraint(fields=('genre', 'title'), name='unique_genre_ranking'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Now, NullIf
 from users.models import User
 
+from .stats import SCORES, median, rebuild_title_stats
 from .validators import validator_year
 
 
@@ -30,6 +33,41 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    def shift_rating(self, score_delta, count_delta=0):
+        '''
+        Atomically shift the stored score sum and review count
+        and recompute the average in the same UPDATE.
+        '''
+        return self.update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+            rating=(
+                Cast(F('rating_sum') + score_delta, FloatField())
+                / NullIf(F('rating_count') + count_delta, 0)
+            ),
+            changed_at=Now(),
+        )
+
+    def rebuild_rating(self):
+        '''
+        Recalculate the stored rating fields from the reviews table
+        in a single set-based UPDATE.
+        '''
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        score_sum = Coalesce(Subquery(
+            reviews.annotate(total=Sum('score')).values('total')), 0)
+        review_count = Coalesce(Subquery(
+            reviews.annotate(total=Count('pk')).values('total')), 0)
+        return self.update(
+            rating_sum=score_sum,
+            rating_count=review_count,
+            rating=Cast(score_sum, FloatField()) / NullIf(review_count, 0),
+            changed_at=Now(),
+        )
+
+
 class Title(models.Model):
     name = models.CharField(max_length=100, verbose_name='Произведение')
     category = models.ForeignKey(
@@ -43,15 +81,108 @@ class Title(models.Model):
     )
 
     description = models.CharField(max_length=300, null=True)
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок', default=0, editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов', default=0, editable=False,
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг', null=True, editable=False,
+    )
+    # Last change of the title or of its rating; refresh_leaderboards
+    # re-ranks only titles changed since its previous run.
+    changed_at = models.DateTimeField(
+        verbose_name='Изменено', auto_now=True, db_index=True,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['category', 'id'],
+                         name='title_category_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class TitleStatsQuerySet(models.QuerySet):
+    def shift_scores(self, title_id, added=None, removed=None):
+        '''
+        Move one review between score buckets in a single UPDATE.
+        A missing row is rebuilt from the reviews table, which already
+        holds the change; the caller has locked the title row with
+        shift_rating, so the rebuild cannot race another writer.
+        '''
+        if added == removed:
+            return
+        changes = {}
+        if added is not None:
+            changes[f'score_{added}'] = F(f'score_{added}') + 1
+        if removed is not None:
+            changes[f'score_{removed}'] = F(f'score_{removed}') - 1
+        if not self.filter(title_id=title_id).update(**changes):
+            rebuild_title_stats([title_id])
+
+    def rebuild(self):
+        return rebuild_title_stats()
+
+
+class TitleStats(models.Model):
+    title = models.OneToOneField(
+        Title, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats',
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    objects = TitleStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика оценок'
+        verbose_name_plural = 'Статистика оценок'
+
+    @property
+    def counts(self):
+        return [getattr(self, f'score_{score}') for score in SCORES]
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    @property
+    def mean(self):
+        count = self.count
+        if not count:
+            return None
+        return sum(s * c for s, c in zip(SCORES, self.counts)) / count
+
+    @property
+    def median(self):
+        return median(self.counts)
+
+    @property
+    def stddev(self):
+        mean = self.mean
+        if mean is None:
+            return None
+        return (sum(
+            c * (s - mean) ** 2 for s, c in zip(SCORES, self.counts)
+        ) / self.count) ** 0.5
+
+
 class Review(models.Model):
     title = models.ForeignKey(
         Title,
@@ -78,6 +209,11 @@ class Review(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(fields=['title', '-pub_date', '-id'],
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(fields=['title', 'author'],
                                     name='unique_review')
@@ -106,6 +242,69 @@ class Comment(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', '-pub_date', '-id'],
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class TitleRanking(models.Model):
+    '''
+    Precomputed leaderboard row of a reviewed title, refreshed by
+    `refresh_leaderboards`. `score` is the Bayesian average rating,
+    `trending` the number of reviews in the trending window.
+    '''
+    title = models.OneToOneField(
+        Title, on_delete=models.CASCADE, primary_key=True,
+        related_name='ranking',
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, related_name='+',
+    )
+    score = models.FloatField()
+    review_count = models.PositiveIntegerField()
+    trending = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+        indexes = [
+            models.Index(fields=['-score', 'title'],
+                         name='ranking_score_idx'),
+            models.Index(fields=['category', '-score', 'title'],
+                         name='ranking_category_score_idx'),
+            models.Index(fields=['-trending', '-score', 'title'],
+                         name='ranking_trending_idx'),
+        ]
+
+
+class GenreRanking(models.Model):
+    '''TitleRanking row repeated for every genre of the title.'''
+    genre = models.ForeignKey(
+        Genre, on_delete=models.CASCADE, related_name='+',
+    )
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='+',
+    )
+    score = models.FloatField()
+    review_count = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = 'Место в рейтинге жанра'
+        verbose_name_plural = 'Рейтинг произведений по жанрам'
+        indexes = [
+            models.Index(fields=['genre', '-score', 'title'],
+                         name='ranking_genre_score_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['genre', 'title'],
+                                    name='unique_genre_ranking'),
+        ]
+
+
+class LeaderboardState(models.Model):
+    '''Single row: when the last leaderboard refresh started.'''
+    refreshed_from = models.DateTimeField()
@@ -0,0 +1,190 @@
+'''
+Full-text search over titles.
+
+Every title has a row in the `reviews_title_search` shadow table built
+from its name, description, genre names and category name. PostgreSQL
+stores a weighted tsvector with a GIN index (plus a trigram index on the
+title name), SQLite uses an FTS5 virtual table keyed by the title id.
+The table is refreshed by signal handlers on every catalog write.
+'''
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'reviews_title_search'
+
+POSTGRESQL_SCHEMA = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE TABLE {SEARCH_TABLE} ('
+    ' title_id integer PRIMARY KEY'
+    ' REFERENCES reviews_title (id) ON DELETE CASCADE,'
+    ' document tsvector NOT NULL)',
+    f'CREATE INDEX {SEARCH_TABLE}_document_idx'
+    f' ON {SEARCH_TABLE} USING gin (document)',
+    'CREATE INDEX reviews_title_name_trgm_idx'
+    ' ON reviews_title USING gin (name gin_trgm_ops)',
+]
+POSTGRESQL_DROP = [
+    'DROP INDEX IF EXISTS reviews_title_name_trgm_idx',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+]
+SQLITE_SCHEMA = [
+    f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+    ' name, description, genres, category,'
+    " tokenize = 'unicode61 remove_diacritics 2')",
+]
+SQLITE_DROP = [f'DROP TABLE IF EXISTS {SEARCH_TABLE}']
+
+DOCUMENT_SOURCE = '''
+    FROM reviews_title t
+    LEFT JOIN reviews_category c ON c.id = t.category_id
+    LEFT JOIN reviews_title_genre tg ON tg.title_id = t.id
+    LEFT JOIN reviews_genre g ON g.id = tg.genre_id
+    {where}
+    GROUP BY t.id, t.name, t.description, c.name
+'''
+POSTGRESQL_DOCUMENT = '''
+    SELECT t.id,
+        setweight(to_tsvector('simple', t.name), 'A')
+        || setweight(to_tsvector('simple',
+            coalesce(string_agg(g.name, ' '), '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(c.name, '')), 'B')
+        || setweight(to_tsvector('simple',
+            coalesce(t.description, '')), 'C')
+'''
+SQLITE_DOCUMENT = '''
+    SELECT t.id, t.name, coalesce(t.description, ''),
+        coalesce(group_concat(g.name, ' '), ''), coalesce(c.name, '')
+'''
+
+
+class RawSubquery(RawSQL):
+    '''
+    RawSQL wraps itself in parentheses and `__in` adds another pair,
+    which turns `IN ((SELECT ...))` into a scalar subquery.
+    '''
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def schema_sql(vendor, drop=False):
+    if vendor == 'postgresql':
+        return POSTGRESQL_DROP if drop else POSTGRESQL_SCHEMA
+    if vendor == 'sqlite':
+        return SQLITE_DROP if drop else SQLITE_SCHEMA
+    return []
+
+
+def index_titles(title_ids=None):
+    '''
+    Rebuild the search rows of the given titles, or of the whole
+    catalog when `title_ids` is None. Runs as one set-based statement.
+    '''
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        if not title_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(title_ids))
+        where = f'WHERE t.id IN ({placeholders})'
+        delete = (f'DELETE FROM {SEARCH_TABLE}'
+                  f' WHERE {{key}} IN ({placeholders})')
+        params = title_ids
+    else:
+        where, delete, params = '', f'DELETE FROM {SEARCH_TABLE}', []
+    source = DOCUMENT_SOURCE.format(where=where)
+    if connection.vendor == 'postgresql':
+        statements = [
+            (delete.format(key='title_id'), params),
+            (f'INSERT INTO {SEARCH_TABLE} (title_id, document)'
+             f'{POSTGRESQL_DOCUMENT}{source}', params),
+        ]
+    elif connection.vendor == 'sqlite':
+        statements = [
+            (delete.format(key='rowid'), params),
+            (f'INSERT INTO {SEARCH_TABLE}'
+             ' (rowid, name, description, genres, category)'
+             f'{SQLITE_DOCUMENT}{source}', params),
+        ]
+    else:
+        return
+    with connection.cursor() as cursor:
+        for sql, sql_params in statements:
+            cursor.execute(sql, sql_params)
+
+
+def unindex_titles(title_ids):
+    # PostgreSQL rows go away with ON DELETE CASCADE.
+    title_ids = list(title_ids)
+    if connection.vendor != 'sqlite' or not title_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(title_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+            title_ids,
+        )
+
+
+def fts5_query(text):
+    '''Quote every token and make it a prefix match: `бра кар` ->
+    `"бра"* "кар"*`, so user input never reaches the MATCH syntax.'''
+    tokens = text.split()
+    return ' '.join('"{}"*'.format(token.replace('"', '""'))
+                    for token in tokens)
+
+
+def contains_pattern(text):
+    '''ILIKE pattern matching `text` literally anywhere: `%`, `_`
+    and the escape character itself lose their wildcard meaning.'''
+    escaped = (text.replace('\\', '\\\\')
+               .replace('%', '\\%').replace('_', '\\_'))
+    return f'%{escaped}%'
+
+
+def search_titles(queryset, text):
+    '''
+    Filter `queryset` down to titles matching `text` and annotate
+    them with `search_rank` (higher is more relevant).
+    '''
+    if connection.vendor == 'postgresql':
+        match = RawSubquery(
+            f'SELECT s.title_id FROM {SEARCH_TABLE} s'
+            " WHERE s.document @@ websearch_to_tsquery('simple', %s)"
+            ' UNION SELECT t.id FROM reviews_title t WHERE t.name ILIKE %s',
+            [text, contains_pattern(text)],
+        )
+        rank = RawSQL(
+            f"SELECT coalesce(ts_rank(s.document,"
+            f" websearch_to_tsquery('simple', %s)), 0)"
+            f' FROM {SEARCH_TABLE} s'
+            ' WHERE s.title_id = reviews_title.id',
+            [text],
+            output_field=FloatField(),
+        )
+        similarity = RawSQL(
+            'similarity(reviews_title.name, %s)', [text],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=match).annotate(
+            search_rank=rank + similarity)
+    if connection.vendor == 'sqlite':
+        query = fts5_query(text)
+        if not query:
+            return queryset
+        match = RawSubquery(
+            f'SELECT rowid FROM {SEARCH_TABLE}'
+            f' WHERE {SEARCH_TABLE} MATCH %s',
+            [query],
+        )
+        # bm25() is negative, lower values are better matches.
+        rank = RawSQL(
+            f'SELECT -bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0, 5.0)'
+            f' FROM {SEARCH_TABLE}'
+            f' WHERE {SEARCH_TABLE} MATCH %s'
+            f' AND rowid = reviews_title.id',
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=match).annotate(search_rank=rank)
+    return queryset.filter(name__icontains=text)
@@ -0,0 +1,80 @@
+from django.db.models.functions import Now
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .models import Category, Genre, Review, Title, TitleStats
+from .search import index_titles, unindex_titles
+
+
+@receiver(post_save, sender=Title)
+def index_saved_title(sender, instance, **kwargs):
+    index_titles([instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def unindex_deleted_title(sender, instance, **kwargs):
+    unindex_titles([instance.pk])
+
+
+@receiver(post_delete, sender=Review)
+def unrate_deleted_review(sender, instance, **kwargs):
+    '''
+    Take the review out of the stored rating and score histogram
+    however it was deleted: through the API, the admin or a cascade
+    from its author or title.
+    '''
+    Title.objects.filter(id=instance.title_id).shift_rating(
+        -instance.score, -1)
+    TitleStats.objects.shift_scores(instance.title_id, removed=instance.score)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def index_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        index_titles([instance.pk])
+    elif pk_set:
+        index_titles(pk_set)
+    else:
+        index_titles(instance.titles.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    '''
+    Genre changes move titles between the per-genre leaderboards:
+    bump changed_at so the incremental refresh re-ranks them.
+    '''
+    if action == 'pre_clear' and reverse:
+        instance._cleared_title_ids = list(
+            instance.titles.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        title_ids = [instance.pk]
+    elif action == 'post_clear':
+        title_ids = getattr(instance, '_cleared_title_ids', [])
+    else:
+        title_ids = pk_set
+    Title.objects.filter(pk__in=title_ids).update(changed_at=Now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def index_renamed_titles(sender, instance, created, **kwargs):
+    if not created:
+        index_titles(instance.titles.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def remember_titles(sender, instance, **kwargs):
+    instance._title_ids = list(instance.titles.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def index_orphaned_titles(sender, instance, **kwargs):
+    index_titles(getattr(instance, '_title_ids', []))
@@ -0,0 +1,57 @@
+'''
+Per-title score histograms.
+
+`reviews_titlestats` keeps ten review counters per title, one for each
+score. Review writes move a single counter with an atomic UPDATE; a
+title without a row has no reviews yet, or was loaded in bulk, and
+gets its row rebuilt from the reviews table on the next write.
+'''
+from django.db import connection as default_connection
+
+SCORES = range(1, 11)
+STATS_TABLE = 'reviews_titlestats'
+
+COLUMNS = ', '.join(f'score_{score}' for score in SCORES)
+BUCKETS = ', '.join(
+    f'SUM(CASE WHEN score = {score} THEN 1 ELSE 0 END)' for score in SCORES
+)
+
+
+def rebuild_title_stats(title_ids=None, connection=default_connection):
+    '''
+    Rebuild the histograms of the given titles, or of all titles when
+    `title_ids` is None, with one set-based INSERT ... SELECT.
+    Returns the number of titles that have reviews.
+    '''
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        if not title_ids:
+            return 0
+        placeholders = ', '.join(['%s'] * len(title_ids))
+        where = f'WHERE title_id IN ({placeholders})'
+    else:
+        where, title_ids = '', []
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {STATS_TABLE} {where}', title_ids)
+        cursor.execute(
+            f'INSERT INTO {STATS_TABLE} (title_id, {COLUMNS}) '
+            f'SELECT title_id, {BUCKETS} FROM reviews_review {where} '
+            'GROUP BY title_id',
+            title_ids,
+        )
+        return cursor.rowcount
+
+
+def median(counts):
+    '''Median score of a histogram given as counts of scores 1..10.'''
+    total = sum(counts)
+    if not total:
+        return None
+    middle = [(total - 1) // 2, total // 2]
+    values, seen = [], 0
+    for score, count in zip(SCORES, counts):
+        seen += count
+        while middle and middle[0] < seen:
+            values.append(score)
+            middle.pop(0)
+    return sum(values) / 2
@@ -0,0 +1,40 @@
+from django.db import connections, router
+
+
+def insert_if_exists(instance, queryset):
+    '''
+    Save an unsaved `instance` with a single
+    INSERT ... SELECT ... WHERE EXISTS (`queryset`) statement,
+    so the parent check and the insert are one round trip.
+    Returns False (and inserts nothing) when `queryset` is empty.
+    '''
+    model = type(instance)
+    opts = model._meta
+    connection = connections[router.db_for_write(model, instance=instance)]
+    quote = connection.ops.quote_name
+    fields = [field for field in opts.concrete_fields
+              if not field.primary_key]
+    values = [
+        field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for field in fields
+    ]
+    exists_sql, exists_params = queryset.order_by().values(
+        'pk')[:1].query.sql_with_params()
+    sql = (
+        f'INSERT INTO {quote(opts.db_table)} '
+        f'({", ".join(quote(field.column) for field in fields)}) '
+        f'SELECT {", ".join(["%s"] * len(fields))} '
+        f'WHERE EXISTS ({exists_sql})'
+    )
+    returning = connection.features.can_return_id_from_insert
+    if returning:
+        sql += f' RETURNING {quote(opts.pk.column)}'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values + list(exists_params))
+        if not cursor.rowcount:
+            return False
+        pk = cursor.fetchone()[0] if returning else cursor.lastrowid
+    instance.pk = pk
+    instance._state.adding = False
+    instance._state.db = connection.alias
+    return True
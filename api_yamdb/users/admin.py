@@ -1,8 +1,14 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutboxEmail, User
 
 
 @admin.register(User)
 class CustomUserAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'created', 'attempts', 'sent_at')
+    list_filter = ('sent_at',)
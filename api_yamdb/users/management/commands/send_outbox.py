@@ -0,0 +1,111 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from users.models import OutboxEmail
+
+
+def backoff(attempts):
+    config = settings.EMAIL_OUTBOX
+    return timedelta(
+        seconds=min(config['BACKOFF'] * 2 ** (attempts - 1),
+                    config['MAX_BACKOFF']))
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued e-mails over one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.EMAIL_OUTBOX['BATCH_SIZE'])
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of draining it once',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            while self.send_batch(options['batch_size']):
+                pass
+            depth = OutboxEmail.objects.depth()
+            self.stdout.write(
+                f'Outbox: {depth["pending"]} pending, '
+                f'{depth["failed"]} failed')
+            if not options['loop']:
+                return
+            time.sleep(settings.EMAIL_OUTBOX['POLL_INTERVAL'])
+
+    def send_batch(self, batch_size):
+        '''
+        Claim a batch of due e-mails, send them over a single connection
+        and record the outcome. Returns the number of e-mails delivered.
+        '''
+        batch = self.claim(batch_size)
+        if not batch:
+            return 0
+        sent = 0
+        connection = get_connection()
+        try:
+            connection.open()
+            for email in batch:
+                sent += self.deliver(connection, email)
+        except Exception as error:
+            for email in batch:
+                if email.sent_at is None:
+                    self.postpone(email, error)
+        finally:
+            connection.close()
+        OutboxEmail.objects.bulk_update(
+            batch,
+            ['body', 'sent_at', 'attempts', 'next_attempt_at', 'last_error'],
+        )
+        self.stdout.write(f'Sent {sent} of {len(batch)} e-mails')
+        return sent
+
+    def claim(self, batch_size):
+        '''
+        Lock a batch of due e-mails (other workers skip locked rows) and
+        move it out of the due set for LEASE seconds in one short
+        transaction, so the SMTP session runs without row locks.
+        '''
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutboxEmail.objects.due(now)
+                .select_for_update(skip_locked=True)
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            leased_until = now + timedelta(
+                seconds=settings.EMAIL_OUTBOX['LEASE'])
+            OutboxEmail.objects.filter(
+                pk__in=[email.pk for email in batch]
+            ).update(next_attempt_at=leased_until)
+        for email in batch:
+            email.next_attempt_at = leased_until
+        return batch
+
+    def deliver(self, connection, email):
+        message = EmailMessage(
+            subject=email.subject, body=email.body,
+            from_email=email.from_email, to=[email.recipient],
+            connection=connection,
+        )
+        try:
+            message.send()
+        except Exception as error:
+            self.postpone(email, error)
+            return 0
+        email.sent_at = timezone.now()
+        # The text may hold a confirmation code: keep only the envelope.
+        email.body = ''
+        return 1
+
+    def postpone(self, email, error):
+        email.attempts += 1
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
+        email.last_error = repr(error)
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.26 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Неудачные попытки ввода confirmation_code'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_code_expires',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Срок действия confirmation_code'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(choices=[('user', 'Пользователь'), ('moderator', 'Модератор'), ('admin', 'Администратор')], default='user', error_messages={'validators': 'Выбрана несуществующая роль'}, max_length=9, verbose_name='Роль'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clear_sent_bodies(apps, schema_editor):
+    # Delivered messages no longer keep their text (confirmation codes).
+    OutboxEmail = apps.get_model('users', 'OutboxEmail')
+    OutboxEmail.objects.filter(sent_at__isnull=False).update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_auth_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_sent_bodies, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
-from django.contrib.auth.hashers import check_password, make_password
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
-from django.utils.crypto import get_random_string
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import (constant_time_compare, get_random_string,
+                                 salted_hmac)
 
 
 class User(AbstractUser):
@@ -36,11 +39,48 @@ class User(AbstractUser):
     )
     confirmation_code = models.CharField(
         'confirmation_code', blank=True, max_length=128)
+    confirmation_code_expires = models.DateTimeField(
+        'Срок действия confirmation_code', blank=True, null=True)
+    confirmation_attempts = models.PositiveSmallIntegerField(
+        'Неудачные попытки ввода confirmation_code', default=0)
+    auth_version = models.PositiveIntegerField(
+        'Версия прав доступа', default=0, editable=False)
     REQUIRED_FIELDS = ['email']
     objects = UserManager()
 
+    def confirmation_code_digest(self, confirmation_code):
+        '''
+        Keyed HMAC of a one-time code. The code is short-lived and
+        attempts are limited, so a slow password hasher buys nothing.
+        '''
+        return salted_hmac(
+            'users.User.confirmation_code',
+            f'{self.username}:{confirmation_code}',
+        ).hexdigest()
+
     def set_confirmation_code(self, confirmation_code):
-        self.confirmation_code = make_password(confirmation_code)
+        self.confirmation_code = self.confirmation_code_digest(
+            confirmation_code)
+        self.confirmation_code_expires = (
+            timezone.now() + settings.CONFIRMATION_CODE_TTL)
+        self.confirmation_attempts = 0
+
+    def reissue_confirmation_code(self):
+        '''
+        Give a new code to the stored user with this username and email
+        in a single UPDATE (fresh expiry, attempts reset). Returns the
+        code, or None when there is no such user.
+        '''
+        confirmation_code = self.make_confirmation_code()
+        self.set_confirmation_code(confirmation_code)
+        updated = User.objects.filter(
+            username=self.username, email=self.email,
+        ).update(
+            confirmation_code=self.confirmation_code,
+            confirmation_code_expires=self.confirmation_code_expires,
+            confirmation_attempts=0,
+        )
+        return confirmation_code if updated else None
 
     def make_confirmation_code(
         self, length=6,
@@ -56,7 +96,39 @@ class User(AbstractUser):
         return get_random_string(length, allowed_chars)
 
     def check_confirmation_code(self, raw_confirmation_code: str) -> bool:
-        return check_password(raw_confirmation_code, self.confirmation_code)
+        return bool(
+            self.confirmation_code
+            and self.confirmation_code_expires is not None
+            and timezone.now() < self.confirmation_code_expires
+            and (self.confirmation_attempts
+                 < settings.CONFIRMATION_CODE_MAX_ATTEMPTS)
+            and constant_time_compare(
+                self.confirmation_code_digest(raw_confirmation_code),
+                self.confirmation_code,
+            )
+        )
+
+    def redeem_confirmation_code(self, raw_confirmation_code: str) -> bool:
+        '''
+        Check the code and burn it with a single UPDATE: a matching
+        code is cleared (it is one-time), a wrong one costs an attempt.
+        '''
+        users = User.objects.filter(pk=self.pk)
+        if self.check_confirmation_code(raw_confirmation_code):
+            return bool(users.filter(
+                confirmation_code=self.confirmation_code,
+                confirmation_code_expires__gt=timezone.now(),
+                confirmation_attempts__lt=(
+                    settings.CONFIRMATION_CODE_MAX_ATTEMPTS),
+            ).update(confirmation_code='', confirmation_code_expires=None))
+        users.update(confirmation_attempts=F('confirmation_attempts') + 1)
+        return False
+
+    def bump_auth_version(self):
+        '''Invalidate the tokens issued with the current role.'''
+        User.objects.filter(pk=self.pk).update(
+            auth_version=F('auth_version') + 1)
+        self.refresh_from_db(fields=['auth_version'])
 
     @property
     def is_user(self):
@@ -69,3 +141,52 @@ class User(AbstractUser):
     @property
     def is_admin(self):
         return self.role == self.ADMIN
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+    def due(self, now=None):
+        return self.filter(
+            sent_at__isnull=True,
+            next_attempt_at__lte=now or timezone.now(),
+            attempts__lt=settings.EMAIL_OUTBOX['MAX_ATTEMPTS'],
+        )
+
+    def depth(self):
+        '''Pending and given-up message counts.'''
+        unsent = self.filter(sent_at__isnull=True)
+        failed = unsent.filter(
+            attempts__gte=settings.EMAIL_OUTBOX['MAX_ATTEMPTS']).count()
+        return {'pending': unsent.count() - failed, 'failed': failed}
+
+
+class OutboxEmail(models.Model):
+
+    '''
+    E-mail waiting to be delivered by the `send_outbox` worker.
+    Rows are written in the same transaction as the change that
+    caused them, so a request never waits for the SMTP server.
+    '''
+
+    recipient = models.EmailField('Получатель', max_length=254)
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=254)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    sent_at = models.DateTimeField('Отправлено', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['sent_at', 'next_attempt_at'],
+                         name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
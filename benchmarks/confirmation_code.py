@@ -0,0 +1,52 @@
+'''
+CPU cost of issuing and checking one confirmation code:
+PBKDF2 (make_password / check_password) against the keyed HMAC.
+
+    $ python benchmarks/confirmation_code.py [rounds]
+'''
+import os
+import sys
+import time
+
+import django
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+
+def cpu_per_call(func, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - started) / rounds
+
+
+def main(rounds=20):
+    django.setup()
+    from django.contrib.auth.hashers import check_password, make_password
+    from users.models import User
+
+    user = User(username='benchmark', email='benchmark@yamdb.fake')
+    code = user.make_confirmation_code()
+    encoded = make_password(code)
+    user.set_confirmation_code(code)
+
+    def pbkdf2():
+        check_password(code, make_password(code))
+
+    def hmac():
+        user.set_confirmation_code(code)
+        user.check_confirmation_code(code)
+
+    # The old path hashed once on signup and once on /auth/token/.
+    old = cpu_per_call(pbkdf2, rounds)
+    new = cpu_per_call(hmac, rounds * 1000)
+    assert check_password(code, encoded) and user.check_confirmation_code(code)
+    print(f'pbkdf2 signup + token: {old * 1000:9.3f} ms CPU')
+    print(f'hmac   signup + token: {new * 1000:9.3f} ms CPU')
+    print(f'speedup: x{old / new:.0f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
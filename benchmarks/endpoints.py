@@ -0,0 +1,351 @@
+'''
+Endpoint benchmark: every route of api/urls.py against a freshly
+seeded SQLite database, driven through the full WSGI stack at a fixed
+concurrency. Reports throughput, p50/p95/p99 latency and SQL queries
+per request, and writes the results as JSON.
+
+    $ python benchmarks/endpoints.py --output bench.json
+    $ python benchmarks/endpoints.py --baseline bench.json --threshold 0.2
+
+With --baseline the run exits with status 1 when a route got slower
+(p95), lost throughput or runs more queries than in the baseline.
+'''
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+# method, path template, expected status, request factory.
+# The factory gets the seeded context and the request number and
+# returns (user, data); it runs outside the timed section.
+Route = namedtuple('Route', 'name method path status factory')
+
+
+def anonymous(context, number):
+    return None, None
+
+
+def admin(context, number):
+    return context['admin'], None
+
+
+def review_author(context, number):
+    users = context['users']
+    return users[number % len(users)], {'text': 'Отзыв', 'score': 7}
+
+
+def commenter(context, number):
+    users = context['users']
+    return users[number % len(users)], {'text': 'Комментарий'}
+
+
+def signup(context, number):
+    return None, {
+        'username': f'signup{number}', 'email': f'signup{number}@yamdb.fake'
+    }
+
+
+def token(context, number):
+    user = context['users'][number % len(context['users'])]
+    code = user.make_confirmation_code()
+    user.set_confirmation_code(code)
+    user.save(update_fields=(
+        'confirmation_code', 'confirmation_code_expires',
+        'confirmation_attempts',
+    ))
+    return None, {'username': user.username, 'confirmation_code': code}
+
+
+TITLE = '/api/v1/titles/{title}/'
+REVIEWS = TITLE + 'reviews/'
+REVIEW = REVIEWS + '{review}/'
+COMMENTS = REVIEW + 'comments/'
+
+ROUTES = [
+    Route('titles', 'get', '/api/v1/titles/', 200, anonymous),
+    Route('titles_filtered', 'get',
+          '/api/v1/titles/?genre={genre}&category={category}', 200,
+          anonymous),
+    Route('titles_search', 'get', '/api/v1/titles/?search=Жанр', 200,
+          anonymous),
+    Route('title', 'get', TITLE, 200, anonymous),
+    Route('reviews', 'get', REVIEWS, 200, anonymous),
+    Route('reviews_cursor', 'get', REVIEWS + '?cursor=', 200, anonymous),
+    Route('review', 'get', REVIEW, 200, anonymous),
+    Route('comments', 'get', COMMENTS, 200, anonymous),
+    Route('comment', 'get', COMMENTS + '{comment}/', 200, anonymous),
+    Route('categories', 'get', '/api/v1/categories/', 200, anonymous),
+    Route('genres', 'get', '/api/v1/genres/', 200, anonymous),
+    Route('users', 'get', '/api/v1/users/', 200, admin),
+    Route('user', 'get', '/api/v1/users/{username}/', 200, admin),
+    Route('me', 'get', '/api/v1/users/me/', 200, admin),
+    Route('review_create', 'post', '/api/v1/titles/{empty_title}/reviews/',
+          201, review_author),
+    Route('comment_create', 'post', COMMENTS, 201, commenter),
+    Route('signup', 'post', '/api/v1/auth/signup/', 200, signup),
+    Route('token', 'post', '/api/v1/auth/token/', 200, token),
+]
+
+
+def seed(users=200, titles=500, reviews=30, comments=30, seed=0):
+    '''
+    Fill an empty database. Returns the objects and ids the route
+    templates refer to. The same seed always gives the same data.
+    '''
+    from django.contrib.auth import get_user_model
+    from reviews.models import Category, Comment, Genre, Review, Title
+    from reviews.search import index_titles
+
+    user_model = get_user_model()
+    rng = random.Random(seed)
+    user_model.objects.bulk_create(
+        user_model(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(users)
+    )
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(5)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(10)
+    )
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    genre_ids = list(Genre.objects.values_list('id', flat=True))
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {i}', year=rng.randint(1950, 2020),
+            description=f'Описание {i}',
+            category_id=rng.choice(category_ids),
+        )
+        for i in range(titles)
+    )
+    title_ids = list(Title.objects.order_by('id').values_list('id', flat=True))
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rng.sample(genre_ids, rng.randint(1, 3))
+    )
+    user_ids = list(
+        user_model.objects.order_by('id').values_list('id', flat=True))
+    # The first title gets the long review list, the last one none,
+    # so review_create never hits unique_review.
+    Review.objects.bulk_create(
+        Review(title_id=title_id, author_id=author_id, text='Отзыв',
+               score=rng.randint(1, 10))
+        for index, title_id in enumerate(title_ids[:-1])
+        for author_id in rng.sample(
+            user_ids, reviews if index == 0 else rng.randint(0, 5))
+    )
+    review = Review.objects.filter(title_id=title_ids[0]).order_by('id')[0]
+    Comment.objects.bulk_create(
+        Comment(review=review, author_id=rng.choice(user_ids),
+                text=f'Комментарий {i}')
+        for i in range(comments)
+    )
+    Title.objects.rebuild_rating()
+    index_titles()
+    return {
+        'admin': user_model.objects.create_user(
+            username='benchmark', email='benchmark@yamdb.fake',
+            role=user_model.ADMIN),
+        'users': list(
+            user_model.objects.filter(id__in=user_ids).order_by('id')),
+        'title': title_ids[0],
+        'empty_title': title_ids[-1],
+        'review': review.id,
+        'comment': review.comments.order_by('id')[0].id,
+        'category': Category.objects.get(id=category_ids[0]).slug,
+        'genre': Genre.objects.get(id=genre_ids[0]).slug,
+        'username': 'user0',
+    }
+
+
+def percentile(values, fraction):
+    '''Nearest-rank percentile of a non-empty list.'''
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def bearer(user):
+    from api.authentication import add_user_claims
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    access = AccessToken.for_user(user)
+    add_user_claims(access, user)
+    return f'Bearer {access}'
+
+
+def run_route(route, context, requests, concurrency):
+    '''
+    Send `requests` requests from `concurrency` threads and
+    return the route's statistics.
+    '''
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    path = route.path.format(**context)
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    numbers = iter(range(requests))
+
+    def worker():
+        client = Client(SERVER_NAME='localhost')
+        try:
+            while True:
+                with lock:
+                    number = next(numbers, None)
+                if number is None:
+                    return
+                user, data = route.factory(context, number)
+                extra = {'HTTP_AUTHORIZATION': bearer(user)} if user else {}
+                if data is not None:
+                    extra['content_type'] = 'application/json'
+                send = getattr(client, route.method)
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = send(path, data, **extra)
+                    elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    queries.append(len(captured.captured_queries))
+                    if response.status_code != route.status:
+                        errors.append(response.status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return {
+        'path': path,
+        'method': route.method.upper(),
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'rps': round(len(latencies) / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'queries': max(queries),
+    }
+
+
+def compare(baseline, current, threshold):
+    '''List of regressions of `current` against `baseline` results.'''
+    regressions = []
+    for name, old in baseline['routes'].items():
+        new = current['routes'].get(name)
+        if new is None:
+            continue
+        if new['errors'] > old['errors']:
+            regressions.append(f'{name}: {new["errors"]} errors')
+        if new['queries'] > old['queries']:
+            regressions.append(
+                f'{name}: queries {old["queries"]} -> {new["queries"]}')
+        if new['p95_ms'] > old['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {old["p95_ms"]} -> {new["p95_ms"]} ms')
+        if new['rps'] < old['rps'] * (1 - threshold):
+            regressions.append(f'{name}: rps {old["rps"]} -> {new["rps"]}')
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', '--short', 'HEAD'), cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Requests per route.')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--routes', nargs='*', metavar='NAME',
+                        help='Only run these routes.')
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep the API response cache enabled.')
+    parser.add_argument('--database', default=os.path.join(
+        tempfile.gettempdir(), 'yamdb_benchmark.sqlite3'))
+    parser.add_argument('--output', help='Write the results to this file.')
+    parser.add_argument('--baseline',
+                        help='Fail on regressions against this JSON file.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative p95/rps change.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if os.path.exists(options.database):
+        os.remove(options.database)
+    os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+    os.environ['DB_NAME'] = options.database
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.API_CACHE = {**settings.API_CACHE, 'ENABLED': options.cache}
+    call_command('migrate', verbosity=0)
+    context = seed(seed=options.seed)
+    routes = [route for route in ROUTES
+              if not options.routes or route.name in options.routes]
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'requests': options.requests,
+        'concurrency': options.concurrency,
+        'seed': options.seed,
+        'cache': options.cache,
+        'routes': {},
+    }
+    print(f'{"route":<16}{"rps":>9}{"p50 ms":>10}{"p95 ms":>10}'
+          f'{"p99 ms":>10}{"queries":>9}{"errors":>8}')
+    for route in routes:
+        stats = run_route(
+            route, context, options.requests, options.concurrency)
+        results['routes'][route.name] = stats
+        print(f'{route.name:<16}{stats["rps"]:>9}{stats["p50_ms"]:>10}'
+              f'{stats["p95_ms"]:>10}{stats["p99_ms"]:>10}'
+              f'{stats["queries"]:>9}{stats["errors"]:>8}')
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, ensure_ascii=False)
+    if options.baseline:
+        with open(options.baseline) as baseline:
+            regressions = compare(
+                json.load(baseline), results, options.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
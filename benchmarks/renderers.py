@@ -0,0 +1,140 @@
+'''
+JSON renderer and parser benchmark: DRF's JSONRenderer/JSONParser
+against api/renderers.py and api/parsers.py on payloads shaped like
+the API's: pages of titles and reviews (pub_date as a string, as the
+serializers give it, and as a datetime), and a bulk titles request
+body. Reports p50/p95 per call and the speedup, and checks that both
+renderers give the same bytes.
+
+    $ python benchmarks/renderers.py --items 100 --repeat 500
+'''
+import argparse
+import datetime
+import io
+import json
+import os
+import sys
+from collections import OrderedDict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.serializers import measure  # noqa: E402
+
+UTC = datetime.timezone.utc
+
+
+def page(results):
+    return OrderedDict((
+        ('count', 10000), ('next', 'http://localhost/api/v1/?page=3'),
+        ('previous', 'http://localhost/api/v1/?page=1'),
+        ('results', results),
+    ))
+
+
+def titles(items):
+    return [OrderedDict((
+        ('id', i),
+        ('genre', [OrderedDict((('name', f'Жанр {g}'), ('slug', f'genre-{g}')))
+                   for g in range(i % 3 + 1)]),
+        ('category', OrderedDict((
+            ('name', f'Категория {i % 5}'), ('slug', f'category-{i % 5}')))),
+        ('rating', round(1 + i % 90 / 10, 2) if i % 4 else None),
+        ('name', f'Произведение {i}'),
+        ('year', 1950 + i % 70),
+        ('description', f'Описание произведения {i}. ' * 4),
+    )) for i in range(items)]
+
+
+def reviews(items, as_datetime):
+    started = datetime.datetime(2021, 1, 1, tzinfo=UTC)
+    result = []
+    for i in range(items):
+        pub_date = started + datetime.timedelta(minutes=i, microseconds=i)
+        result.append(OrderedDict((
+            ('id', i),
+            ('text', f'Отзыв {i}: ' + 'очень длинный текст отзыва ' * 8),
+            ('author', f'user{i}'),
+            ('score', i % 10 + 1),
+            ('pub_date', pub_date if as_datetime else (
+                pub_date.isoformat().replace('+00:00', 'Z'))),
+        )))
+    return result
+
+
+def payloads(items):
+    return {
+        'titles': page(titles(items)),
+        'reviews': page(reviews(items, as_datetime=False)),
+        'reviews_dt': page(reviews(items, as_datetime=True)),
+        'bulk': [
+            {'name': f'Произведение {i}', 'year': 2000,
+             'category': 'category-1', 'genre': ['genre-1', 'genre-2']}
+            for i in range(items * 10)
+        ],
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--items', type=int, default=100,
+                        help='Objects per page (the bulk body has 10x).')
+    parser.add_argument('--repeat', type=int, default=500,
+                        help='Timed runs per payload and implementation.')
+    parser.add_argument('--output', help='Write the results to this file.')
+    return parser.parse_args(argv)
+
+
+def report(results, kind, name, slow, fast):
+    slow_stats = measure(slow, results['repeat'])
+    fast_stats = measure(fast, results['repeat'])
+    speedup = round(slow_stats['p50_ms'] / fast_stats['p50_ms'], 2)
+    results[kind][name] = {
+        'stdlib': slow_stats, 'fast': fast_stats, 'speedup': speedup,
+    }
+    print(f'{kind + " " + name:<18}{slow_stats["p50_ms"]:>12}'
+          f'{fast_stats["p50_ms"]:>10}{slow_stats["p95_ms"]:>12}'
+          f'{fast_stats["p95_ms"]:>10}{speedup:>8}x')
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    os.environ.setdefault('DB_ENGINE', 'django.db.backends.sqlite3')
+
+    import django
+    django.setup()
+    from api.parsers import FastJSONParser
+    from api.renderers import FastJSONRenderer, orjson
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    if orjson is None:
+        print('orjson is not installed: both sides are the stdlib',
+              file=sys.stderr)
+    results = {
+        'items': options.items, 'repeat': options.repeat,
+        'render': {}, 'parse': {},
+    }
+    stdlib, fast = JSONRenderer(), FastJSONRenderer()
+    context = {'encoding': 'utf-8'}
+    print(f'{"payload":<18}{"stdlib p50":>12}{"fast p50":>10}'
+          f'{"stdlib p95":>12}{"fast p95":>10}{"speedup":>9}')
+    for name, data in payloads(options.items).items():
+        body = stdlib.render(data)
+        if fast.render(data) != body:
+            print(f'{name}: the renderers disagree', file=sys.stderr)
+            return 1
+        report(results, 'render', name,
+               lambda: stdlib.render(data), lambda: fast.render(data))
+        report(results, 'parse', name,
+               lambda: JSONParser().parse(io.BytesIO(body), None, context),
+               lambda: FastJSONParser().parse(
+                   io.BytesIO(body), None, context))
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
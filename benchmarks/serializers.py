@@ -0,0 +1,125 @@
+'''
+List serialization microbenchmark: a page of titles, reviews and
+comments loaded and turned into response dicts by the serializers
+(model instances, select_related/prefetch_related) and by the
+.values() rows of api/rows.py, on a freshly seeded SQLite database.
+Reports p50/p95 per page and the speedup, and checks that both paths
+give the same data.
+
+    $ python benchmarks/serializers.py --rows 100 --repeat 200
+'''
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.endpoints import percentile, seed  # noqa: E402
+
+
+def cases(context, rows):
+    '''name -> (serializer path, row path), each returning the page.'''
+    from api.rows import COMMENT_ROWS, REVIEW_ROWS, TITLE_ROWS
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleSerializer)
+    from reviews.models import Comment, Review, Title
+
+    titles = Title.objects.order_by('id')
+    reviews = Review.objects.filter(title_id=context['title'])
+    comments = Comment.objects.filter(review_id=context['review'])
+
+    def serialized(queryset, serializer_class, select, prefetch=()):
+        def run():
+            page = queryset.select_related(select).prefetch_related(
+                *prefetch)[:rows]
+            return serializer_class(page, many=True).data
+        return run
+
+    def fast(queryset, row_format):
+        def run():
+            return row_format.build(list(
+                queryset.values(*row_format.columns)[:rows]))
+        return run
+
+    return {
+        'titles': (serialized(titles, TitleSerializer, 'category', ('genre',)),
+                   fast(titles, TITLE_ROWS)),
+        'reviews': (serialized(reviews, ReviewSerializer, 'author'),
+                    fast(reviews, REVIEW_ROWS)),
+        'comments': (serialized(comments, CommentSerializer, 'author'),
+                     fast(comments, COMMENT_ROWS)),
+    }
+
+
+def measure(run, repeat):
+    for _ in range(min(repeat, 10)):
+        run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return {
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100,
+                        help='Objects per page.')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Timed runs per case and path.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', default=os.path.join(
+        tempfile.gettempdir(), 'yamdb_serializers.sqlite3'))
+    parser.add_argument('--output', help='Write the results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if os.path.exists(options.database):
+        os.remove(options.database)
+    os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+    os.environ['DB_NAME'] = options.database
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from rest_framework.renderers import JSONRenderer
+
+    call_command('migrate', verbosity=0)
+    context = seed(
+        titles=max(options.rows, 10), reviews=options.rows,
+        comments=options.rows, seed=options.seed)
+    renderer = JSONRenderer()
+    results = {'rows': options.rows, 'repeat': options.repeat, 'cases': {}}
+    print(f'{"case":<10}{"serializer p50":>16}{"rows p50":>10}'
+          f'{"serializer p95":>16}{"rows p95":>10}{"speedup":>9}')
+    for name, (serialized, fast) in cases(context, options.rows).items():
+        if renderer.render(serialized()) != renderer.render(fast()):
+            print(f'{name}: the row path output differs', file=sys.stderr)
+            return 1
+        slow_stats = measure(serialized, options.repeat)
+        fast_stats = measure(fast, options.repeat)
+        speedup = round(slow_stats['p50_ms'] / fast_stats['p50_ms'], 2)
+        results['cases'][name] = {
+            'serializer': slow_stats, 'rows': fast_stats, 'speedup': speedup,
+        }
+        print(f'{name:<10}{slow_stats["p50_ms"]:>16}{fast_stats["p50_ms"]:>10}'
+              f'{slow_stats["p95_ms"]:>16}{fast_stats["p95_ms"]:>10}'
+              f'{speedup:>8}x')
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+'''
+Sync vs async serving benchmark: runs gunicorn with sync workers
+(api_yamdb.wsgi) and with uvicorn workers (api_yamdb.asgi) over the
+same seeded SQLite database. While --slow clients trickle their
+requests in a byte at a time, --clients fast clients read the catalog
+lists; the report gives the throughput, p50/p95/p99 latency and
+failures of the fast clients in each mode.
+
+    $ python benchmarks/serving.py --workers 2 --slow 32 --duration 10
+
+A sync worker is held by a slow client until its request is complete,
+so with more slow clients than workers the fast clients starve; the
+async worker reads requests on its event loop and keeps serving.
+'''
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.endpoints import percentile, seed  # noqa: E402
+
+APP_DIR = os.path.join(ROOT_DIR, 'api_yamdb')
+MODES = {
+    'sync': ('api_yamdb.wsgi:application',),
+    'async': ('api_yamdb.asgi:application',
+              '-k', 'uvicorn.workers.UvicornWorker'),
+}
+PATHS = (
+    '/api/v1/titles/', '/api/v1/genres/', '/api/v1/categories/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+)
+
+
+def prepare(database, seed_value):
+    '''Migrated and seeded database; returns the catalog paths.'''
+    if os.path.exists(database):
+        os.remove(database)
+    import django
+    django.setup()
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    context = seed(seed=seed_value)
+    return [path.format(**context) for path in PATHS]
+
+
+def start_server(mode, port, workers, environ):
+    process = subprocess.Popen(
+        ('gunicorn', *MODES[mode], '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'),
+        cwd=APP_DIR, env=environ,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def request_bytes(path):
+    return (
+        f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+        f'Connection: close\r\n\r\n'
+    ).encode()
+
+
+def slow_client(port, path, pause, stop):
+    '''Send requests a byte per `pause` seconds until `stop` is set.'''
+    payload = request_bytes(path)
+    while not stop.is_set():
+        try:
+            with socket.create_connection(('127.0.0.1', port), 5) as client:
+                for byte in payload:
+                    if stop.is_set():
+                        return
+                    client.sendall(bytes((byte,)))
+                    time.sleep(pause)
+                while client.recv(65536):
+                    pass
+        except OSError:
+            time.sleep(pause)
+
+
+def fast_client(port, paths, timeout, stop, latencies, failures, lock):
+    number = 0
+    while not stop.is_set():
+        path = paths[number % len(paths)]
+        number += 1
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout)
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers={'Host': 'localhost'})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except OSError:
+            status = None
+        finally:
+            connection.close()
+        elapsed = time.perf_counter() - started
+        with lock:
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                failures.append(status)
+
+
+def summary(latencies, failures, wall):
+    '''Failures are statuses other than 200, None for a timeout.'''
+    statuses = sorted({str(status) for status in failures})
+    if not latencies:
+        return {'requests': 0, 'failures': len(failures),
+                'failure_statuses': statuses, 'rps': 0.0,
+                'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    return {
+        'requests': len(latencies),
+        'failures': len(failures),
+        'failure_statuses': statuses,
+        'rps': round(len(latencies) / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def run_mode(mode, paths, options, environ):
+    process = start_server(mode, options.port, options.workers, environ)
+    stop = threading.Event()
+    latencies, failures, lock = [], [], threading.Lock()
+    try:
+        slow = [
+            threading.Thread(target=slow_client, args=(
+                options.port, paths[number % len(paths)],
+                options.pause, stop))
+            for number in range(options.slow)
+        ]
+        for thread in slow:
+            thread.start()
+        time.sleep(options.pause * 4)
+        fast = [
+            threading.Thread(target=fast_client, args=(
+                options.port, paths, options.timeout, stop,
+                latencies, failures, lock))
+            for _ in range(options.clients)
+        ]
+        started = time.perf_counter()
+        for thread in fast:
+            thread.start()
+        time.sleep(options.duration)
+        stop.set()
+        for thread in fast + slow:
+            thread.join()
+        wall = time.perf_counter() - started
+    finally:
+        stop.set()
+        process.terminate()
+        process.wait()
+    return summary(latencies, failures, wall)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--modes', nargs='*', choices=MODES,
+                        default=list(MODES))
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Server processes per mode.')
+    parser.add_argument('--slow', type=int, default=32,
+                        help='Slow clients kept connected.')
+    parser.add_argument('--pause', type=float, default=0.05,
+                        help='Seconds between bytes of a slow client.')
+    parser.add_argument('--clients', type=int, default=8,
+                        help='Fast clients measured.')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--timeout', type=float, default=10,
+                        help='Fast client timeout, counted as a failure.')
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep the API response cache enabled.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', default=os.path.join(
+        tempfile.gettempdir(), 'yamdb_serving.sqlite3'))
+    parser.add_argument('--output', help='Write the results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    environ = {
+        **os.environ,
+        'DB_ENGINE': 'django.db.backends.sqlite3',
+        'DB_NAME': options.database,
+        'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings',
+    }
+    if not options.cache:
+        environ['CACHE_BACKEND'] = (
+            'django.core.cache.backends.dummy.DummyCache')
+    os.environ.update(environ)
+    sys.path.insert(0, APP_DIR)
+    paths = prepare(options.database, options.seed)
+
+    results = {
+        'workers': options.workers, 'slow': options.slow,
+        'clients': options.clients, 'duration': options.duration,
+        'modes': {},
+    }
+    print(f'{"mode":<8}{"requests":>10}{"rps":>9}{"p50 ms":>10}'
+          f'{"p95 ms":>10}{"p99 ms":>10}{"failures":>10}')
+    for mode in options.modes:
+        stats = run_mode(mode, paths, options, environ)
+        results['modes'][mode] = stats
+        print(f'{mode:<8}{stats["requests"]:>10}{stats["rps"]:>9}'
+              f'{stats["p50_ms"]!s:>10}{stats["p95_ms"]!s:>10}'
+              f'{stats["p99_ms"]!s:>10}{stats["failures"]:>10}')
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,38 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(
+    django_db_modify_db_settings_parallel_suffix, tmp_path_factory
+):
+    '''
+    SQLite: тестовая БД в файле, а не в памяти. In-memory база
+    с общим кэшем сразу отвечает «table is locked» на параллельную
+    запись, а файловая ждёт освобождения блокировки.
+    '''
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        directory = tmp_path_factory.mktemp('db')
+        database.setdefault('TEST', {})['NAME'] = str(
+            directory / 'test.sqlite3')
+        # Вторая БД для тестов реплик: роутер читает из неё, только
+        # если тест добавил её в REPLICAS['ALIASES'].
+        # Другое имя NAME, иначе Django сочтёт её зеркалом default.
+        settings.DATABASES['replica'] = {
+            **database, 'NAME': f'{database["NAME"]}.replica',
+            'TEST': {'NAME': str(directory / 'replica.sqlite3')},
+        }
@@ -0,0 +1,71 @@
+import pytest
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    '''
+    Small catalog with every relation filled in: two pages of titles,
+    several genres per title, reviews from different authors
+    and comments on every review.
+    '''
+    from reviews.models import (Category, Comment, Genre, Review, Title,
+                                TitleStats)
+
+    authors = [
+        django_user_model.objects.create(
+            username=f'author{i}', email=f'author{i}@yamdb.fake')
+        for i in range(12)
+    ]
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(4)
+    ]
+    titles = []
+    for i in range(12):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=1990 + i,
+            category=categories[i % len(categories)],
+            description=f'Описание {i}',
+        )
+        title.genre.set(genres[:i % len(genres) + 1])
+        titles.append(title)
+    title = titles[0]
+    reviews = [
+        Review.objects.create(
+            title=title, author=author, text=f'Отзыв {i}', score=i % 10 + 1
+        )
+        for i, author in enumerate(authors)
+    ]
+    Title.objects.rebuild_rating()
+    TitleStats.objects.rebuild()
+    review = reviews[0]
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text=f'Комментарий {i}')
+        for i, author in enumerate(authors)
+    )
+    return {
+        'title': title,
+        'review': review,
+        'comment': review.comments.first(),
+        'category': categories[0],
+        'genre': genres[0],
+        'author': authors[0],
+    }
+
+
+@pytest.fixture(autouse=True)
+def api_cache(settings):
+    '''
+    Response caching is off unless a test asks for this fixture
+    and enables it; the cache is emptied around every test.
+    '''
+    from django.core.cache import cache
+
+    settings.API_CACHE = {**settings.API_CACHE, 'ENABLED': False}
+    cache.clear()
+    yield settings.API_CACHE
+    cache.clear()
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def query_budget(limit, label='endpoint'):
+    '''
+    Fail when the wrapped block runs more than `limit` SQL queries.
+    The captured queries are listed in the assertion message.
+    '''
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    executed = len(context.captured_queries)
+    queries = '\n'.join(query['sql'] for query in context.captured_queries)
+    assert executed <= limit, (
+        f'Проверьте запросы к БД для {label}: '
+        f'ожидалось не больше {limit}, выполнено {executed}\n{queries}'
+    )
+
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+OPTIONS = {'CATALOG_THREADS': 1, 'THREADS': 1, 'MAX_QUEUE': 0}
+
+
+def scope(path, method='GET', query=b'', length=0):
+    return {
+        'type': 'http', 'method': method, 'path': path, 'root_path': '',
+        'query_string': query, 'http_version': '1.1', 'scheme': 'http',
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 5000),
+        'headers': [(b'host', b'localhost'),
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(length).encode())],
+    }
+
+
+async def call(application, request_scope, chunks=(b'',), pause=0):
+    '''Run one request; the body arrives in `chunks`, `pause` apart.'''
+    messages = [
+        {'type': 'http.request', 'body': chunk,
+         'more_body': number < len(chunks) - 1}
+        for number, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        if messages:
+            await asyncio.sleep(pause)
+            return messages.pop(0)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(request_scope, receive, send)
+    start, *body = sent
+    return start['status'], b''.join(part['body'] for part in body)
+
+
+def application(wsgi_application=None):
+    from api.asgi import AsyncApplication
+    from django.core.wsgi import get_wsgi_application
+
+    return AsyncApplication(
+        wsgi_application or get_wsgi_application(), OPTIONS)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsgiApplication:
+
+    def test_catalog_matches_wsgi(self, client, catalog):
+        title = catalog['title']
+        paths = (
+            '/api/v1/titles/', '/api/v1/genres/', '/api/v1/categories/',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{catalog["review"].id}'
+            '/comments/',
+        )
+        app = application()
+        for path in paths:
+            status, body = asyncio.run(call(app, scope(path)))
+            expected = client.get(path, HTTP_HOST='localhost').json()
+            assert status == 200
+            assert json.loads(body) == expected, (
+                f'Проверьте, что ASGI отдаёт на {path} то же, что WSGI'
+            )
+
+    def test_write_goes_through(self, catalog):
+        chunks = (b'{"username": "asgi", ', b'"email": "a@yamdb.fake"}')
+        request_scope = scope(
+            '/api/v1/auth/signup/', 'POST', length=len(b''.join(chunks)))
+        status, body = asyncio.run(
+            call(application(), request_scope, chunks=chunks))
+        assert status == 200, body
+        assert json.loads(body)['username'] == 'asgi'
+
+    def test_pools(self, catalog):
+        app = application()
+        title = catalog['title']
+        assert app.pool(scope('/api/v1/titles/')) is app.catalog
+        assert app.pool(
+            scope(f'/api/v1/titles/{title.id}/reviews/')) is app.catalog
+        assert app.pool(scope(f'/api/v1/titles/{title.id}/')) is app.other
+        assert app.pool(scope('/api/v1/titles/', 'POST')) is app.other
+        assert app.pool(scope('/missing/')) is app.other
+
+
+class TestConcurrency:
+
+    def test_full_pool_answers_503(self):
+        release = threading.Event()
+
+        def blocking(environ, start_response):
+            release.wait(5)
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        app = application(blocking)
+
+        async def scenario():
+            first = asyncio.ensure_future(call(app, scope('/anything/')))
+            await asyncio.sleep(0.05)
+            second = await call(app, scope('/anything/'))
+            release.set()
+            return await first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == (200, b'ok')
+        assert second[0] == 503, (
+            'Проверьте, что при заполненной очереди сервер отвечает 503'
+        )
+
+    def test_slow_client_does_not_hold_a_thread(self):
+        def hello(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [environ['wsgi.input'].read() or b'hello']
+
+        app = application(hello)
+        finished = []
+
+        async def track(name, coroutine):
+            result = await coroutine
+            finished.append(name)
+            return result
+
+        async def scenario():
+            return await asyncio.gather(
+                track('slow', call(
+                    app, scope('/anything/', 'POST', length=3),
+                    chunks=(b'a', b'b', b'c'), pause=0.1)),
+                track('fast', call(app, scope('/anything/'))),
+            )
+
+        slow, fast = asyncio.run(scenario())
+        assert slow == (200, b'abc') and fast == (200, b'hello')
+        assert finished == ['fast', 'slow'], (
+            'Проверьте, что медленный клиент не занимает поток '
+            'пока передаёт тело запроса'
+        )
+
+    def test_response_is_streamed(self):
+        produced, closed = [], []
+
+        class Export:
+            def __iter__(self):
+                for number in range(50):
+                    produced.append(number)
+                    yield b'%d;' % number
+
+            def close(self):
+                closed.append(len(produced))
+
+        def export(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/csv')])
+            return Export()
+
+        bodies, first_seen = [], []
+
+        async def send(message):
+            if message['type'] != 'http.response.body':
+                return
+            if not first_seen:
+                await asyncio.sleep(0.05)
+                first_seen.append(len(produced))
+            bodies.append(message)
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        asyncio.run(application(export)(scope('/export/'), receive, send))
+        assert first_seen[0] < 50, (
+            'Проверьте, что ответ отправляется по частям, '
+            'не дожидаясь конца итератора'
+        )
+        assert [body['more_body'] for body in bodies[:-1]] == (
+            [True] * (len(bodies) - 1))
+        assert not bodies[-1].get('more_body')
+        assert b''.join(body['body'] for body in bodies) == b''.join(
+            b'%d;' % number for number in range(50))
+        assert closed == [50], (
+            'Проверьте, что close() вызывается после последней части'
+        )
+
+    def test_client_gone_stops_the_stream(self):
+        closed = threading.Event()
+
+        class Endless:
+            def __iter__(self):
+                while True:
+                    yield b'chunk'
+
+            def close(self):
+                closed.set()
+
+        def endless(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return Endless()
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                raise OSError('connection reset')
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        with pytest.raises(OSError):
+            asyncio.run(
+                application(endless)(scope('/export/'), receive, send))
+        assert closed.wait(1), (
+            'Проверьте, что после обрыва соединения поток закрывает ответ'
+        )
+
+    def test_lifespan(self):
+        app = application(lambda environ, start_response: [])
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(app({'type': 'lifespan'}, receive, send))
+        assert sent == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete']
@@ -0,0 +1,138 @@
+import pytest
+from django.core.management import call_command
+
+from .query_budget import query_budget
+
+
+@pytest.mark.django_db
+class TestConfirmationCode:
+
+    def signup(self, client, mailoutbox):
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'newcomer', 'email': 'newcomer@yamdb.fake'})
+        assert response.status_code == 200
+        call_command('send_outbox')
+        return mailoutbox[-1].body.split()[-1]
+
+    def test_token_with_one_fetch_and_one_write(self, client, mailoutbox):
+        code = self.signup(client, mailoutbox)
+        with query_budget(2, label='/api/v1/auth/token/'):
+            response = client.post('/api/v1/auth/token/', {
+                'username': 'newcomer', 'confirmation_code': code})
+        assert response.status_code == 200 and 'access' in response.json()
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'newcomer', 'confirmation_code': code})
+        assert response.status_code == 400, (
+            'Проверьте, что confirmation_code одноразовый'
+        )
+
+    def test_attempts_are_limited(self, client, mailoutbox, settings):
+        code = self.signup(client, mailoutbox)
+        for _ in range(settings.CONFIRMATION_CODE_MAX_ATTEMPTS):
+            response = client.post('/api/v1/auth/token/', {
+                'username': 'newcomer', 'confirmation_code': 'wrong'})
+            assert response.status_code == 400
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'newcomer', 'confirmation_code': code})
+        assert response.status_code == 400, (
+            'Проверьте, что после исчерпания попыток код не принимается'
+        )
+
+    def test_signup_again_reissues_code(self, client, mailoutbox, settings):
+        first = self.signup(client, mailoutbox)
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'newcomer', 'confirmation_code': first})
+        assert response.status_code == 200
+        for _ in range(settings.CONFIRMATION_CODE_MAX_ATTEMPTS):
+            client.post('/api/v1/auth/token/', {
+                'username': 'newcomer', 'confirmation_code': 'wrong'})
+
+        with query_budget(4, label='/api/v1/auth/signup/ again') as context:
+            response = client.post('/api/v1/auth/signup/', {
+                'username': 'newcomer', 'email': 'newcomer@yamdb.fake'})
+        assert response.status_code == 200
+        call_command('send_outbox')
+        second = mailoutbox[-1].body.split()[-1]
+        writes = [query['sql'].split()[0] for query in context.captured_queries
+                  if 'users_' in query['sql']]
+        assert writes == ['UPDATE', 'INSERT'], (
+            'Проверьте, что повторный код выдаётся одним UPDATE '
+            'и одной записью в outbox'
+        )
+        assert second != first
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'newcomer', 'confirmation_code': second})
+        assert response.status_code == 200, (
+            'Проверьте, что повторный signup выдаёт новый рабочий код '
+            'и сбрасывает счётчик попыток'
+        )
+
+    def test_signup_with_other_email_is_rejected(self, client, mailoutbox):
+        self.signup(client, mailoutbox)
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'newcomer', 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400
+
+    def test_unknown_username(self, client):
+        response = client.post('/api/v1/auth/token/', {
+            'username': 'nobody', 'confirmation_code': 'code'})
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def token(self, client, user):
+        user.set_confirmation_code('code')
+        user.save()
+        response = client.post('/api/v1/auth/token/', {
+            'username': user.username, 'confirmation_code': 'code'})
+        return {'HTTP_AUTHORIZATION': f'Bearer {response.json()["access"]}'}
+
+    def test_no_user_query_per_request(self, client, user):
+        auth = self.token(client, user)
+        assert client.get('/api/v1/users/me/', **auth).json()['email'] == (
+            user.email
+        )
+        with query_budget(2, label='/api/v1/categories/ с JWT'):
+            response = client.get('/api/v1/categories/', **auth)
+        assert response.status_code == 200
+
+    def test_role_change_revokes_token(self, client, admin, user):
+        user_auth = self.token(client, user)
+        admin_auth = self.token(client, admin)
+        response = client.patch(
+            f'/api/v1/users/{user.username}/', {'role': 'moderator'},
+            content_type='application/json', **admin_auth,
+        )
+        assert response.status_code == 200
+        response = client.get('/api/v1/users/me/', **user_auth)
+        assert response.status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены'
+        )
+
+    def test_rename_revokes_token(self, client, user):
+        auth = self.token(client, user)
+        response = client.patch(
+            '/api/v1/users/me/', {'username': 'renamed'},
+            content_type='application/json', **auth,
+        )
+        assert response.status_code == 200
+        response = client.get('/api/v1/users/me/', **auth)
+        assert response.status_code == 401, (
+            'Проверьте, что смена username отзывает выданные токены'
+        )
+
+    def test_user_from_claims(self, client, user):
+        from api.authentication import ClaimsJWTAuthentication
+
+        raw = self.token(client, user)['HTTP_AUTHORIZATION'].split()[1]
+        authentication = ClaimsJWTAuthentication()
+        claimed = authentication.get_user(
+            authentication.get_validated_token(raw))
+        user.refresh_from_db()
+        fields = ('id', 'username', 'role', 'is_superuser', 'is_active',
+                  'auth_version')
+        assert [getattr(claimed, field) for field in fields] == [
+            getattr(user, field) for field in fields
+        ], 'Проверьте, что поля пользователя из токена не перепутаны'
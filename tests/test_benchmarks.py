@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.endpoints import ROUTES, compare, percentile, run_route, seed
+
+
+def result(**routes):
+    return {'routes': {
+        name: {'rps': rps, 'p95_ms': p95, 'queries': queries, 'errors': 0}
+        for name, (rps, p95, queries) in routes.items()
+    }}
+
+
+class TestBenchmarkReport:
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert [percentile(values, f) for f in (0.5, 0.95, 0.99)] == [
+            50, 95, 99]
+        assert percentile([7], 0.99) == 7
+
+    def test_compare_threshold(self):
+        baseline = result(titles=(100, 10.0, 3), genres=(200, 5.0, 2))
+        assert compare(baseline, result(
+            titles=(90, 11.5, 3), genres=(200, 5.0, 2)), 0.2) == []
+        assert compare(baseline, result(
+            titles=(70, 13.0, 4), genres=(200, 5.0, 2)), 0.2) == [
+            'titles: queries 3 -> 4',
+            'titles: p95 10.0 -> 13.0 ms',
+            'titles: rps 100 -> 70',
+        ], 'Проверьте, что сравнение с базовым прогоном находит регрессии'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_every_route_answers():
+    context = seed(users=8, titles=4, reviews=3, comments=3)
+    for route in ROUTES:
+        stats = run_route(route, context, requests=4, concurrency=2)
+        assert stats['requests'] == 4 and not stats['errors'], (
+            f'Проверьте маршрут бенчмарка {route.name}: '
+            f'статусы {stats["error_statuses"]}'
+        )
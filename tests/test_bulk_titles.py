@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from .query_budget import query_budget
+
+URL = '/api/v1/titles/bulk/'
+
+
+def item(i, **fields):
+    return {
+        'name': f'Пакетное {i}', 'year': 2000 + i % 20,
+        'description': f'Описание {i}',
+        'category': 'category-1', 'genre': ['genre-0', 'genre-2'],
+        **fields,
+    }
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+
+    def test_create_many(self, admin_client, catalog):
+        from reviews.models import Title
+
+        before = Title.objects.count()
+        response = admin_client.post(
+            URL, [item(i) for i in range(300)], format='json')
+        assert response.status_code == 201, response.json()
+        data = response.json()
+        assert len(data) == 300 and all(row['id'] for row in data)
+        assert Title.objects.count() == before + 300
+        title = Title.objects.get(id=data[-1]['id'])
+        assert title.name == 'Пакетное 299', (
+            'Проверьте, что id в ответе соответствуют созданным записям'
+        )
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'genre-0', 'genre-2']
+        assert data[0]['genre'] == ['genre-0', 'genre-2']
+        assert data[0]['category'] == 'category-1'
+
+    def test_validation_queries_do_not_grow(self, admin_client, catalog):
+        # categories, genres and the upsert ids: one query per table.
+        items = [item(i, genre=['genre-0', 'missing']) for i in range(500)]
+        items.append(item(500, id=catalog['title'].id))
+        with query_budget(3, label=URL):
+            response = admin_client.post(URL, items, format='json')
+        assert response.status_code == 400
+
+    def test_per_item_errors(self, admin_client, catalog):
+        from reviews.models import Title
+
+        before = Title.objects.count()
+        response = admin_client.post(URL, [
+            item(0),
+            item(1, category='missing'),
+            item(2, year=3000),
+            item(3, id=10 ** 6),
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == 4 and errors[0] == {}, (
+            'Проверьте, что ошибки возвращаются по одной на элемент'
+        )
+        assert set(errors[1]) == {'category'}
+        assert set(errors[2]) == {'year'}
+        assert set(errors[3]) == {'id'}
+        assert Title.objects.count() == before, (
+            'Проверьте, что при ошибках ничего не сохраняется'
+        )
+
+    def test_upsert(self, admin_client, catalog):
+        from reviews.models import Title
+        from reviews.search import search_titles
+
+        title = catalog['title']
+        response = admin_client.post(URL, [
+            item(0, id=title.id, name='Обновлённое', genre=['genre-3']),
+            item(1),
+        ], format='json')
+        assert response.status_code == 201, response.json()
+        title.refresh_from_db()
+        assert title.name == 'Обновлённое'
+        assert list(title.genre.values_list('slug', flat=True)) == [
+            'genre-3'], 'Проверьте, что жанры обновлённого заменяются'
+        assert title.rating_count == 12, (
+            'Проверьте, что обновление не сбрасывает рейтинг'
+        )
+        found = search_titles(Title.objects.all(), 'Обновлённое')
+        assert list(found.values_list('id', flat=True)) == [title.id], (
+            'Проверьте, что поисковый индекс обновляется'
+        )
+
+    def test_duplicate_ids(self, admin_client, catalog):
+        pk = catalog['title'].id
+        response = admin_client.post(
+            URL, [item(0, id=pk), item(1, id=pk)], format='json')
+        assert response.status_code == 400
+        assert response.json()[0] == {} and 'id' in response.json()[1]
+
+    def test_only_admin(self, user_client, catalog):
+        response = user_client.post(URL, [item(0)], format='json')
+        assert response.status_code == 403
+
+    def test_thousands_are_fast(self, admin_client, catalog):
+        started = time.perf_counter()
+        response = admin_client.post(
+            URL, [item(i) for i in range(3000)], format='json')
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 201
+        assert elapsed < 3, (
+            f'Проверьте скорость пакетной загрузки: 3000 за {elapsed:.2f} с'
+        )
@@ -0,0 +1,145 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import root_dir
+
+
+@pytest.fixture
+def cached(settings, api_cache):
+    settings.API_CACHE = {**api_cache, 'ENABLED': True}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('cached')
+class TestResponseCache:
+
+    def get(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200
+        return response
+
+    def test_hit_after_miss(self, client, catalog):
+        url = '/api/v1/categories/'
+        assert self.get(client, url)['X-Cache'] == 'MISS'
+        assert self.get(client, url)['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос отдаётся из кэша'
+        )
+        assert self.get(client, url + '?page=1')['X-Cache'] == 'MISS', (
+            'Проверьте, что строка запроса входит в ключ кэша'
+        )
+
+    def test_review_invalidates_only_its_title(
+        self, user_client, catalog
+    ):
+        title = catalog['title']
+        other = title.__class__.objects.exclude(pk=title.pk).first()
+        title_url = f'/api/v1/titles/{title.id}/'
+        other_url = f'/api/v1/titles/{other.id}/'
+        for url in (title_url, other_url, '/api/v1/genres/'):
+            self.get(user_client, url)
+
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Новый отзыв', 'score': 10},
+        )
+        assert response.status_code == 201
+
+        response = self.get(user_client, title_url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что отзыв сбрасывает кэш своего произведения'
+        )
+        title.refresh_from_db()
+        assert response.json()['rating'] == title.rating
+        assert self.get(user_client, other_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что отзыв не сбрасывает кэш других произведений'
+        )
+        assert self.get(user_client, '/api/v1/genres/')['X-Cache'] == 'HIT'
+
+    def test_stale_while_revalidate(self, settings, client, catalog):
+        from api.cache import get_cache, response_key
+
+        url = '/api/v1/genres/'
+        settings.API_CACHE = {**settings.API_CACHE, 'TIMEOUT': 0}
+        self.get(client, url)
+        # Another worker is already recomputing the expired entry.
+        get_cache().add(f'{response_key(None, url)}:lock', 1)
+        assert self.get(client, url)['X-Cache'] == 'STALE', (
+            'Проверьте, что пока ответ пересчитывается, '
+            'остальные запросы получают устаревшую копию'
+        )
+
+    @pytest.mark.parametrize('detail', [True, False])
+    def test_write_during_handler_is_not_hidden(
+        self, client, catalog, monkeypatch, detail
+    ):
+        from api.cache import invalidate
+        from api.views import TitleViewSet
+
+        title = catalog['title']
+        filter_queryset = TitleViewSet.filter_queryset
+
+        def concurrent_write(view, queryset):
+            # Отзыв закоммитился, пока работал обработчик.
+            invalidate(f'title:{title.id}')
+            return filter_queryset(view, queryset)
+
+        monkeypatch.setattr(TitleViewSet, 'filter_queryset', concurrent_write)
+        url = f'/api/v1/titles/{title.id}/' if detail else '/api/v1/titles/'
+        self.get(client, url)
+        monkeypatch.undo()
+        assert self.get(client, url)['X-Cache'] == 'MISS', (
+            'Проверьте, что ответ, прочитанный до инвалидации, '
+            'не сохраняется в кэше под новыми версиями тегов'
+        )
+
+    def test_evicted_tag_does_not_revive_entries(self, client, catalog):
+        from api.cache import get_cache, invalidate, tag_key
+
+        url = '/api/v1/categories/'
+        # Тег ещё ни разу не сбрасывался.
+        get_cache().delete(tag_key('categories'))
+        self.get(client, url)
+        invalidate('categories')
+        self.get(client, url)
+        # Тег вытеснен из кэша, затем сброшен записью: новая версия
+        # не должна совпасть с той, что уже сохранена в записи.
+        get_cache().delete(tag_key('categories'))
+        invalidate('categories')
+        assert self.get(client, url)['X-Cache'] == 'MISS', (
+            'Проверьте, что после вытеснения тега сброс не возвращает '
+            'устаревшие записи'
+        )
+        get_cache().delete(tag_key('categories'))
+        assert self.get(client, url)['X-Cache'] == 'MISS', (
+            'Проверьте, что вытесненный тег делает записи устаревшими'
+        )
+        assert self.get(client, url)['X-Cache'] == 'HIT'
+
+
+class TestCacheSettings:
+
+    @pytest.mark.parametrize('backend, enabled', [
+        (None, False),
+        ('django.core.cache.backends.locmem.LocMemCache', False),
+        ('django.core.cache.backends.memcached.PyLibMCCache', True),
+    ])
+    def test_enabled_only_with_shared_backend(self, backend, enabled):
+        environ = {
+            key: value for key, value in os.environ.items()
+            if key != 'CACHE_BACKEND'
+        }
+        if backend:
+            environ['CACHE_BACKEND'] = backend
+        output = subprocess.run(
+            (sys.executable, '-c', 'from api_yamdb import settings; '
+             'print(settings.API_CACHE["ENABLED"])'),
+            cwd=os.path.join(root_dir, 'api_yamdb'), env=environ,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        assert output == str(enabled), (
+            'Проверьте, что кэш ответов включается только с общим '
+            'для всех воркеров бэкендом'
+        )
@@ -0,0 +1,160 @@
+import gzip
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from prometheus_client import REGISTRY
+
+
+def middleware(response):
+    from api.compression import CompressionMiddleware
+
+    return CompressionMiddleware(lambda request: response)
+
+
+def get(accept_encoding='gzip, deflate'):
+    return RequestFactory().get(
+        '/export/', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+
+def sample(name, route, stage=None):
+    labels = {'route': route, 'encoding': 'gzip'}
+    if stage:
+        labels['stage'] = stage
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+BODY = b'{"results": [' + b'{"name": "\xd0\x96\xd0\xb0\xd0\xbd\xd1\x80"},' * 200
+
+
+class TestNegotiation:
+
+    @pytest.mark.parametrize('header, expected', [
+        ('gzip, deflate', 'gzip'),
+        ('GZIP;q=0.5', 'gzip'),
+        ('*', 'gzip'),
+        ('gzip;q=0, *;q=1', None),
+        ('identity', None),
+        ('', None),
+        ('br;q=1, gzip;q=0.8', 'gzip'),
+    ])
+    def test_choose_encoder(self, header, expected, monkeypatch):
+        from api import compression
+
+        # Без brotli: br недоступен, остаётся gzip.
+        monkeypatch.setattr(
+            compression, 'ENCODERS', (compression.GzipEncoder,))
+        encoder = compression.choose_encoder(header)
+        assert (encoder and encoder.name) == expected, (
+            f'Проверьте выбор кодирования для Accept-Encoding: {header!r}'
+        )
+
+    def test_brotli_preferred(self):
+        pytest.importorskip('brotli')
+        from api.compression import choose_encoder
+
+        assert choose_encoder('gzip, br').name == 'br'
+        assert choose_encoder('gzip, br;q=0.5').name == 'gzip'
+
+    def test_brotli_stream(self):
+        brotli = pytest.importorskip('brotli')
+
+        chunks = (b'%d;' % number * 100 for number in range(20))
+        response = middleware(StreamingHttpResponse(chunks))(get('br'))
+        assert response['Content-Encoding'] == 'br'
+        assert brotli.decompress(b''.join(response.streaming_content)) == (
+            b''.join(b'%d;' % number * 100 for number in range(20)))
+
+
+class TestCompressionMiddleware:
+
+    def test_compresses_large_body(self):
+        response = middleware(HttpResponse(BODY))(get())
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.content) == BODY, (
+            'Проверьте, что сжатый ответ распаковывается в исходный'
+        )
+        assert response['Content-Length'] == str(len(response.content))
+        assert 'Accept-Encoding' in response['Vary']
+
+    def test_strong_etag_becomes_weak(self):
+        original = HttpResponse(BODY)
+        original['ETag'] = '"abc"'
+        assert middleware(original)(get())['ETag'] == 'W/"abc"'
+
+    def test_small_body_is_sent_as_is(self, settings):
+        settings.COMPRESSION = {**settings.COMPRESSION, 'MIN_SIZE': 10 ** 6}
+        response = middleware(HttpResponse(BODY))(get())
+        assert not response.has_header('Content-Encoding')
+        assert response.content == BODY
+
+    @pytest.mark.parametrize('header, value', [
+        ('Content-Encoding', 'br'),
+        ('Content-Type', 'image/png'),
+        ('Content-Type', 'application/zip'),
+        ('Cache-Control', 'no-transform'),
+    ])
+    def test_skipped(self, header, value):
+        original = HttpResponse(BODY)
+        original[header] = value
+        response = middleware(original)(get())
+        assert response.content == BODY, (
+            f'Проверьте, что ответ с {header}: {value} не сжимается'
+        )
+
+    def test_client_without_gzip(self):
+        response = middleware(HttpResponse(BODY))(get('identity'))
+        assert response.content == BODY
+        assert 'Accept-Encoding' in response['Vary']
+
+    def test_streaming_chunk_by_chunk(self):
+        produced = []
+
+        def export():
+            for number in range(50):
+                produced.append(number)
+                yield b'%d;' % number * 100
+
+        response = middleware(StreamingHttpResponse(export()))(get())
+        assert response['Content-Encoding'] == 'gzip'
+        assert not response.has_header('Content-Length')
+        chunks = iter(response.streaming_content)
+        first = next(chunks)
+        assert first and produced == [0], (
+            'Проверьте, что потоковый ответ сжимается по частям, '
+            'без чтения всего тела'
+        )
+        body = gzip.decompress(first + b''.join(chunks))
+        assert body == b''.join(b'%d;' % number * 100 for number in range(50))
+
+    def test_metrics(self):
+        before = sample('yamdb_compression_bytes_total', 'unmatched',
+                        'original')
+        cpu_before = sample(
+            'yamdb_compression_cpu_seconds_count', 'unmatched')
+        response = middleware(HttpResponse(BODY))(get())
+        assert sample('yamdb_compression_bytes_total', 'unmatched',
+                      'original') - before == len(BODY)
+        assert sample(
+            'yamdb_compression_cpu_seconds_count', 'unmatched'
+        ) - cpu_before == 1, (
+            'Проверьте, что CPU-время сжатия попадает в метрики маршрута'
+        )
+        assert sample('yamdb_compression_ratio_count', 'unmatched') > 0
+        assert len(response.content) < len(BODY)
+
+
+@pytest.mark.django_db
+class TestCompressedAPI:
+
+    def test_titles_list(self, client, settings, catalog):
+        settings.COMPRESSION = {**settings.COMPRESSION, 'MIN_SIZE': 100}
+        plain = client.get('/api/v1/titles/')
+        compressed = client.get(
+            '/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+        assert compressed['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.content) == plain.content
+        assert sample(
+            'yamdb_compression_ratio_count', 'title-list') > 0, (
+            'Проверьте, что степень сжатия учитывается по маршруту'
+        )
@@ -0,0 +1,190 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+
+def pool(**options):
+    from api_yamdb.db.pool import ConnectionPool
+
+    return ConnectionPool('test', {'CHECK_AFTER': 60, **options})
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+def alive(connection):
+    try:
+        connection.execute('SELECT 1')
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def gauge(state):
+    return REGISTRY.get_sample_value(
+        'yamdb_db_pool_connections', {'alias': 'test', 'state': state})
+
+
+class TestConnectionPool:
+
+    def test_reuse(self):
+        connections = pool()
+        first = connections.acquire(connect, alive)
+        connections.release(first)
+        second = connections.acquire(connect, alive)
+        assert second.connection is first.connection, (
+            'Проверьте, что пул отдаёт возвращённое соединение повторно'
+        )
+        assert second.uses == 2 and connections.size == 1
+        assert gauge('in_use') == 1 and gauge('idle') == 0
+        connections.release(second)
+        assert gauge('in_use') == 0 and gauge('idle') == 1
+
+    def test_timeout_and_wait(self):
+        from api_yamdb.db.pool import PoolTimeoutError
+
+        connections = pool(MAX_SIZE=1, TIMEOUT=0.05)
+        entry = connections.acquire(connect, alive)
+        with pytest.raises(PoolTimeoutError):
+            connections.acquire(connect, alive)
+
+        connections.options['TIMEOUT'] = 5
+        timer = threading.Timer(0.05, connections.release, (entry,))
+        timer.start()
+        assert connections.acquire(connect, alive) is entry, (
+            'Проверьте, что ожидающий получает освободившееся соединение'
+        )
+        timer.join()
+        assert connections.size == 1
+
+    def test_recycle_after_uses(self):
+        connections = pool(MAX_USES=2)
+        first = connections.acquire(connect, alive)
+        connections.release(first)
+        connections.release(connections.acquire(connect, alive))
+        assert connections.size == 0
+        assert not alive(first.connection)
+        assert connections.acquire(connect, alive) is not first
+
+    def test_recycle_after_lifetime(self):
+        connections = pool(MAX_LIFETIME=0)
+        entry = connections.acquire(connect, alive)
+        connections.release(entry)
+        assert connections.size == 0 and not alive(entry.connection)
+
+    def test_liveness_check_on_borrow(self):
+        connections = pool(CHECK_AFTER=0)
+        entry = connections.acquire(connect, alive)
+        connections.release(entry)
+        entry.connection.close()
+        fresh = connections.acquire(connect, alive)
+        assert fresh is not entry and alive(fresh.connection), (
+            'Проверьте, что мёртвое соединение заменяется при выдаче'
+        )
+        assert connections.size == 1
+
+    def test_unusable_is_closed(self):
+        connections = pool()
+        entry = connections.acquire(connect, alive)
+        connections.release(entry, reusable=False)
+        assert connections.size == 0 and not alive(entry.connection)
+
+    def test_failed_connect_frees_slot(self):
+        connections = pool(MAX_SIZE=1, TIMEOUT=0.05)
+
+        def refuse():
+            raise sqlite3.OperationalError('refused')
+
+        with pytest.raises(sqlite3.OperationalError):
+            connections.acquire(refuse, alive)
+        assert connections.size == 0
+        assert connections.acquire(connect, alive)
+
+    def test_idle_above_min_size_are_closed(self):
+        connections = pool(MIN_SIZE=1, MAX_IDLE=0.01)
+        entries = [connections.acquire(connect, alive) for _ in range(3)]
+        for entry in entries:
+            connections.release(entry)
+        time.sleep(0.02)
+        connections.release(connections.acquire(connect, alive))
+        assert connections.size == 1, (
+            'Проверьте, что простаивающие соединения сверх MIN_SIZE '
+            'закрываются'
+        )
+
+    def test_pool_per_alias(self):
+        from api_yamdb.db.pool import get_pool
+
+        assert get_pool('first', None) is get_pool('first', None)
+        assert get_pool('first', None) is not get_pool('second', None)
+
+
+class FakeConnection:
+
+    '''The part of a psycopg2 connection the pooled wrapper uses.'''
+
+    def __init__(self):
+        from psycopg2 import extensions
+
+        self.closed = False
+        self.isolation_level = None
+        self.info = type('Info', (), {})()
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def rollback(self):
+        from psycopg2 import extensions
+
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+
+class TestPooledBackend:
+
+    def wrapper(self, monkeypatch):
+        from api_yamdb.db import base
+        from django.db import connection
+
+        monkeypatch.setattr(
+            base.base.DatabaseWrapper, 'get_new_connection',
+            lambda self, params: FakeConnection())
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'api_yamdb.db',
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05},
+        }
+        return base.DatabaseWrapper(settings_dict, alias='pooled')
+
+    def test_close_returns_connection(self, monkeypatch):
+        from psycopg2 import extensions
+
+        wrapper = self.wrapper(monkeypatch)
+        raw = wrapper.get_new_connection({})
+        wrapper.connection = raw
+        raw.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        wrapper._close()
+        assert raw.rollbacks == 1 and not raw.closed, (
+            'Проверьте, что незавершённая транзакция откатывается, '
+            'а соединение возвращается в пул'
+        )
+        assert wrapper.get_new_connection({}) is raw
+        wrapper.errors_occurred = True
+        wrapper._close()
+        assert raw.closed and wrapper.pool.size == 0
+
+    def test_timeout_is_operational_error(self, monkeypatch):
+        from django.db import OperationalError
+
+        wrapper = self.wrapper(monkeypatch)
+        wrapper.get_new_connection({})
+        other = self.wrapper(monkeypatch)
+        with pytest.raises(OperationalError):
+            with other.wrap_database_errors:
+                other.get_new_connection({})
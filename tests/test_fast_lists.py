@@ -0,0 +1,99 @@
+import pytest
+
+from .query_budget import query_budget
+
+
+def both_paths(client, settings, url, params=None):
+    responses = []
+    for fast in (False, True):
+        settings.FAST_LISTS = fast
+        response = client.get(url, params or {})
+        assert response.status_code == 200
+        responses.append(response.content)
+    return responses
+
+
+@pytest.mark.django_db
+class TestFastListParity:
+
+    @pytest.mark.parametrize('params', [
+        {},
+        {'page': 2},
+        {'genre': 'genre-1'},
+        {'category': 'category-2', 'year': 1995},
+        {'name': 'Произведение 1'},
+        {'search': 'Произведение'},
+    ])
+    def test_titles(self, client, settings, catalog, params):
+        from reviews.models import Title
+
+        # Без категории, жанров, описания и рейтинга: все null-ветки.
+        Title.objects.create(name='Произведение без связей', year=2000)
+        serialized, fast = both_paths(
+            client, settings, '/api/v1/titles/', params)
+        assert fast == serialized, (
+            'Проверьте, что быстрый список произведений совпадает '
+            'с TitleSerializer байт в байт'
+        )
+
+    @pytest.mark.parametrize('params', [{}, {'page': 2}, {'cursor': ''}])
+    def test_reviews(self, client, settings, catalog, params):
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        serialized, fast = both_paths(client, settings, url, params)
+        assert fast == serialized, (
+            'Проверьте, что быстрый список отзывов совпадает '
+            'с ReviewSerializer байт в байт'
+        )
+
+    def test_reviews_cursor_next_page(self, client, settings, catalog):
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        settings.FAST_LISTS = True
+        next_url = client.get(url, {'cursor': ''}).json()['next']
+        serialized, fast = both_paths(client, settings, next_url)
+        assert fast == serialized
+
+    @pytest.mark.parametrize('params', [{}, {'page': 2}, {'cursor': ''}])
+    def test_comments(self, client, settings, catalog, params):
+        review = catalog['review']
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               '/comments/')
+        serialized, fast = both_paths(client, settings, url, params)
+        assert fast == serialized, (
+            'Проверьте, что быстрый список комментариев совпадает '
+            'с CommentSerializer байт в байт'
+        )
+
+
+@pytest.mark.django_db
+class TestFastListQueries:
+
+    def test_titles_skip_serializer(self, client, settings, catalog,
+                                    monkeypatch):
+        from api.serializers import TitleSerializer
+
+        def fail(self, instance):
+            raise AssertionError('TitleSerializer.to_representation')
+
+        monkeypatch.setattr(TitleSerializer, 'to_representation', fail)
+        settings.FAST_LISTS = True
+        with query_budget(3, 'titles fast list') as context:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200, (
+            'Проверьте, что список произведений строится без сериализатора'
+        )
+        genre_queries = [
+            query for query in context.captured_queries
+            if 'reviews_title_genre' in query['sql']
+        ]
+        assert len(genre_queries) == 1, (
+            'Проверьте, что жанры страницы загружаются одним запросом'
+        )
+
+    def test_sparse_fields_use_serializer(self, client, settings, catalog):
+        settings.FAST_LISTS = True
+        response = client.get('/api/v1/titles/', {'fields': 'name'})
+        assert set(response.json()['results'][0]) == {'id', 'name'}, (
+            'Проверьте, что ?fields= по-прежнему обрабатывает сериализатор'
+        )
+        response = client.get('/api/v1/titles/', {'fields': 'secret'})
+        assert response.status_code == 400
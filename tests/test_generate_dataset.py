@@ -0,0 +1,71 @@
+from collections import Counter
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+SIZES = {
+    'users': 50, 'categories': 3, 'genres': 5,
+    'titles': 40, 'reviews': 400, 'comments': 600,
+}
+
+
+def generate(**options):
+    from reviews.management.generator import DatasetGenerator
+
+    generator = DatasetGenerator(**{**SIZES, **options})
+    return {
+        table: list(generator.rows(table))
+        for table in ('users', 'category', 'genre', 'titles',
+                      'genre_title', 'review', 'comments')
+    }
+
+
+class TestDatasetGenerator:
+
+    def test_same_seed_same_data(self):
+        assert generate(seed=1) == generate(seed=1), (
+            'Проверьте, что генерация детерминирована по seed'
+        )
+        assert generate(seed=1)['review'] != generate(seed=2)['review']
+
+    def test_constraints(self):
+        data = generate()
+        reviews = data['review'][1:]
+        assert len(reviews) == SIZES['reviews']
+        pairs = Counter((title, author) for _, title, _, author, *_ in reviews)
+        assert max(pairs.values()) == 1, (
+            'Проверьте, что один автор пишет не больше одного отзыва '
+            'к произведению (unique_review)'
+        )
+        assert all(1 <= row[4] <= 10 for row in reviews)
+        years = [row[2] for row in data['titles'][1:]]
+        assert max(years) <= timezone.now().year, (
+            'Проверьте, что год произведения проходит validator_year'
+        )
+        review_ids = {row[0] for row in reviews}
+        assert {row[1] for row in data['comments'][1:]} <= review_ids
+
+    def test_reviews_are_skewed(self):
+        per_title = Counter(row[1] for row in generate()['review'][1:])
+        counts = sorted(per_title.values(), reverse=True)
+        assert counts[0] >= 5 * counts[len(counts) // 2], (
+            'Проверьте, что отзывы распределены по произведениям '
+            'неравномерно (Zipf)'
+        )
+
+
+# The loader writes from a worker thread with its own connection.
+@pytest.mark.django_db(transaction=True)
+def test_generate_dataset_command():
+    from reviews.models import Comment, Review, Title
+
+    call_command('generate_dataset', seed=3, **SIZES)
+    assert Review.objects.count() == SIZES['reviews']
+    assert Comment.objects.exists()
+    title = Title.objects.order_by('-rating_count').first()
+    assert title.rating_count == title.reviews.count(), (
+        'Проверьте, что после генерации пересчитан рейтинг'
+    )
+    with pytest.raises(CommandError, match='not empty'):
+        call_command('generate_dataset', seed=3, **SIZES)
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+from .conftest import root_dir
+
+SCRIPT = '''
+import runpy, sys
+runpy.run_path(sys.argv[1])
+from prometheus_client import values
+print(values.ValueClass.__name__)
+'''
+
+
+class TestGunicornConf:
+
+    def test_metrics_are_file_backed(self):
+        environ = {
+            key: value for key, value in os.environ.items()
+            if key.upper() != 'PROMETHEUS_MULTIPROC_DIR'
+        }
+        config = os.path.join(root_dir, 'api_yamdb', 'gunicorn.conf.py')
+        value_class = subprocess.run(
+            (sys.executable, '-c', SCRIPT, config), env=environ,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        assert value_class != 'MutexValue', (
+            'Проверьте, что gunicorn.conf.py задаёт PROMETHEUS_MULTIPROC_DIR '
+            'до импорта prometheus_client: иначе воркеры не пишут метрики '
+            'в общие файлы'
+        )
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+
+from .test_generate_dataset import SIZES
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Проверяется путь загрузки SQLite',
+)
+
+
+def index_names(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = %s", [table])
+        return {name for name, in cursor.fetchall()}
+
+
+class TestDependencyLevels:
+
+    def test_references_load_first(self):
+        from reviews.management.commands.import_dataset import (
+            DATASET, dependency_levels)
+
+        levels = dependency_levels(reversed(list(DATASET.values())))
+        tables = [sorted(model._meta.db_table for model in level)
+                  for level in levels]
+        assert tables == [
+            ['reviews_category', 'reviews_genre', 'users_user'],
+            ['reviews_title'],
+            ['reviews_review', 'reviews_title_genre'],
+            ['reviews_comment'],
+        ], 'Проверьте, что таблицы загружаются после тех, на кого ссылаются'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportDataset:
+
+    @pytest.fixture
+    def dataset(self, tmp_path):
+        call_command('generate_dataset', seed=2, csv=str(tmp_path), **SIZES)
+        return tmp_path
+
+    def test_import(self, dataset):
+        from reviews.models import Category, Comment, Review, Title
+
+        indexes = index_names('reviews_review')
+        call_command('import_dataset', str(dataset))
+        assert Review.objects.count() == SIZES['reviews']
+        assert Comment.objects.count() == SIZES['comments']
+        assert index_names('reviews_review') == indexes, (
+            'Проверьте, что удалённые на время загрузки индексы '
+            'восстанавливаются'
+        )
+        title = Title.objects.order_by('-rating_count').first()
+        assert title.rating_count == title.reviews.count()
+        category = Category.objects.create(name='Новая', slug='new')
+        assert category.id > SIZES['categories'], (
+            'Проверьте, что после загрузки с явными id '
+            'последовательности сброшены'
+        )
+
+    def test_broken_reference_is_rolled_back(self, dataset):
+        from reviews.models import Review
+
+        path = os.path.join(dataset, 'review.csv')
+        with open(path, encoding='utf-8') as stream:
+            lines = stream.read().splitlines()
+        fields = lines[1].split(',')
+        fields[1] = '100500'
+        lines[1] = ','.join(fields)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write('\n'.join(lines) + '\n')
+
+        indexes = index_names('reviews_review')
+        with pytest.raises(IntegrityError):
+            call_command('import_dataset', str(dataset))
+        assert not Review.objects.exists(), (
+            'Проверьте, что таблица с битой ссылкой загружается '
+            'целиком или никак'
+        )
+        assert index_names('reviews_review') == indexes
+
+
+class TestDropIndexes:
+
+    @pytest.mark.django_db
+    def test_drop_and_restore(self):
+        from reviews.management.loader import drop_indexes, restore_indexes
+
+        table = 'reviews_title_genre'
+        before = index_names(table)
+        definitions = drop_indexes(connection, table)
+        assert definitions, 'Проверьте, что вторичные индексы удаляются'
+        after = index_names(table)
+        assert after < before
+        assert after == {'reviews_title_genre_title_id_genre_id_60ea2198_uniq'}, (
+            'Проверьте, что уникальные индексы не удаляются'
+        )
+        restore_indexes(connection, definitions)
+        assert index_names(table) == before
@@ -0,0 +1,64 @@
+import re
+
+import pytest
+
+
+@pytest.mark.django_db
+class TestInstrumentation:
+
+    def timings(self, response):
+        return dict(
+            (name, (float(duration), rest))
+            for name, duration, rest in re.findall(
+                r'(\w+);dur=([\d.]+)(;desc="[^"]*")?',
+                response['Server-Timing'])
+        )
+
+    def test_server_timing_header(self, client, catalog):
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        timings = self.timings(response)
+        assert set(timings) == {'db', 'serialize', 'render', 'total'}, (
+            'Проверьте, что заголовок Server-Timing содержит время БД, '
+            'сериализации, рендеринга и общее время'
+        )
+        assert timings['db'][1] == ';desc="3 queries"'
+        assert timings['serialize'][0] > 0 and timings['render'][0] > 0
+        assert timings['total'][0] >= timings['db'][0] + (
+            timings['serialize'][0])
+
+    def test_slow_request_is_logged_with_sql(
+        self, client, catalog, settings, caplog
+    ):
+        settings.INSTRUMENTATION = {
+            **settings.INSTRUMENTATION, 'SLOW_REQUEST_MS': 0}
+        client.get('/api/v1/categories/')
+        records = [
+            record for record in caplog.records
+            if record.name == 'api.instrumentation'
+        ]
+        assert len(records) == 1, 'Проверьте логирование медленных запросов'
+        message = records[0].getMessage()
+        assert '(category-list)' in message and '2 queries' in message
+        assert 'FROM "reviews_category"' in message, (
+            'Проверьте, что в лог медленного запроса попадает его SQL'
+        )
+
+    def test_metrics_endpoint(self, client, catalog):
+        client.get('/api/v1/genres/')
+        response = client.get('/metrics/')
+        assert response.status_code == 200
+        body = response.content.decode()
+        for metric in ('yamdb_request_seconds', 'yamdb_request_db_seconds',
+                       'yamdb_request_queries',
+                       'yamdb_request_serialize_seconds',
+                       'yamdb_request_render_seconds'):
+            assert f'{metric}_bucket{{' in body, (
+                f'Проверьте, что эндпоинт /metrics/ отдаёт гистограмму '
+                f'{metric}'
+            )
+        assert re.search(
+            r'yamdb_request_queries_count\{method="GET",route="genre-list"\}'
+            r' [1-9]', body
+        ), 'Проверьте, что гистограммы разбиты по имени маршрута'
+        assert 'route="metrics"' not in body
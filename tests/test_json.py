@@ -0,0 +1,142 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+MOSCOW = datetime.timezone(datetime.timedelta(hours=3))
+
+PAYLOADS = {
+    'datetimes': {
+        'utc': datetime.datetime(2021, 5, 1, 12, 30, tzinfo=timezone.utc),
+        'micro': datetime.datetime(
+            2021, 5, 1, 12, 30, 0, 1234, tzinfo=timezone.utc),
+        'moscow': datetime.datetime(2021, 5, 1, 15, 30, tzinfo=MOSCOW),
+        'naive': datetime.datetime(2021, 5, 1, 12, 30),
+        'date': datetime.date(2021, 5, 1),
+        'time': datetime.time(12, 30, 15, 5),
+    },
+    'lazy': [gettext_lazy('Неизвестные поля'), 'Ünïcödé ✓'],
+    'return_list': ReturnList(
+        [ReturnDict({'id': 1, 'name': 'Жанр'}, serializer=None)],
+        serializer=None),
+    'numbers': [0, -1, 2 ** 63 - 1, 0.1, 7.25, decimal.Decimal('8.5')],
+    'other': {
+        'uuid': uuid.UUID(int=5), 'tuple': (1, 2), 'none': None,
+        'flag': True, 'generator': (i for i in range(3)),
+        1: 'int key',
+    },
+    'separators': 'line\u2028paragraph\u2029end',
+}
+
+
+def stdlib(data, **kwargs):
+    return JSONRenderer().render(data, **kwargs)
+
+
+def fast(data, **kwargs):
+    from api.renderers import FastJSONRenderer
+
+    return FastJSONRenderer().render(data, **kwargs)
+
+
+class TestFastJSONRenderer:
+
+    @pytest.mark.parametrize('name', PAYLOADS)
+    def test_same_bytes(self, name):
+        payload = PAYLOADS[name]
+        if name == 'other':
+            expected = stdlib({**payload, 'generator': (0, 1, 2)})
+        else:
+            expected = stdlib(payload)
+        assert fast(payload) == expected, (
+            f'Проверьте, что FastJSONRenderer выводит {name} '
+            'так же, как JSONRenderer'
+        )
+
+    def test_indent_and_big_ints_use_stdlib(self):
+        data = {'big': 2 ** 70, 'items': [1, 2]}
+        assert fast(data) == stdlib(data)
+        assert fast(data, accepted_media_type='application/json; indent=4'
+                    ) == stdlib(
+            data, accepted_media_type='application/json; indent=4')
+
+    def test_none_is_empty(self):
+        assert fast(None) == b''
+
+    def test_without_orjson(self, monkeypatch):
+        from api import renderers
+
+        monkeypatch.setattr(renderers, 'orjson', None)
+        payload = PAYLOADS['datetimes']
+        assert fast(payload) == stdlib(payload)
+
+    def test_unknown_type_raises_like_stdlib(self):
+        with pytest.raises(TypeError):
+            fast({'object': object()})
+
+
+def parse(parser_class, body, encoding='utf-8'):
+    return parser_class().parse(
+        io.BytesIO(body), parser_context={'encoding': encoding})
+
+
+def fast_parser():
+    from api.parsers import FastJSONParser
+
+    return FastJSONParser
+
+
+class TestFastJSONParser:
+
+    @pytest.mark.parametrize('body', [
+        b'{"name": "\xd0\x96\xd0\xb0\xd0\xbd\xd1\x80", "genre": ["a"]}',
+        b'[1, 2.5, null, true, {"nested": {}}]',
+        b'[-9223372036854775808, 18446744073709551615]',
+        b'"\\ud800"',
+    ])
+    def test_same_data(self, body):
+        assert parse(fast_parser(), body) == parse(JSONParser, body)
+
+    def test_other_charset(self):
+        body = '{"name": "Жанр"}'.encode('cp1251')
+        assert parse(fast_parser(), body, 'cp1251') == {'name': 'Жанр'}
+
+    @pytest.mark.parametrize('body', [
+        b'{"score": NaN}', b'{"score": ', b'', b'\xef\xbb\xbf{}',
+    ])
+    def test_same_errors(self, body):
+        with pytest.raises(ParseError) as expected:
+            parse(JSONParser, body)
+        with pytest.raises(ParseError) as error:
+            parse(fast_parser(), body)
+        assert str(error.value) == str(expected.value), (
+            'Проверьте, что FastJSONParser возвращает те же ошибки'
+        )
+
+
+@pytest.mark.django_db
+class TestJSONSettings:
+
+    def test_api_uses_fast_json(self, admin_client, catalog):
+        from api.parsers import FastJSONParser
+        from api.renderers import FastJSONRenderer
+        from rest_framework.settings import api_settings
+
+        assert FastJSONRenderer in api_settings.DEFAULT_RENDERER_CLASSES
+        assert FastJSONParser in api_settings.DEFAULT_PARSER_CLASSES
+
+        review = catalog['review']
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        response = admin_client.patch(
+            url, {'text': 'Новый текст'}, format='json')
+        assert response.status_code == 200, response.content.decode()
+        assert response.json()['text'] == 'Новый текст'
+        assert response.json()['pub_date'].endswith('Z')
@@ -0,0 +1,172 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from .query_budget import query_budget
+
+
+@pytest.fixture
+def ranked(django_user_model):
+    '''
+    Four titles: `few` has two tens, `many` twelve nines, `low`
+    twelve threes and `fresh` three recent fives; the rest is old.
+    '''
+    from reviews.models import Category, Genre, Review, Title
+
+    authors = [
+        django_user_model.objects.create(
+            username=f'critic{i}', email=f'critic{i}@yamdb.fake')
+        for i in range(12)
+    ]
+    books = Category.objects.create(name='Книги', slug='books')
+    films = Category.objects.create(name='Фильмы', slug='films')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    titles = {}
+    plan = (
+        ('few', books, (drama,), [10] * 2),
+        ('many', books, (drama, comedy), [9] * 12),
+        ('low', films, (comedy,), [3] * 12),
+        ('fresh', films, (drama,), [5] * 3),
+    )
+    old = timezone.now() - timedelta(days=30)
+    for name, category, genres, scores in plan:
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set(genres)
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text=name, score=score)
+            for author, score in zip(authors, scores)
+        )
+        if name != 'fresh':
+            title.reviews.update(pub_date=old)
+        titles[name] = title
+    Title.objects.rebuild_rating()
+    return titles
+
+
+def names(response):
+    assert response.status_code == 200
+    return [row['title']['name'] for row in response.json()]
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def refresh(self, **kwargs):
+        from reviews.leaderboards import refresh_leaderboards
+
+        return refresh_leaderboards(**kwargs)
+
+    def test_bayesian_order(self, client, ranked):
+        self.refresh()
+        response = client.get('/api/v1/leaderboards/top/')
+        assert names(response) == ['many', 'few', 'fresh', 'low'], (
+            'Проверьте, что два отзыва на 10 не поднимают произведение '
+            'выше двенадцати отзывов на 9'
+        )
+        first = response.json()[0]
+        assert first['rank'] == 1 and first['review_count'] == 12
+        assert first['title']['rating'] == 9
+
+    def test_genre_and_category(self, client, ranked):
+        self.refresh()
+        url = '/api/v1/leaderboards/top/'
+        assert names(client.get(url, {'genre': 'comedy'})) == [
+            'many', 'low']
+        assert names(client.get(url, {'category': 'films'})) == [
+            'fresh', 'low']
+        assert names(client.get(url, {'genre': 'missing'})) == []
+        response = client.get(url, {'genre': 'drama', 'category': 'films'})
+        assert response.status_code == 400
+
+    def test_limit(self, client, ranked):
+        self.refresh()
+        url = '/api/v1/leaderboards/top/'
+        assert names(client.get(url, {'limit': 2})) == ['many', 'few']
+        assert len(client.get(url, {'limit': 1000}).json()) == 4
+        assert client.get(url, {'limit': 'x'}).status_code == 400
+
+    def test_trending_window(self, client, ranked):
+        self.refresh()
+        response = client.get('/api/v1/leaderboards/trending/')
+        assert names(response) == ['fresh'], (
+            'Проверьте, что в популярное попадают только отзывы '
+            'из окна TRENDING_WINDOW'
+        )
+        assert response.json()[0]['trending'] == 3
+
+        later = timezone.now() + timedelta(days=8)
+        self.refresh(now=later)
+        assert names(client.get('/api/v1/leaderboards/trending/')) == []
+
+    def test_incremental_refresh(self, user_client, client, ranked):
+        from reviews.models import Title, TitleRanking
+
+        assert self.refresh() == (4, 1)
+        # Step out of the LOOKBACK margin of the previous run.
+        Title.objects.update(changed_at=timezone.now() - timedelta(hours=1))
+        assert self.refresh() == (0, 1), (
+            'Проверьте, что без изменений произведения не переранжируются'
+        )
+
+        low = ranked['low']
+        user_client.post(
+            f'/api/v1/titles/{low.id}/reviews/', {'text': 'Да', 'score': 10})
+        before = TitleRanking.objects.get(title=low).score
+        assert self.refresh() == (1, 2)
+        assert TitleRanking.objects.get(title=low).score > before
+        assert 'low' in names(client.get('/api/v1/leaderboards/trending/'))
+
+    @pytest.mark.parametrize('change', ['forward', 'reverse', 'bulk'])
+    def test_genre_change_is_reranked(
+        self, admin_client, client, ranked, change
+    ):
+        from reviews.models import Genre, Title
+
+        self.refresh()
+        Title.objects.update(changed_at=timezone.now() - timedelta(hours=1))
+        few, comedy = ranked['few'], Genre.objects.get(slug='comedy')
+        if change == 'forward':
+            few.genre.add(comedy)
+        elif change == 'reverse':
+            comedy.titles.add(few)
+        else:
+            response = admin_client.post('/api/v1/titles/bulk/', [{
+                'id': few.id, 'name': 'few', 'year': 2000,
+                'category': 'books', 'genre': ['drama', 'comedy'],
+            }], format='json')
+            assert response.status_code == 201, response.json()
+        assert self.refresh()[0] == 1
+        assert names(client.get(
+            '/api/v1/leaderboards/top/', {'genre': 'comedy'}
+        )) == ['many', 'few', 'low'], (
+            'Проверьте, что смена жанров переранжирует произведение '
+            'при инкрементальном обновлении'
+        )
+
+    def test_genre_cleared_from_genre_side(self, client, ranked):
+        from reviews.models import Genre, Title
+
+        self.refresh()
+        Title.objects.update(changed_at=timezone.now() - timedelta(hours=1))
+        Genre.objects.get(slug='comedy').titles.clear()
+        assert self.refresh()[0] == 2
+        assert names(client.get(
+            '/api/v1/leaderboards/top/', {'genre': 'comedy'})) == []
+
+    def test_command(self, ranked, capsys):
+        from django.core.management import call_command
+
+        call_command('refresh_leaderboards', '--full')
+        assert '4 titles re-ranked' in capsys.readouterr().out
+
+    @pytest.mark.parametrize('limit', (2, 20))
+    def test_query_budget(self, client, ranked, limit):
+        self.refresh()
+        with query_budget(2, f'leaderboards limit={limit}'):
+            client.get('/api/v1/leaderboards/top/', {'limit': limit})
+        with query_budget(2, f'leaderboards genre limit={limit}'):
+            client.get(
+                '/api/v1/leaderboards/top/',
+                {'limit': limit, 'genre': 'drama'})
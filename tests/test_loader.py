@@ -0,0 +1,103 @@
+import csv
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+
+from .query_budget import query_budget
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as stream:
+        csv.writer(stream).writerows(rows)
+    return str(path)
+
+
+GENRES = [['id', 'name', 'slug']] + [
+    [number, f'Жанр {number}', f'genre-{number}'] for number in range(1, 6)
+]
+
+
+@pytest.mark.django_db
+class TestCSVLoadCommand:
+
+    def test_batches(self, tmp_path):
+        from reviews.models import Genre
+
+        link = write_csv(tmp_path / 'genre.csv', GENRES)
+        with query_budget(20, 'load_genres') as context:
+            call_command('load_genres', link, batch_size=2)
+        inserts = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "reviews_genre"')
+        ]
+        assert len(inserts) == 3, (
+            'Проверьте, что строки загружаются пачками по --batch-size'
+        )
+        assert list(Genre.objects.order_by('id').values_list(
+            'slug', flat=True)) == [row[2] for row in GENRES[1:]]
+
+    def test_failed_batch_is_rolled_back(self, tmp_path):
+        from reviews.models import Genre
+
+        rows = GENRES[:4] + [[9, 'Повтор', 'genre-1']]
+        link = write_csv(tmp_path / 'genre.csv', rows)
+        with pytest.raises(IntegrityError):
+            call_command('load_genres', link, batch_size=2)
+        assert list(Genre.objects.values_list('id', flat=True)) == [1, 2], (
+            'Проверьте, что неудачная пачка откатывается целиком, '
+            'а загруженные до неё остаются'
+        )
+
+    def test_url_is_streamed(self, monkeypatch):
+        from reviews.management import loader
+        from reviews.models import Genre
+
+        body = io.StringIO()
+        csv.writer(body).writerows(GENRES)
+        raw = io.BytesIO(body.getvalue().encode('utf-8-sig'))
+        calls = []
+
+        class Response:
+            def __init__(self):
+                self.raw = raw
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                raw.close()
+
+            def raise_for_status(self):
+                pass
+
+        def get(url, **kwargs):
+            calls.append((url, kwargs))
+            return Response()
+
+        monkeypatch.setattr(loader.requests, 'get', get)
+        call_command('load_genres', 'https://example.com/genre.csv')
+        assert calls == [('https://example.com/genre.csv', {'stream': True})], (
+            'Проверьте, что файл по ссылке читается потоком'
+        )
+        assert raw.closed
+        assert Genre.objects.count() == len(GENRES) - 1
+
+
+class TestPreparedRows:
+
+    def test_missing_pub_date_keeps_file_order(self):
+        from reviews.management.loader import prepared_rows
+        from reviews.models import Review
+
+        reader = iter(
+            [['id', 'title_id', 'text', 'author_id', 'score']]
+            + [[number, 1, 'Текст', 1, 5] for number in range(1, 5)]
+        )
+        columns, rows = prepared_rows(Review, connection, reader)
+        stamps = [row[columns.index('pub_date')] for row in rows]
+        assert stamps == sorted(stamps) and len(set(stamps)) == 4, (
+            'Проверьте, что строки без pub_date получают разные '
+            'возрастающие даты в порядке файла'
+        )
@@ -0,0 +1,82 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def signup(self, client):
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'newcomer', 'email': 'newcomer@yamdb.fake'})
+        assert response.status_code == 200
+
+    def test_signup_enqueues_and_worker_sends(self, client, mailoutbox):
+        from users.models import OutboxEmail
+
+        self.signup(client)
+        assert mailoutbox == [], (
+            'Проверьте, что письмо не отправляется внутри запроса'
+        )
+        assert OutboxEmail.objects.depth() == {'pending': 1, 'failed': 0}
+        call_command('send_outbox')
+        assert [mail.to for mail in mailoutbox] == [['newcomer@yamdb.fake']]
+        assert OutboxEmail.objects.depth()['pending'] == 0
+
+    def test_failed_delivery_is_retried_later(
+        self, client, mailoutbox, monkeypatch
+    ):
+        from django.core.mail.backends.locmem import EmailBackend
+        from users.models import OutboxEmail
+
+        def broken(*args, **kwargs):
+            raise ConnectionError('SMTP is down')
+
+        self.signup(client)
+        monkeypatch.setattr(EmailBackend, 'send_messages', broken)
+        call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1 and email.sent_at is None
+        assert 'SMTP is down' in email.last_error
+        monkeypatch.undo()
+        call_command('send_outbox')
+        assert mailoutbox == [], (
+            'Проверьте, что повторная попытка ждёт окончания backoff'
+        )
+
+    def test_sent_body_is_cleared(self, client, mailoutbox):
+        from users.models import OutboxEmail
+
+        self.signup(client)
+        call_command('send_outbox')
+        assert 'confirmation code' in mailoutbox[0].body
+        email = OutboxEmail.objects.get()
+        assert email.sent_at is not None and email.body == '', (
+            'Проверьте, что после отправки код не хранится в outbox'
+        )
+
+    def test_smtp_runs_outside_claim_transaction(
+        self, client, mailoutbox, monkeypatch
+    ):
+        from django.core.mail.backends.locmem import EmailBackend
+        from django.db import connection
+        from users.models import OutboxEmail
+
+        send_messages = EmailBackend.send_messages
+        seen = []
+
+        def checked(backend, messages):
+            seen.append((len(connection.savepoint_ids),
+                         OutboxEmail.objects.due().exists()))
+            return send_messages(backend, messages)
+
+        self.signup(client)
+        monkeypatch.setattr(EmailBackend, 'send_messages', checked)
+        # Тест сам идёт в транзакции: вложенный atomic() команды
+        # добавил бы точку сохранения к уже открытым.
+        outer = len(connection.savepoint_ids)
+        call_command('send_outbox')
+        assert seen == [(outer, False)], (
+            'Проверьте, что письма отправляются вне транзакции захвата, '
+            'а захваченные строки уже не считаются готовыми к отправке'
+        )
+        assert OutboxEmail.objects.get().sent_at is not None
@@ -0,0 +1,31 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_reviews_cursor_walk(self, user_client, catalog):
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/?cursor='
+        seen = []
+        while url:
+            response = user_client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация не считает COUNT(*)'
+            )
+            seen.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert sorted(seen) == sorted(
+            title.reviews.values_list('id', flat=True)
+        ), 'Проверьте, что курсорная пагинация отдаёт каждый отзыв ровно один раз'
+
+    def test_reviews_page_number_by_default(self, user_client, catalog):
+        title = catalog['title']
+        response = user_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.json()['count'] == title.reviews.count(), (
+            'Проверьте, что по умолчанию сохранён формат PageNumberPagination'
+        )
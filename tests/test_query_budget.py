@@ -0,0 +1,38 @@
+import pytest
+
+from .query_budget import query_budget
+
+# Endpoint -> maximum number of SQL queries for one request.
+# Pagination adds a COUNT query to every list endpoint.
+QUERY_BUDGETS = [
+    ('/api/v1/titles/', 3),
+    ('/api/v1/titles/?genre=genre-0&category=category-0', 3),
+    ('/api/v1/titles/?search=Жанр', 3),
+    ('/api/v1/titles/{title.id}/', 2),
+    ('/api/v1/titles/{title.id}/stats/', 1),
+    ('/api/v1/titles/{title.id}/reviews/', 3),
+    ('/api/v1/titles/{title.id}/reviews/?cursor=', 2),
+    ('/api/v1/titles/{title.id}/reviews/{review.id}/', 1),
+    ('/api/v1/titles/{title.id}/reviews/{review.id}/comments/', 3),
+    ('/api/v1/titles/{title.id}/reviews/{review.id}/comments/?cursor=', 2),
+    ('/api/v1/titles/{title.id}/reviews/{review.id}/comments/{comment.id}/',
+     1),
+    ('/api/v1/categories/', 2),
+    ('/api/v1/genres/', 2),
+    ('/api/v1/users/', 2),
+    ('/api/v1/users/{author.username}/', 1),
+    ('/api/v1/users/me/', 0),
+]
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('url, limit', QUERY_BUDGETS)
+    def test_endpoint_query_budget(self, admin_client, catalog, url, limit):
+        url = url.format(**catalog)
+        with query_budget(limit, label=url):
+            response = admin_client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
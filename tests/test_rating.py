@@ -0,0 +1,110 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Avg, Count, Sum
+from rest_framework.test import APIClient
+
+
+def stored(title):
+    title.refresh_from_db()
+    return title.rating_sum, title.rating_count, title.rating
+
+
+def expected(title):
+    totals = title.reviews.aggregate(
+        total=Sum('score'), count=Count('pk'), average=Avg('score'))
+    return totals['total'] or 0, totals['count'], totals['average']
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_shift_rating(self, catalog):
+        from reviews.models import Title
+
+        title = Title.objects.exclude(pk=catalog['title'].pk).first()
+        titles = Title.objects.filter(pk=title.pk)
+        assert stored(title) == (0, 0, None)
+        assert titles.shift_rating(8, 1) == 1
+        assert titles.shift_rating(3, 1) == 1
+        assert stored(title) == (11, 2, 5.5)
+        assert titles.shift_rating(-3, -1) == 1
+        assert stored(title) == (8, 1, 8.0)
+        titles.shift_rating(-8, -1)
+        assert stored(title) == (0, 0, None), (
+            'Проверьте, что без отзывов рейтинг становится пустым'
+        )
+
+    def test_reviews_keep_rating_in_sync(self, user_client, catalog):
+        from reviews.models import Title
+
+        title = Title.objects.exclude(pk=catalog['title'].pk).first()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        assert stored(title) == expected(title) == (4, 1, 4.0), (
+            'Проверьте, что новый отзыв учитывается в рейтинге'
+        )
+
+        review_url = f'{url}{response.json()["id"]}/'
+        response = user_client.patch(review_url, {'score': 9})
+        assert response.status_code == 200
+        assert stored(title) == expected(title) == (9, 1, 9.0), (
+            'Проверьте, что смена оценки пересчитывает рейтинг'
+        )
+
+        assert user_client.delete(review_url).status_code == 204
+        assert stored(title) == expected(title)[:2] + (None,), (
+            'Проверьте, что удалённый отзыв вычитается из рейтинга'
+        )
+
+    def test_rebuild_matches_incremental(
+        self, user_client, admin_client, catalog
+    ):
+        from reviews.models import Title
+
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 2})
+        review_url = f'{url}{response.json()["id"]}/'
+        user_client.patch(review_url, {'score': 7})
+        response = admin_client.delete(f'{url}{catalog["review"].id}/')
+        assert response.status_code == 204
+        incremental = {
+            title.pk: stored(title) for title in Title.objects.all()
+        }
+
+        call_command('rebuild_ratings')
+        rebuilt = {title.pk: stored(title) for title in Title.objects.all()}
+        assert rebuilt == incremental, (
+            'Проверьте, что rebuild_ratings даёт те же значения, '
+            'что и пошаговое обновление'
+        )
+        assert rebuilt[title.pk] == expected(title)
+
+    def test_cascade_delete_keeps_rating(
+        self, admin_client, catalog, django_user_model
+    ):
+        from reviews.models import Review, Title
+
+        title = Title.objects.exclude(pk=catalog['title'].pk).first()
+        critic = django_user_model.objects.create(
+            username='critic', email='critic@yamdb.fake')
+        client = APIClient()
+        client.force_authenticate(critic)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert client.post(url, {'text': 'Отзыв', 'score': 3}).status_code == 201
+
+        response = admin_client.delete('/api/v1/users/critic/')
+        assert response.status_code == 204
+        assert not Review.objects.filter(title=title).exists()
+        incremental = {
+            title.pk: stored(title) for title in Title.objects.all()
+        }
+        assert incremental[title.pk] == (0, 0, None), (
+            'Проверьте, что отзывы удалённого пользователя '
+            'вычитаются из рейтинга'
+        )
+        call_command('rebuild_ratings')
+        assert {
+            title.pk: stored(title) for title in Title.objects.all()
+        } == incremental
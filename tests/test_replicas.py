@@ -0,0 +1,186 @@
+import time
+
+import pytest
+from django.conf import settings as django_settings
+
+pytestmark = [
+    pytest.mark.skipif(
+        django_settings.DATABASES['default']['ENGINE']
+        != 'django.db.backends.sqlite3',
+        reason='Вторая база replica создаётся только для SQLite',
+    ),
+    pytest.mark.django_db(databases=['default', 'replica']),
+]
+
+
+@pytest.fixture
+def replica(settings):
+    from api.replicas import health
+
+    settings.REPLICAS = {**settings.REPLICAS, 'ALIASES': ['replica']}
+    health.reset()
+    yield 'replica'
+    health.reset()
+
+
+def genres(client):
+    response = client.get('/api/v1/genres/')
+    assert response.status_code == 200
+    return [genre['slug'] for genre in response.json()['results']]
+
+
+class TestReplicaRouting:
+
+    def test_reads_go_to_replica(self, client, replica):
+        from reviews.models import Genre
+
+        Genre.objects.create(name='На основной', slug='primary')
+        Genre.objects.using(replica).create(name='На реплике', slug='replica')
+        assert genres(client) == ['replica'], (
+            'Проверьте, что GET к API читает из реплики'
+        )
+
+    def test_without_replicas_reads_primary(self, client):
+        from reviews.models import Genre
+
+        Genre.objects.create(name='На основной', slug='primary')
+        assert genres(client) == ['primary']
+
+    def test_writes_go_to_primary(self, admin_client, replica):
+        from reviews.models import Genre
+
+        response = admin_client.post(
+            '/api/v1/genres/', {'name': 'Новый', 'slug': 'new'})
+        assert response.status_code == 201
+        assert Genre.objects.using('default').filter(slug='new').exists()
+        assert not Genre.objects.using(replica).exists()
+
+    def test_router_outside_requests(self, replica):
+        from api.replicas import ReplicaRouter
+        from reviews.models import Genre
+
+        router = ReplicaRouter()
+        assert router.db_for_read(Genre) == 'default'
+        assert router.db_for_write(Genre) == 'default'
+
+
+class TestCachedReads:
+
+    def test_cache_is_filled_from_primary(
+        self, settings, api_cache, client, replica
+    ):
+        from reviews.models import Genre
+
+        settings.API_CACHE = {**api_cache, 'ENABLED': True}
+        Genre.objects.create(name='На основной', slug='primary')
+        # Реплика отстаёт: нового жанра на ней ещё нет.
+        Genre.objects.using(replica).create(name='Старый', slug='old')
+        assert genres(client) == ['primary'], (
+            'Проверьте, что кэш заполняется чтением с основной базы, '
+            'а не с отстающей реплики'
+        )
+        assert genres(client) == ['primary']
+
+
+class TestReadYourWrites:
+
+    def test_author_reads_primary_after_write(
+        self, user_client, client, replica, catalog
+    ):
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'Свежий', 'score': 5})
+        assert response.status_code == 201
+        cookie = django_settings.REPLICAS['COOKIE']
+        assert cookie in response.cookies, (
+            'Проверьте, что после записи выставляется cookie '
+            'чтения с основной базы'
+        )
+
+        own = user_client.get(url).json()['results']
+        assert 'Свежий' in [review['text'] for review in own], (
+            'Проверьте, что автор сразу видит свой отзыв'
+        )
+        # Реплика пуста: произведения там ещё нет.
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что остальные клиенты читают из реплики'
+        )
+
+    def test_failed_write_does_not_stick(self, user_client, replica):
+        response = user_client.post('/api/v1/titles/0/reviews/', {
+            'text': 'Текст', 'score': 5})
+        assert response.status_code == 404
+        assert django_settings.REPLICAS['COOKIE'] not in response.cookies
+
+    def test_window_expires(self, rf, replica):
+        from api.replicas import COOKIE_SALT, ReplicaMiddleware
+        from django.core.signing import get_cookie_signer
+
+        cookie = django_settings.REPLICAS['COOKIE']
+        signer = get_cookie_signer(salt=cookie + COOKIE_SALT)
+
+        def request(until):
+            request = rf.get('/api/v1/genres/')
+            request.COOKIES[cookie] = signer.sign(str(until))
+            return request
+
+        assert ReplicaMiddleware.sticky(request(time.time() + 60))
+        assert not ReplicaMiddleware.sticky(request(time.time() - 1))
+
+
+class TestReplicaHealth:
+
+    def test_failed_replica_falls_back(
+        self, client, replica, monkeypatch
+    ):
+        from api.replicas import health
+        from django.db import connections
+        from reviews.models import Genre
+
+        Genre.objects.create(name='На основной', slug='primary')
+        failures = []
+
+        def create_cursor(name=None):
+            failures.append(name)
+            raise connections[replica].Database.OperationalError('down')
+
+        monkeypatch.setattr(
+            connections[replica], 'create_cursor', create_cursor)
+        assert genres(client) == ['primary'], (
+            'Проверьте, что при отказе реплики ответ берётся '
+            'с основной базы'
+        )
+        assert health.available([replica]) == []
+        assert genres(client) == ['primary']
+        assert len(failures) == 1, (
+            'Проверьте, что отказавшая реплика выводится из ротации'
+        )
+
+    def test_primary_error_keeps_replica(
+        self, client, replica, monkeypatch
+    ):
+        from api.replicas import health
+        from api.views import GenreViewSet
+        from django.db import OperationalError, connections
+
+        def broken_primary(*args, **kwargs):
+            with connections['default'].cursor() as cursor:
+                cursor.execute('SELECT * FROM no_such_table')
+
+        monkeypatch.setattr(GenreViewSet, 'list', broken_primary)
+        with pytest.raises(OperationalError):
+            client.get('/api/v1/genres/')
+        assert health.available([replica]) == [replica], (
+            'Проверьте, что реплика не выводится из ротации '
+            'из-за ошибки основной базы'
+        )
+
+    def test_replica_returns_after_retry(self, replica):
+        from api.replicas import ReplicaHealth
+
+        replicas = ReplicaHealth()
+        replicas.mark_down('first', retry_after=0.01)
+        assert replicas.available(['first', 'second']) == ['second']
+        time.sleep(0.02)
+        assert replicas.available(['first', 'second']) == [
+            'first', 'second']
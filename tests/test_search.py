@@ -0,0 +1,62 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def search(self, client, text, key='results'):
+        response = client.get('/api/v1/titles/', {'search': text})
+        assert response.status_code == 200, (
+            'Проверьте, что поиск по произведениям возвращает статус 200'
+        )
+        if key != 'results':
+            return response.json()[key]
+        return [title['name'] for title in response.json()['results']]
+
+    def test_search_by_name_genre_and_category(self, user_client, catalog):
+        assert self.search(user_client, 'Произведение 11')[0] == (
+            'Произведение 11'
+        ), 'Проверьте, что совпадение по названию идёт первым'
+        assert self.search(user_client, 'Жанр', key='count') == 12, (
+            'Проверьте, что поиск учитывает названия жанров'
+        )
+        assert self.search(user_client, 'категория', key='count') == 12, (
+            'Проверьте, что поиск учитывает название категории'
+        )
+
+    def test_index_follows_writes(self, admin_client, catalog):
+        from reviews.models import Genre
+
+        genre = Genre.objects.create(name='Киберпанк', slug='cyberpunk')
+        response = admin_client.post('/api/v1/titles/', {
+            'name': 'Солярис', 'year': 1972, 'description': 'фантастика',
+            'genre': [genre.slug], 'category': catalog['category'].slug,
+        })
+        assert response.status_code == 201
+        assert self.search(admin_client, 'Солярис') == ['Солярис'], (
+            'Проверьте, что новое произведение попадает в поисковый индекс'
+        )
+        assert self.search(admin_client, 'киберпанк') == ['Солярис'], (
+            'Проверьте, что жанры нового произведения попадают в индекс'
+        )
+        genre.delete()
+        assert self.search(admin_client, 'киберпанк') == [], (
+            'Проверьте, что удаление жанра обновляет поисковый индекс'
+        )
+
+
+class TestContainsPattern:
+
+    @pytest.mark.parametrize('text, pattern', [
+        ('Бра', '%Бра%'),
+        ('100%', '%100\\%%'),
+        ('a_b', '%a\\_b%'),
+        ('C:\\dir', '%C:\\\\dir%'),
+    ])
+    def test_wildcards_are_escaped(self, text, pattern):
+        from reviews.search import contains_pattern
+
+        assert contains_pattern(text) == pattern, (
+            'Проверьте, что %, _ и \\ в поисковой строке '
+            'не работают как шаблон ILIKE'
+        )
@@ -0,0 +1,131 @@
+import pytest
+
+from .query_budget import query_budget
+
+
+@pytest.mark.django_db
+class TestSparseTitles:
+
+    url = '/api/v1/titles/'
+
+    def test_default_is_unchanged(self, client, catalog):
+        title = client.get(self.url).json()['results'][0]
+        assert set(title) == {
+            'id', 'name', 'year', 'rating', 'description', 'genre',
+            'category'}
+        assert isinstance(title['category'], dict)
+        assert isinstance(title['genre'][0], dict)
+
+    def test_fields_skip_joins_and_columns(self, client, catalog):
+        with query_budget(2, 'titles?fields=id,name,rating') as context:
+            response = client.get(self.url, {'fields': 'id,name,rating'})
+        titles = response.json()['results']
+        assert all(set(title) == {'id', 'name', 'rating'} for title in titles), (
+            'Проверьте, что ?fields= оставляет только запрошенные поля'
+        )
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert 'reviews_category' not in sql and 'reviews_genre' not in sql, (
+            'Проверьте, что без genre и category нет JOIN и prefetch'
+        )
+        assert 'description' not in sql, (
+            'Проверьте, что незапрошенные столбцы не выбираются'
+        )
+
+    def test_id_is_always_returned(self, client, catalog):
+        title = client.get(self.url, {'fields': 'name'}).json()['results'][0]
+        assert set(title) == {'id', 'name'}
+
+    def test_expand(self, client, catalog):
+        collapsed = client.get(
+            self.url, {'fields': 'genre,category', 'expand': ''}
+        ).json()['results'][0]
+        assert collapsed['category'] == catalog['category'].slug
+        assert collapsed['genre'] == [catalog['genre'].slug], (
+            'Проверьте, что без expand связи отдаются слагами'
+        )
+        expanded = client.get(
+            self.url, {'fields': 'genre,category', 'expand': 'genre'}
+        ).json()['results'][0]
+        assert expanded['genre'] == [
+            {'name': catalog['genre'].name, 'slug': catalog['genre'].slug}]
+        assert expanded['category'] == catalog['category'].slug
+
+    def test_detail(self, client, catalog):
+        title = catalog['title']
+        with query_budget(1, 'title?fields=name,year'):
+            response = client.get(
+                f'{self.url}{title.id}/', {'fields': 'name,year'})
+        assert response.json() == {
+            'id': title.id, 'name': title.name, 'year': title.year}
+
+    def test_unknown_fields(self, client, catalog):
+        response = client.get(self.url, {'fields': 'name,secret'})
+        assert response.status_code == 400
+        assert 'fields' in response.json()
+        response = client.get(self.url, {'expand': 'rating'})
+        assert response.status_code == 400
+
+    def test_writes_ignore_fields(self, admin_client, catalog):
+        response = admin_client.post(f'{self.url}?fields=name', {
+            'name': 'Новое', 'year': 2000,
+            'category': catalog['category'].slug,
+            'genre': [catalog['genre'].slug],
+        })
+        assert response.status_code == 201
+        assert response.json()['category'] == catalog['category'].slug
+
+
+@pytest.mark.django_db
+class TestSparseReviewsAndComments:
+
+    def test_reviews(self, client, catalog):
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with query_budget(3, 'reviews?fields=score') as context:
+            response = client.get(url, {'fields': 'score'})
+        assert set(response.json()['results'][0]) == {'id', 'score'}
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert 'users_user' not in sql
+
+    def test_expanded_author_profile_is_admin_only(
+        self, client, user_client, admin_client, catalog
+    ):
+        from reviews.models import Review
+
+        author = Review.objects.filter(
+            title=catalog['title']).order_by('-pub_date')[0].author
+        author.first_name, author.last_name = 'Secret', 'Person'
+        author.bio = 'private bio'
+        author.save()
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        for anyone in (client, user_client):
+            response = anyone.get(url, {'expand': 'author'})
+            authors = [review['author'] for review in response.json()['results']]
+            assert all(set(author) == {'username'} for author in authors), (
+                'Проверьте, что ?expand=author не раскрывает профиль '
+                'автора тем, кому закрыт /users/'
+            )
+        assert client.get(f'/api/v1/users/{author.username}/').status_code == 401
+
+        response = admin_client.get(url, {'expand': 'author'})
+        assert response.json()['results'][0]['author'] == {
+            'username': author.username, 'first_name': 'Secret',
+            'last_name': 'Person', 'bio': 'private bio',
+        }, 'Проверьте, что администратор видит профиль автора'
+
+    def test_reviews_cursor(self, client, catalog):
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with query_budget(2, 'reviews?cursor=&fields=text'):
+            response = client.get(url, {'cursor': '', 'fields': 'text'})
+        assert response.json()['next']
+
+    def test_comments(self, client, catalog):
+        review = catalog['review']
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               '/comments/')
+        comment = client.get(
+            url, {'fields': 'author', 'expand': 'author'}
+        ).json()['results'][0]
+        assert set(comment) == {'id', 'author'}
+        assert 'username' in comment['author']
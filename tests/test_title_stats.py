@@ -0,0 +1,110 @@
+import pytest
+from django.core.management import call_command
+
+
+def expected(scores):
+    count = len(scores)
+    mean = sum(scores) / count
+    ordered = sorted(scores)
+    median = (ordered[(count - 1) // 2] + ordered[count // 2]) / 2
+    stddev = (sum((s - mean) ** 2 for s in scores) / count) ** 0.5
+    return count, mean, median, stddev
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def stats(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.status_code == 200
+        return response.json()
+
+    def check(self, data, scores):
+        count, mean, median, stddev = expected(scores)
+        assert data['count'] == count
+        assert data['mean'] == pytest.approx(mean)
+        assert data['median'] == median
+        assert data['stddev'] == pytest.approx(stddev)
+        assert data['scores'] == {
+            str(score): scores.count(score) for score in range(1, 11)
+        }, 'Проверьте гистограмму оценок произведения'
+
+    def test_stats_endpoint(self, client, catalog):
+        title = catalog['title']
+        scores = list(title.reviews.values_list('score', flat=True))
+        data = self.stats(client, title)
+        assert data['title'] == title.id
+        self.check(data, scores)
+
+    def test_title_without_reviews(self, client, catalog):
+        from reviews.models import Title
+
+        title = Title.objects.filter(reviews__isnull=True).first()
+        data = self.stats(client, title)
+        assert data['count'] == 0 and data['mean'] is None
+        assert set(data['scores'].values()) == {0}
+
+    def test_missing_title(self, client, catalog):
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    def test_review_writes_move_buckets(
+        self, client, user_client, admin_client, catalog
+    ):
+        title = catalog['title']
+        scores = list(title.reviews.values_list('score', flat=True))
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        review = user_client.post(url, {'text': 'Текст', 'score': 3}).json()
+        self.check(self.stats(client, title), scores + [3])
+
+        user_client.patch(f'{url}{review["id"]}/', {'score': 9})
+        self.check(self.stats(client, title), scores + [9])
+
+        user_client.delete(f'{url}{review["id"]}/')
+        self.check(self.stats(client, title), scores)
+
+        admin_client.delete(f'{url}{catalog["review"].id}/')
+        scores.remove(catalog['review'].score)
+        self.check(self.stats(client, title), scores)
+
+    def test_author_cascade_moves_buckets(
+        self, client, admin_client, catalog
+    ):
+        from reviews.stats import rebuild_title_stats
+
+        title, review = catalog['title'], catalog['review']
+        scores = list(title.reviews.exclude(
+            author=review.author).values_list('score', flat=True))
+        response = admin_client.delete(
+            f'/api/v1/users/{review.author.username}/')
+        assert response.status_code == 204
+        self.check(self.stats(client, title), scores)
+        rebuild_title_stats([title.id])
+        self.check(self.stats(client, title), scores)
+
+    def test_title_cascade(self, admin_client, catalog):
+        from reviews.models import TitleStats
+
+        title = catalog['title']
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204
+        assert not TitleStats.objects.filter(title_id=title.id).exists(), (
+            'Проверьте, что статистика удаляется вместе с произведением'
+        )
+
+    def test_first_review_creates_row(self, client, user_client, catalog):
+        from reviews.models import Title
+
+        title = Title.objects.filter(reviews__isnull=True).first()
+        user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Т', 'score': 6})
+        self.check(self.stats(client, title), [6])
+
+    def test_rebuild_command(self, client, catalog):
+        from reviews.models import TitleStats
+
+        title = catalog['title']
+        scores = list(title.reviews.values_list('score', flat=True))
+        TitleStats.objects.all().delete()
+        call_command('rebuild_title_stats')
+        self.check(self.stats(client, title), scores)
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from .query_budget import query_budget
+
+UNIQUE_REVIEW = 'Вы уже оставили отзыв к данному произведению'
+
+
+@pytest.mark.django_db
+class TestWritePath:
+
+    def test_review_create_query_budget(self, user_client, catalog):
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # UPDATE рейтинга, INSERT и UPDATE гистограммы
+        # внутри SAVEPOINT ... RELEASE.
+        with query_budget(5, label=f'POST {url}'):
+            response = user_client.post(url, {'text': 'Текст', 'score': 7})
+        assert response.status_code == 201, (
+            f'Проверьте, что POST-запрос к `{url}` создаёт отзыв'
+        )
+        title.refresh_from_db()
+        assert title.rating_count == 13, (
+            'Проверьте, что новый отзыв учитывается в рейтинге'
+        )
+
+    def test_duplicate_review_keeps_message(self, user_client, catalog):
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, {'text': 'Текст', 'score': 7})
+        response = user_client.post(url, {'text': 'Ещё', 'score': 1})
+        assert response.status_code == 400
+        assert response.json() == {'non_field_errors': [UNIQUE_REVIEW]}, (
+            'Проверьте, что повторный отзыв возвращает прежнее сообщение'
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (
+            sum(i % 10 + 1 for i in range(12)) + 7, 13
+        ), 'Проверьте, что отклонённый отзыв не меняет рейтинг'
+
+    def test_other_integrity_errors_are_not_masked(
+        self, user_client, catalog, monkeypatch
+    ):
+        from django.db import IntegrityError
+        from reviews.models import TitleStats
+
+        def broken(*args, **kwargs):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(TitleStats.objects, 'shift_scores', broken)
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        with pytest.raises(IntegrityError, match='FOREIGN KEY'):
+            user_client.post(url, {'text': 'Текст', 'score': 7})
+
+    def test_review_for_missing_title(self, user_client, catalog):
+        response = user_client.post(
+            '/api/v1/titles/0/reviews/', {'text': 'Текст', 'score': 7})
+        assert response.status_code == 404
+
+    def test_comment_create_query_budget(self, user_client, catalog):
+        title, review = catalog['title'], catalog['review']
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        with query_budget(1, label=f'POST {url}'):
+            response = user_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 201, (
+            f'Проверьте, что POST-запрос к `{url}` создаёт комментарий'
+        )
+        data = response.json()
+        assert data['author'] == 'TestUser' and data['id'] and (
+            data['pub_date']
+        ), 'Проверьте поля созданного комментария'
+        assert review.comments.filter(id=data['id']).exists()
+
+    def test_comment_for_review_of_other_title(self, user_client, catalog):
+        title, review = catalog['title'], catalog['review']
+        other = title.__class__.objects.exclude(pk=title.pk).first()
+        url = f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        response = user_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 404, (
+            'Проверьте, что комментарий к отзыву чужого произведения '
+            'возвращает 404'
+        )
+        assert not review.comments.filter(text='Комментарий').exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_duplicate_reviews(user, catalog):
+    '''
+    Параллельные POST одного автора: ровно один 201, остальные 400,
+    и ни один запрос не выходит за бюджет.
+    '''
+    title = catalog['title']
+    url = f'/api/v1/titles/{title.id}/reviews/'
+    workers = 4
+    barrier = threading.Barrier(workers)
+    results = []
+
+    def post(score):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        barrier.wait()
+        try:
+            # BEGIN, UPDATE рейтинга, INSERT отзыва, UPDATE гистограммы.
+            with query_budget(4, label=f'POST {url}') as context:
+                response = client.post(url, {'text': 'Текст', 'score': score})
+            results.append(
+                (response.status_code, len(context.captured_queries)))
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=post, args=(score,))
+        for score in range(1, workers + 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    statuses = sorted(status for status, _ in results)
+    assert statuses == [201] + [400] * (workers - 1), (
+        'Проверьте, что из параллельных отзывов одного автора '
+        f'создаётся ровно один: {statuses}'
+    )
+    title.refresh_from_db()
+    assert title.rating_count == 13
+    assert title.reviews.filter(author=user).count() == 1